@@ -2,9 +2,10 @@ import tempfile
 
 import streamlit as st
 import torch
-import cv2
 
+from core.helper.frame_source import FrameSource
 from run_detection import run_detection
+from usecase.registry import registry
 
 torch.classes.__path__ = []
 
@@ -12,7 +13,7 @@ torch.classes.__path__ = []
 def __main():
     st.title("🚨 Object Detection Interface")
 
-    use_case = st.selectbox("Select Use Case", ["palm_security", "ppe", "road_damage"])
+    use_case = st.selectbox("Select Use Case", registry.names())
     input_source = st.radio(
         "Select Input Source",
         ["Camera (by Device ID)", "Upload Video", "Streaming Link"]
@@ -22,7 +23,7 @@ def __main():
         device_id = st.number_input("Enter camera device ID (e.g., 0, 1)", min_value=0, step=1, value=0)
         if use_case and st.button("Start Detection"):
             st.write(f"🎥 Using camera device ID {device_id} for live detection...")
-            cap = cv2.VideoCapture(device_id)
+            cap = FrameSource(int(device_id))
             if not cap.isOpened():
                 st.error(f"❌ Error: Cannot access camera device ID {device_id}")
                 return
@@ -33,14 +34,15 @@ def __main():
         if video_file and st.button("Start Detection"):
             tfile = tempfile.NamedTemporaryFile(delete=False)
             tfile.write(video_file.read())
-            cap = cv2.VideoCapture(tfile.name)
+            tfile.close()
+            cap = FrameSource(tfile.name, mode=FrameSource.LOSSLESS)
             run_detection(cap, use_case)
 
     elif input_source == "Streaming Link":
         stream_url = st.text_input("🔗 Enter streaming URL (e.g. RTSP/HTTP)")
         if stream_url and use_case and st.button("Start Detection"):
             st.write(f"📡 Connecting to stream: {stream_url}")
-            cap = cv2.VideoCapture(stream_url)
+            cap = FrameSource(stream_url, mode=FrameSource.LATEST)
             if not cap.isOpened():
                 st.error("❌ Error: Cannot access the streaming link")
                 return
@@ -0,0 +1,68 @@
+import argparse
+import json
+import os
+import sys
+
+from core.benchmark.pipeline_benchmark import (
+    StubDetector, compare, load, make_synthetic_video, run_benchmark, run_decode_benchmark, save,
+)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time each stage of the detection pipeline.")
+    parser.add_argument("--video", help="Video to process. Defaults to a generated synthetic video")
+    parser.add_argument("--seconds", type=float, default=10, help="Length of the synthetic video")
+    parser.add_argument("--frames", type=int, default=None, help="Stop after this many frames")
+    parser.add_argument(
+        "--usecase",
+        default=None,
+        help="Benchmark the real detectors of this use case (needs the weights). Defaults to stub detectors",
+    )
+    parser.add_argument("--stubs", type=int, default=2, help="Number of stub detectors")
+    parser.add_argument("--stub-latency-ms", type=float, default=20, help="CPU time each stub spends per frame")
+    parser.add_argument("--output", default="benchmark/results.json", help="Where to write the results")
+    parser.add_argument("--baseline", help="Results of an earlier run to compare against")
+    parser.add_argument(
+        "--decode",
+        action="store_true",
+        help="Only compare frame decoding: OpenCV + resize against the ffmpeg decoder",
+    )
+    parser.add_argument("--decode-skip", default=None, help="With --decode, ffmpeg skip mode: keyframes or N")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed slowdown before a stage counts as a regression")
+    args = parser.parse_args()
+
+    video = args.video
+    if not video:
+        video = "benchmark/synthetic.mp4"
+        if not os.path.exists(video):
+            print(f"[Benchmark] Generating {video}...")
+            make_synthetic_video(video, seconds=args.seconds)
+
+    if args.decode:
+        result = run_decode_benchmark(video, frames=args.frames, skip=args.decode_skip)
+        save(result, args.output)
+        print(json.dumps(result, indent=2))
+        sys.exit(0)
+
+    detectors = None
+    if args.usecase:
+        try:
+            from usecase.registry import registry
+            detectors = registry.create(args.usecase, warm_up=True)
+        except Exception as e:
+            print(f"[Benchmark] Cannot load {args.usecase} ({e}), using stub detectors")
+    if not detectors:
+        detectors = [
+            StubDetector(f"stub{i}", latency_ms=args.stub_latency_ms, polygons=i % 2 == 1, seed=i)
+            for i in range(args.stubs)
+        ]
+
+    result = run_benchmark(video, detectors, frames=args.frames)
+    save(result, args.output)
+    print(json.dumps(result, indent=2))
+    print(f"[Benchmark] Results saved to {args.output}")
+
+    if args.baseline:
+        regressions = compare(result, load(args.baseline), tolerance=args.tolerance)
+        for regression in regressions:
+            print(f"[Benchmark] Regression: {regression}")
+        sys.exit(1 if regressions else 0)
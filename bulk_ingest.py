@@ -0,0 +1,25 @@
+import argparse
+import json
+
+from core.engine.bulk_ingest import bulk_ingest, find_videos
+from usecase.registry import registry
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scan a directory of recordings with one use case, in parallel.")
+    parser.add_argument("directory", help="Folder searched recursively for .mp4/.avi/.mov/.mkv files")
+    parser.add_argument("--usecase", required=True, choices=registry.names(), help="Use case to run")
+    parser.add_argument("--manifest", default="output/bulk/manifest.jsonl", help="Progress/results file, reused to resume")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU core)")
+    parser.add_argument("--batch-size", type=int, default=8, help="Frames per model call")
+    parser.add_argument("--jsonl-dir", default=None, help="Also write per-frame detections, one JSONL file per video")
+    args = parser.parse_args()
+
+    stats = bulk_ingest(
+        find_videos(args.directory),
+        args.usecase,
+        args.manifest,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        jsonl_dir=args.jsonl_dir,
+    )
+    print(json.dumps(stats))
@@ -9,3 +9,70 @@ load_dotenv()
 
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "YOUR_TELEGRAM_BOT_TOKEN_HERE")  # <<< SET IN .ENV
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID", "YOUR_DEFAULT_CHAT_ID_HERE")  # <<< SET IN .ENV
+# Point at a local stub server to test notifications without Telegram
+TELEGRAM_API_BASE = os.getenv("TELEGRAM_API_BASE", "https://api.telegram.org")
+
+# Notification dispatcher (see core/helper/notification_dispatcher.py)
+NOTIFY_QUEUE_SIZE = int(os.getenv("NOTIFY_QUEUE_SIZE", "32"))
+NOTIFY_MAX_CONCURRENCY = int(os.getenv("NOTIFY_MAX_CONCURRENCY", "2"))
+NOTIFY_MAX_RETRIES = int(os.getenv("NOTIFY_MAX_RETRIES", "4"))
+
+# Alert coalescing (see core/report/alert_aggregator.py); ALERT_MIN_INTERVAL_SECONDS=0 sends every alert
+ALERT_WINDOW_SECONDS = float(os.getenv("ALERT_WINDOW_SECONDS", "10"))
+ALERT_MIN_INTERVAL_SECONDS = float(os.getenv("ALERT_MIN_INTERVAL_SECONDS", "60"))
+
+# Process-wide model cache (see core/helper/model_cache.py)
+MODEL_CACHE_MAX_MODELS = int(os.getenv("MODEL_CACHE_MAX_MODELS", "4"))
+MODEL_CACHE_MAX_MB = float(os.getenv("MODEL_CACHE_MAX_MB", "0"))  # 0 = no memory cap
+
+# Inference backend per detector: torch, onnx or onnx-int8 (see core/helper/backends.py)
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch")
+# e.g. "fire=onnx-int8,general=onnx"; detectors not listed use INFERENCE_BACKEND
+DETECTOR_BACKENDS = dict(
+    item.split("=", 1) for item in os.getenv("DETECTOR_BACKENDS", "").split(",") if "=" in item
+)
+# Folder of images or a video used to calibrate int8 quantization
+ONNX_CALIBRATION_SOURCE = os.getenv("ONNX_CALIBRATION_SOURCE", "")
+
+# Seconds of frames kept before a trigger and prepended to the clip (0 disables it)
+PREROLL_SECONDS = float(os.getenv("PREROLL_SECONDS", "2"))
+PREROLL_MAX_MB = float(os.getenv("PREROLL_MAX_MB", "32"))  # 0 = bounded by seconds only
+PREROLL_JPEG_QUALITY = int(os.getenv("PREROLL_JPEG_QUALITY", "80"))
+
+# Clip recording: "ffmpeg" encodes H.264 once while recording, "opencv" writes mp4v (re-encoded before upload)
+RECORDER_BACKEND = os.getenv("RECORDER_BACKEND", "ffmpeg")
+RECORDER_CRF = int(os.getenv("RECORDER_CRF", "28"))
+RECORDER_PRESET = os.getenv("RECORDER_PRESET", "veryfast")
+RECORDER_SCALE = os.getenv("RECORDER_SCALE", "")  # e.g. "960x540", empty = frame size
+
+# Bounded disk queues; policy is block, drop-oldest or drop-newest (see core/helper/frame_queue.py)
+RECORDER_QUEUE_SIZE = int(os.getenv("RECORDER_QUEUE_SIZE", "120"))
+RECORDER_QUEUE_POLICY = os.getenv("RECORDER_QUEUE_POLICY", "drop-oldest")
+CAPTURE_QUEUE_SIZE = int(os.getenv("CAPTURE_QUEUE_SIZE", "8"))
+CAPTURE_QUEUE_POLICY = os.getenv("CAPTURE_QUEUE_POLICY", "drop-newest")
+
+# Motion gate in front of the models, for the use cases that allow it (see core/engine/motion_gate.py)
+MOTION_GATE = os.getenv("MOTION_GATE", "false").lower() in ("1", "true", "yes")
+MOTION_THRESHOLD = float(os.getenv("MOTION_THRESHOLD", "0.005"))  # fraction of changed pixels
+MOTION_KEEPALIVE_FRAMES = int(os.getenv("MOTION_KEEPALIVE_FRAMES", "30"))  # run the models at least this often
+
+# JSON file mapping each source (as passed to --video) to its region-of-interest polygon(s), see core/engine/roi.py
+ROI_CONFIG = os.getenv("ROI_CONFIG", "")
+
+# Per-frame inference budget; when exceeded, model input sizes step down this ladder (0 disables it)
+LATENCY_BUDGET_MS = float(os.getenv("LATENCY_BUDGET_MS", "0"))
+LATENCY_TARGET_FPS = float(os.getenv("LATENCY_TARGET_FPS", "0"))  # 0 = budget in ms only
+LATENCY_IMGSZ_STEPS = [int(size) for size in os.getenv("LATENCY_IMGSZ_STEPS", "640,512,416,320").split(",") if size]
+LATENCY_MAX_DET_STEPS = [int(n) for n in os.getenv("LATENCY_MAX_DET_STEPS", "300,100,50").split(",") if n]
+
+# Frame decoding: "opencv", or "ffmpeg" to decode in a subprocess already scaled to the working size
+DECODER = os.getenv("DECODER", "opencv")
+DECODE_SKIP = os.getenv("DECODE_SKIP", "")  # ffmpeg only: "keyframes", or N to decode every Nth frame
+
+# Runtime metrics: Prometheus endpoint on localhost (0 disables) and a JSON log line every N seconds (0 disables)
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_LOG_INTERVAL = float(os.getenv("METRICS_LOG_INTERVAL", "60"))
+
+
+def backend_for(detector: str) -> str:
+    return DETECTOR_BACKENDS.get(detector, INFERENCE_BACKEND)
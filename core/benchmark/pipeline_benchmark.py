@@ -0,0 +1,293 @@
+import json
+import os
+import resource
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from core.engine.renderer import AnnotationRenderer
+from core.helper.capture import ImageCapture
+from core.helper.detections import Detections
+from core.helper.recorder import VideoRecorder
+from usecase.base_detector import BaseDetector
+
+
+def make_synthetic_video(
+        path: str,
+        seconds: float = 10,
+        fps: float = 30,
+        size: Tuple[int, int] = (1920, 1080),
+        objects: int = 5,
+        seed: int = 0,
+) -> str:
+    """Write a video of textured noise with a few moving rectangles, so decode and encode cost is realistic."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    width, height = size
+    rng = np.random.default_rng(seed)
+    background = cv2.GaussianBlur(rng.integers(0, 255, (height, width, 3), dtype=np.uint8), (0, 0), 3)
+    positions = rng.uniform((0, 0), (width - 200, height - 200), (objects, 2))
+    velocities = rng.uniform(-8, 8, (objects, 2))
+    colors = rng.integers(0, 255, (objects, 3)).tolist()
+
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+    for _ in range(int(seconds * fps)):
+        frame = background.copy()
+        positions = np.clip(positions + velocities, 0, (width - 200, height - 200))
+        for (x, y), color in zip(positions.astype(int).tolist(), colors):
+            cv2.rectangle(frame, (x, y), (x + 160, y + 120), color, -1)
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+class StubDetector(BaseDetector):
+    """
+    Stand-in for a model: burns `latency_ms` of CPU per frame and returns `boxes` random detections
+    (optionally as polygons), so the rest of the pipeline can be measured without weights.
+    """
+
+    def __init__(self, name: str = "stub", latency_ms: float = 20, boxes: int = 5, polygons: bool = False, seed: int = 0):
+        self.name = name
+        self.latency = latency_ms / 1000
+        self.boxes = boxes
+        self.polygons = polygons
+        self.rng = np.random.default_rng(seed)
+        self.fill_alpha = 0.4 if polygons else 0.0
+        self.last_timings: Dict[str, float] = {}
+
+    def predict(self, frame: np.ndarray) -> Detections:
+        start = time.perf_counter()
+        # Busy work instead of sleep so the stub competes for the CPU like a real model
+        small = cv2.resize(frame, (320, 320))
+        while time.perf_counter() - start < self.latency:
+            cv2.GaussianBlur(small, (5, 5), 0)
+        inferred_at = time.perf_counter()
+
+        height, width = frame.shape[:2]
+        xy = self.rng.uniform((0, 0), (width - 100, height - 100), (self.boxes, 2))
+        xyxy = np.hstack([xy, xy + self.rng.uniform(40, 100, (self.boxes, 2))])
+        points = offsets = None
+        if self.polygons:
+            points = xyxy[:, [0, 1, 2, 1, 2, 3, 0, 3]].reshape(-1, 2)
+            offsets = np.arange(self.boxes + 1) * 4
+        detections = Detections(
+            xyxy, np.zeros(self.boxes), np.full(self.boxes, self.name), self.rng.uniform(0.3, 1, self.boxes),
+            points, offsets,
+        )
+
+        self.last_timings = {"inference": inferred_at - start, "extract": time.perf_counter() - inferred_at}
+        return detections
+
+
+def _detector_name(detector: BaseDetector, index: int) -> str:
+    return getattr(detector, "name", None) or f"{index}_{type(detector).__name__}"
+
+
+def _stage_timings(detector: BaseDetector) -> Dict[str, float]:
+    timings = getattr(detector, "last_timings", None)
+    if timings:
+        return timings
+    totals: Dict[str, float] = {}
+    for model in detector.models():
+        for stage, seconds in model.last_timings.items():
+            totals[stage] = totals.get(stage, 0.0) + seconds
+    return totals
+
+
+def percentiles(samples: List[float]) -> dict:
+    values = np.asarray(samples) * 1000
+    return {
+        "count": len(values),
+        "mean_ms": round(float(values.mean()), 3),
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+    }
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_benchmark(
+        video: str,
+        detectors: List[BaseDetector],
+        frames: Optional[int] = None,
+        frame_size: Tuple[int, int] = (1280, 720),
+        capture_every: int = 30,
+        output_dir: str = "benchmark",
+) -> dict:
+    """
+    Time each stage of the per-frame pipeline separately over `video`: decode, resize, each detector's
+    inference and result extraction, annotation, recorder enqueue and image capture enqueue.
+    """
+    cap = cv2.VideoCapture(video)
+    if not cap.isOpened():
+        raise ValueError(f"Cannot open video: {video}")
+
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    recorder = VideoRecorder(frame_size, fps, output_dir=f"{output_dir}/videos", queue_policy="block")
+    capture = ImageCapture(output_dir=f"{output_dir}/images", queue_policy="block")
+    renderer = AnnotationRenderer()
+    names = [_detector_name(detector, i) for i, detector in enumerate(detectors)]
+
+    samples = defaultdict(list)
+    processed = 0
+    recorder.start()
+    started = time.perf_counter()
+    try:
+        while frames is None or processed < frames:
+            t0 = time.perf_counter()
+            ret, frame = cap.read()
+            if not ret:
+                break
+            t1 = time.perf_counter()
+            frame = cv2.resize(frame, frame_size)
+            t2 = time.perf_counter()
+            samples["decode"].append(t1 - t0)
+            samples["resize"].append(t2 - t1)
+
+            predictions = []
+            for name, detector in zip(names, detectors):
+                start = time.perf_counter()
+                predictions.append(detector.predict(frame))
+                samples[f"detector.{name}.total"].append(time.perf_counter() - start)
+                for stage, seconds in _stage_timings(detector).items():
+                    samples[f"detector.{name}.{stage}"].append(seconds)
+
+            start = time.perf_counter()
+            recorder.write(frame)
+            samples["recorder_enqueue"].append(time.perf_counter() - start)
+
+            if processed % capture_every == 0:
+                start = time.perf_counter()
+                capture.capture(frame)
+                samples["capture_enqueue"].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            renderer.render(frame.copy(), zip(detectors, predictions))
+            samples["annotate"].append(time.perf_counter() - start)
+
+            samples["frame"].append(time.perf_counter() - t0)
+            processed += 1
+    finally:
+        elapsed = time.perf_counter() - started
+        cap.release()
+        recorder.stop()
+        capture.shutdown()
+
+    return {
+        "video": video,
+        "frames": processed,
+        "frame_size": list(frame_size),
+        "detectors": names,
+        "throughput_fps": round(processed / elapsed, 2) if elapsed else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": {stage: percentiles(values) for stage, values in samples.items() if values},
+        "recorder_queue": recorder.stats(),
+        "capture_queue": capture.stats(),
+    }
+
+
+def _cpu_seconds() -> float:
+    # Includes finished child processes, i.e. the ffmpeg decoder once it has been waited for
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def run_decode_benchmark(
+        video: str,
+        frame_size: Tuple[int, int] = (1280, 720),
+        frames: Optional[int] = None,
+        skip=None,
+) -> dict:
+    """
+    Compare getting engine-sized frames from `video` with OpenCV (decode at native size, then
+    `cv2.resize`) against `FFmpegCapture` (decode and scale in ffmpeg, read into reused buffers).
+    With `skip=N` OpenCV `grab()`s the frames in between, the cheapest it can skip; it has no
+    keyframe-only mode, so with "keyframes" it reads every frame.
+    """
+    from core.helper.ffmpeg_capture import FFmpegCapture, parse_skip
+
+    skip = parse_skip(skip)
+    stride = skip if isinstance(skip, int) else 1
+
+    def measure(open_capture, resize: bool) -> dict:
+        cpu_start = _cpu_seconds()
+        started = time.perf_counter()
+        cap = open_capture()
+        if not cap.isOpened():
+            return {"error": "cannot open"}
+        samples = []
+        while frames is None or len(samples) < frames:
+            start = time.perf_counter()
+            if resize:
+                ret = all(cap.grab() for _ in range(stride - 1))
+                ret, frame = cap.read() if ret else (False, None)
+                if ret:
+                    frame = cv2.resize(frame, frame_size)
+            else:
+                ret, frame = cap.read()
+            if not ret:
+                break
+            samples.append(time.perf_counter() - start)
+        cap.release()
+        elapsed = time.perf_counter() - started
+        cpu = _cpu_seconds() - cpu_start
+        if not samples:
+            return {"error": "no frames"}
+        return {
+            "frames": len(samples),
+            "elapsed_seconds": round(elapsed, 3),
+            "cpu_seconds": round(cpu, 3),
+            "fps": round(len(samples) / elapsed, 2),
+            "cpu_ms_per_frame": round(cpu / len(samples) * 1000, 3),
+            "read": percentiles(samples),
+        }
+
+    return {
+        "video": video,
+        "frame_size": list(frame_size),
+        "skip": skip,
+        "opencv": measure(lambda: cv2.VideoCapture(video), resize=True),
+        "ffmpeg": measure(lambda: FFmpegCapture(video, frame_size, skip=skip), resize=False),
+    }
+
+
+def compare(result: dict, baseline: dict, tolerance: float = 0.1, min_samples: int = 20) -> List[str]:
+    """
+    Regressions of `result` against `baseline`: throughput drops or p95 stage latencies growing beyond
+    `tolerance`. Stages with fewer than `min_samples` samples are too noisy to compare.
+    """
+    regressions = []
+    if result["throughput_fps"] < baseline["throughput_fps"] * (1 - tolerance):
+        regressions.append(f"throughput {baseline['throughput_fps']} -> {result['throughput_fps']} fps")
+
+    for stage, stats in result["stages"].items():
+        before = baseline.get("stages", {}).get(stage)
+        if not before or min(stats["count"], before["count"]) < min_samples:
+            continue
+        if stats["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{stage} p95 {before['p95_ms']} -> {stats['p95_ms']} ms")
+
+    if result["peak_rss_mb"] > baseline["peak_rss_mb"] * (1 + tolerance):
+        regressions.append(f"peak RSS {baseline['peak_rss_mb']} -> {result['peak_rss_mb']} MB")
+    return regressions
+
+
+def save(result: dict, path: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(result, f, indent=2)
+
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
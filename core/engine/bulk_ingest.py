@@ -0,0 +1,227 @@
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import cv2
+
+from core.engine.detector_pool import _set_intra_op_threads
+from core.helper.detections import Detections
+from core.helper.frame_source import FrameSource
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv")
+
+# Per worker process: detectors are built once and reused for every file it gets
+_detectors = None
+
+
+def _init_worker(use_case: str, num_threads: int):
+    global _detectors
+    _set_intra_op_threads(num_threads)
+    from usecase.registry import registry
+    _detectors = registry.create(use_case)
+    # Before the warm-up, so ONNX models are only ever run with the worker's budget
+    for detector in _detectors:
+        for model in detector.models():
+            model.set_num_threads(num_threads)
+    registry.warm_up_detectors(_detectors)
+
+
+def _accumulate(totals: Dict[str, dict], detections: Detections):
+    for cls, stats in detections.summary().items():
+        entry = totals.setdefault(cls, {"count": 0, "confidence_sum": 0.0, "max_confidence": 0.0})
+        entry["count"] += stats["count"]
+        entry["confidence_sum"] += stats["avg_confidence"] * stats["count"]
+        entry["max_confidence"] = max(entry["max_confidence"], stats["max_confidence"])
+
+
+def process_file(
+        path: str,
+        batch_size: int = 8,
+        frame_size=(1280, 720),
+        jsonl_dir: Optional[str] = None,
+) -> dict:
+    """Run the worker's detectors over one file. Returns frame counts and a per-class summary."""
+    started = time.perf_counter()
+    source = FrameSource(path, mode=FrameSource.LOSSLESS, buffer_size=batch_size * 2)
+    if not source.isOpened():
+        source.release()
+        raise ValueError(f"Cannot open video: {path}")
+
+    fps = source.get(cv2.CAP_PROP_FPS) or 30
+    names = [type(detector).__name__ for detector in _detectors]
+    output = jsonl_path = None
+    if jsonl_dir:
+        os.makedirs(jsonl_dir, exist_ok=True)
+        jsonl_path = _jsonl_path(jsonl_dir, path)
+        output = open(jsonl_path, "w")
+
+    totals: Dict[str, dict] = {}
+    frames = frames_with_detections = 0
+    try:
+        while True:
+            batch = []
+            while len(batch) < batch_size:
+                ret, frame = source.read()
+                if not ret:
+                    break
+                batch.append(cv2.resize(frame, frame_size))
+            if not batch:
+                break
+
+            per_detector = [detector.predict_batch(batch) for detector in _detectors]
+            for j in range(len(batch)):
+                detections = Detections.merge([results[j] for results in per_detector])
+                if detections:
+                    frames_with_detections += 1
+                    _accumulate(totals, detections)
+                if output:
+                    rows = [
+                        {**det, "detector": name}
+                        for name, results in zip(names, per_detector) for det in results[j]
+                    ]
+                    output.write(json.dumps({"frame": frames + j, "time": round((frames + j) / fps, 3),
+                                             "detections": rows}) + "\n")
+            frames += len(batch)
+    finally:
+        source.release()
+        if output:
+            output.close()
+
+    summary = {
+        cls: {
+            "count": entry["count"],
+            "avg_confidence": round(entry["confidence_sum"] / entry["count"], 4),
+            "max_confidence": round(entry["max_confidence"], 4),
+        }
+        for cls, entry in totals.items()
+    }
+    return {
+        "frames": frames,
+        "media_seconds": round(frames / fps, 2),
+        "frames_with_detections": frames_with_detections,
+        "seconds": round(time.perf_counter() - started, 2),
+        "summary": summary,
+        **({"jsonl": jsonl_path} if jsonl_path else {}),
+    }
+
+
+def _jsonl_path(jsonl_dir: str, path: str) -> str:
+    # Videos are found recursively, so a/cam1.mp4 and b/cam1.mp4 need different outputs
+    digest = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:8]
+    return os.path.join(jsonl_dir, f"{os.path.splitext(os.path.basename(path))[0]}.{digest}.jsonl")
+
+
+def _file_key(path: str) -> dict:
+    stat = os.stat(path)
+    return {"file": os.path.abspath(path), "size": stat.st_size, "mtime": int(stat.st_mtime)}
+
+
+class Manifest:
+    """
+    Append-only JSONL record of processed files. A file counts as done for a use case while its
+    path, size and mtime match, so an interrupted run picks up where it stopped, changed files are
+    redone, and one manifest can be shared by runs of different use cases over the same files.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done: Dict[Tuple[str, str], dict] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # a line cut short by an interruption
+                    if entry.get("status") == "done":
+                        self.done[entry["file"], entry.get("use_case")] = entry
+
+    def is_done(self, path: str, use_case: str) -> bool:
+        key = _file_key(path)
+        entry = self.done.get((key["file"], use_case))
+        return entry is not None and entry["size"] == key["size"] and entry["mtime"] == key["mtime"]
+
+    def record(self, path: str, use_case: str, status: str, **fields):
+        entry = {**_file_key(path), "use_case": use_case, "status": status, **fields}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        if status == "done":
+            self.done[entry["file"], use_case] = entry
+
+
+def find_videos(directory: str) -> List[str]:
+    return sorted(
+        path for path in glob.glob(os.path.join(directory, "**", "*"), recursive=True)
+        if path.lower().endswith(VIDEO_EXTENSIONS)
+    )
+
+
+def bulk_ingest(
+        files: Iterable[str],
+        use_case: str,
+        manifest_path: str,
+        workers: Optional[int] = None,
+        batch_size: int = 8,
+        jsonl_dir: Optional[str] = None,
+) -> dict:
+    """Process `files` across a pool of warm worker processes, recording each result in the manifest."""
+    from usecase.registry import registry
+    if use_case not in registry.names():
+        # Checked here: in the workers an unknown use case would only show up as every file failing
+        raise ValueError(f"Unknown usecase: {use_case} (choose from {', '.join(registry.names())})")
+
+    manifest = Manifest(manifest_path)
+    files = list(files)
+    pending = [path for path in files if not manifest.is_done(path, use_case)]
+    print(f"[BulkIngest] {len(files)} files, {len(files) - len(pending)} already done, {len(pending)} to process")
+    if not pending:
+        return _stats(0, 0, 0, 0.0, workers=0)
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(pending)))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+
+    started = time.perf_counter()
+    frames = done = failed = 0
+    # spawn: workers must not inherit torch/OpenMP thread state from the parent
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker,
+                             initargs=(use_case, threads)) as pool:
+        futures = {pool.submit(process_file, path, batch_size, jsonl_dir=jsonl_dir): path for path in pending}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                failed += 1
+                manifest.record(path, use_case, "failed", error=str(e))
+                print(f"[BulkIngest] ❌ {path}: {e}")
+                continue
+
+            done += 1
+            frames += result["frames"]
+            manifest.record(path, use_case, "done", **result)
+            classes = ", ".join(f"{cls} ×{stats['count']}" for cls, stats in result["summary"].items()) or "nothing"
+            print(f"[BulkIngest] ✅ ({done + failed}/{len(pending)}) {path}: {result['frames']} frames "
+                  f"in {result['seconds']}s, {classes}")
+
+    return _stats(done, failed, frames, time.perf_counter() - started, workers)
+
+
+def _stats(done: int, failed: int, frames: int, elapsed: float, workers: int) -> dict:
+    return {
+        "files": done,
+        "failed": failed,
+        "frames": frames,
+        "elapsed_seconds": round(elapsed, 2),
+        "frames_per_second": round(frames / elapsed, 2) if elapsed else 0.0,
+        "files_per_hour": round(done * 3600 / elapsed, 1) if elapsed else 0.0,
+        "workers": workers,
+    }
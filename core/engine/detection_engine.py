@@ -1,16 +1,36 @@
+import time
+from concurrent.futures import Future
+
 import cv2
 import numpy as np
 from datetime import datetime
-from typing import List
+from typing import Callable, List, Optional
 
-import cvzone
 from usecase.base_detector import BaseDetector
 from core.helper.recorder import VideoRecorder
 from core.helper.capture import ImageCapture
 from core.report.report import Report
-from core.helper.message import Message
+from core.report.alert_aggregator import AlertAggregator
+from core.helper.detections import Detections
+from core.helper.frame_pool import FramePool, count_copy, pooled, read_only, writable_alias
+from core.helper.metrics import metrics
+from core.helper.preprocess import FramePreprocessor
+from core.helper.preroll import PreRollBuffer
+from core.engine.detector_pool import DetectorPool
+from core.engine.latency_controller import LatencyController
+from core.engine.motion_gate import MotionGate
+from core.engine.roi import RegionOfInterest
+from core.engine.scheduler import InferenceScheduler
+from core.engine.tracker import BoxTracker
+from core.engine.renderer import AnnotationRenderer
 from datetime import datetime, timedelta
 
+_FRAMES_IN = metrics.counter("engine_frames_in_total", "Frames received by the engine")
+_FRAMES_OUT = metrics.counter("engine_frames_out_total", "Frames fully processed by the engine")
+_INFERENCE_SECONDS = metrics.histogram("engine_inference_seconds", "Time to run every detector on one frame")
+_DETECTIONS = metrics.counter("engine_detections_total", "Model detections by class")
+_ALERTS = metrics.counter("engine_alerts_total", "Events that reached the trigger threshold")
+
 
 class DetectionEngine:
     def __init__(
@@ -22,54 +42,279 @@ class DetectionEngine:
             frame_size=(1280, 720),
             start_threshold: int = 30,
             show_timestamp: bool = True,
+            parallel: bool = False,
+            thread_budgets: Optional[List[int]] = None,
+            target_fps: Optional[float] = None,
+            max_stride: int = 6,
+            location: Optional[str] = None,
+            annotate: bool = True,
+            preroll: Optional[PreRollBuffer] = None,
+            max_record_stride: int = 4,
+            alerts: Optional[AlertAggregator] = None,
+            clear_threshold: int = 15,
+            clock: Callable[[], datetime] = datetime.now,
+            motion_gate: Optional[MotionGate] = None,
+            roi: Optional[RegionOfInterest] = None,
+            latency_controller: Optional[LatencyController] = None,
+            sync_output: bool = True,
+            name: Optional[str] = None,
     ):
         self.detectors = detectors
+        self.pool = DetectorPool(detectors, thread_budgets) if parallel and len(detectors) > 1 else None
+
+        # With a target fps the models only run every N frames; a tracker fills the gaps
+        self.scheduler = InferenceScheduler(target_fps, max_stride=max_stride) if target_fps else None
+        self.trackers = [BoxTracker() for _ in detectors] if self.scheduler else None
+        # Lowers model input sizes when inference overruns its per-frame budget
+        self.latency_controller = latency_controller
+        # Models only see this part of the frame, detections outside it never trigger
+        self.roi = roi
+        # Skips the models while the scene is static; the last results stand in for those frames
+        self.motion_gate = motion_gate
+        self.gated = False
+        self.last_predictions = [Detections.empty() for _ in detectors]
         self.recorder = recorder
+        # Frames seen before recording starts, flushed at the head of the clip
+        self.preroll = preroll
+        # When the recorder queue fills up, only every Nth frame is recorded until it drains
+        self.max_record_stride = max_record_stride
+        self.record_stride = 1
+        self.record_index = 0
+        # Frames left out by the stride since the last recorded one. The recorded frame is written
+        # that many extra times: the clip's fps is fixed when it starts but the stride changes
+        # while recording, so duplicates keep playback at real speed
+        self.frames_skipped = 0
         self.capture = capture
         self.report = report
+        # Without an aggregator every alert is sent as before
+        self.alerts = alerts or AlertAggregator(report, window=0, min_interval=0)
 
         self.frame_width, self.frame_height = frame_size
+        # Frames are read-only once prepared and shared by reference with the recorder and the
+        # pre-roll encoder. Every frame waiting in the recorder queue holds a buffer, plus the few
+        # being processed or waiting for the pre-roll encoder, which is idle while recording (the
+        # capture keeps JPEGs, not frames)
+        self.frame_pool = FramePool((self.frame_height, self.frame_width, 3), max_buffers=recorder.queue.maxsize + 4)
+        # True when callers are done with each annotated frame before passing the next one (shown,
+        # encoded). A recorded frame is then annotated in place and only queued for the recorder once
+        # the annotations are undone, on the next frame, instead of annotating a copy. Pass False
+        # when annotated frames are queued somewhere themselves.
+        self.sync_output = sync_output
+        self.pending_record: Optional[tuple] = None  # (frame, undo list, write) to clean up and queue
+        self.frames_finished = 0
+        self.bytes_copied = 0
         self.start_threshold = start_threshold
         self.show_timestamp = show_timestamp
+        self.location = location
+        # Drives clip length and the timestamp overlay; offline runs pass the media time instead
+        self.clock = clock
+        # Metrics are labelled with a short camera name, never the location: it can hold file
+        # paths or stream URLs, which would make one series per file and leak credentials
+        self.metrics_label = name or "default"
+        metrics.add_collector(self._collect_metrics)
+        # Can be toggled per frame, e.g. to draw only while someone watches a headless preview
+        self.annotate = annotate
+        self.renderer = AnnotationRenderer()
         self.recording_start_time: datetime | None = None
         self.isCaptured = False
+        self.alert_message: Optional[Future] = None  # photo alert of the current event, the clip is attached to it
+        self.event_detections = Detections.empty()
+        # Consecutive empty frames needed to end an event, so a flickering detection isn't a new event
+        self.clear_threshold = max(1, clear_threshold)
+        self.empty_frames = 0
 
         self.frame_buffer = 0
         self.recording = False
+        self.frame_shared = False  # the current frame was handed to the recorder or capture
 
     def process_frame(self, frame: np.ndarray) -> np.ndarray:
-        frame = cv2.resize(frame, (self.frame_width, self.frame_height))
-        base_frame = frame.copy()
+        frame = self.prepare_frame(frame)
+        predictions = self._predict(frame)
+        return self.finish_frame(frame, predictions)
+
+    def prepare_frame(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Scale `frame` to the working size. Returns a read-only frame: input of the right size is taken
+        over as is when it is writable or a `FramePool` view (e.g. from `FFmpegCapture`, never reused
+        while referenced); other read-only input, such as a decoder's reused buffer, is copied into the pool.
+        """
+        _FRAMES_IN.inc(camera=self.metrics_label)
+        if frame.shape[:2] != (self.frame_height, self.frame_width):
+            buffer, view = self.frame_pool.acquire()
+            cv2.resize(frame, (self.frame_width, self.frame_height), dst=buffer)
+            return view
+        if frame.flags.writeable:
+            return read_only(frame)
+        if pooled(frame):
+            return frame
+
+        buffer, view = self.frame_pool.acquire()
+        np.copyto(buffer, frame)
+        self._count_copy(buffer.nbytes, "prepare")
+        return view
+
+    def _count_copy(self, nbytes: int, stage: str):
+        self.bytes_copied += nbytes
+        count_copy(nbytes, stage)
+
+    def needs_inference(self, frame: np.ndarray) -> bool:
+        """Whether the models should run on `frame`. Call exactly once per frame."""
+        self.gated = self.motion_gate is not None and not self.motion_gate.should_infer(self.inference_view(frame))
+        if self.gated:
+            return False
+        return self.scheduler is None or self.scheduler.should_infer()
+
+    def inference_view(self, frame: np.ndarray) -> np.ndarray:
+        """The part of `frame` the models should see."""
+        return self.roi.crop(frame) if self.roi else frame
+
+    def to_frame(self, predictions: List[Detections]) -> List[Detections]:
+        """Map predictions made on `inference_view()` back to the frame, dropping those outside the ROI."""
+        if self.roi is None:
+            return predictions
+        return [self.roi.restore(detections) for detections in predictions]
+
+    def tracked_predictions(self) -> List[Detections]:
+        """Detections for a frame the models skipped."""
+        if self.gated:
+            # Nothing moved since the last inference, so its results still hold
+            return self.last_predictions
+        return [tracker.predict() for tracker in self.trackers]
+
+    def observe(self, predictions: List[Detections], latency: float):
+        """Feed real model output (one list per detector) back to the scheduler and trackers."""
+        _INFERENCE_SECONDS.observe(latency, camera=self.metrics_label)
+        self.last_predictions = predictions
+        for detections in predictions:
+            if len(detections):
+                classes, counts = np.unique(detections.class_name, return_counts=True)
+                for cls, count in zip(classes.tolist(), counts.tolist()):
+                    _DETECTIONS.inc(count, camera=self.metrics_label, class_name=cls)
+
+        if self.scheduler is None:
+            return
+
+        self.scheduler.record(latency)
+        for tracker, detections in zip(self.trackers, predictions):
+            tracker.predict()
+            tracker.update(detections)
 
-        all_detections = self._run_detectors(frame)
+    def finish_frame(self, frame: np.ndarray, predictions: List[Detections]) -> np.ndarray:
+        all_detections = Detections.merge(
+            [detector.triggers(detections) for detector, detections in zip(self.detectors, predictions)]
+        )
 
+        # Captures and recordings use the clean frame, annotations are drawn last
+        self._flush_pending_record()
+        self.frame_shared = False
         if all_detections:
-            self._handle_trigger(base_frame, all_detections)
+            # Results repeated on a frame the motion gate skipped are stale: they are still drawn,
+            # but only fresh detections count toward `start_threshold` and start a recording
+            if not self.gated:
+                self.empty_frames = 0
+                self._handle_trigger(frame, all_detections)
         else:
-            self._stop_and_send_recorded_video(detections=all_detections)
-            self.isCaptured = False
+            self.empty_frames += 1
+            if self.empty_frames >= self.clear_threshold:
+                self._stop_and_send_recorded_video(detections=all_detections)
+                self.isCaptured = False
+        self.alerts.poll()
 
-        if self.show_timestamp:
-            self._overlay_timestamp(frame)
-
-        if self.recording:
-            self.recorder.write(base_frame)
+        recorded = self.recording and self._should_record()
+        if recorded:
+            repeat, self.frames_skipped = self.frames_skipped + 1, 0
+            self._hand_off(frame, lambda clean: self.recorder.write(clean, repeat=repeat))
+        elif not self.recording and self.preroll is not None:
+            if self.gated:
+                # Nothing moved, so the pre-roll repeats its last JPEG instead of encoding this frame
+                self.preroll.repeat_last()
+            else:
+                self._hand_off(frame, self.preroll.push)
 
         self._stop_recording_after_timeout(detections=all_detections)
-        return frame
+        FramePreprocessor.shared().discard(frame)
+        _FRAMES_OUT.inc(camera=self.metrics_label)
+        self.frames_finished += 1
+
+        if not self.annotate:
+            return frame
+
+        # Draw in place unless the recorder or capture queue still holds `frame`
+        output = None if self.frame_shared else writable_alias(frame)
+        if output is None:
+            self._flush_pending_record()
+            output, _ = self.frame_pool.acquire()
+            np.copyto(output, frame)
+            self._count_copy(output.nbytes, "annotate")
+        undo = self.pending_record[1] if self.pending_record else None
+        if self.roi:
+            self.roi.draw(output, undo=undo)
+        timestamp = self.clock().strftime("%d %m %Y %H:%M:%S") if self.show_timestamp else None
+        output = self.renderer.render(output, zip(self.detectors, predictions), timestamp=timestamp, undo=undo)
+        if undo:
+            self._count_copy(sum(pixels.nbytes for _, pixels in undo), "annotate_undo")
+        return output
+
+    def _hand_off(self, frame: np.ndarray, write: Callable[[np.ndarray], None]):
+        """Pass the clean `frame` to `write` (recorder or pre-roll), now or once its annotations are undone."""
+        if self.annotate and self.sync_output:
+            self.pending_record = (frame, [], write)
+        else:
+            write(frame)
+            self.frame_shared = True
+
+    def _flush_pending_record(self):
+        """Remove the annotations from the frame held back by `finish_frame` and queue it."""
+        if self.pending_record is None:
+            return
+        frame, undo, write = self.pending_record
+        self.pending_record = None
+        if undo:
+            output = writable_alias(frame)
+            for index, pixels in reversed(undo):
+                output[index] = pixels
+        write(frame)
+        self.frame_shared = True
 
-    def _run_detectors(self, base_frame: np.ndarray) -> List[dict]:
-        all_detections = []
+    def _should_record(self) -> bool:
+        pressure = self.recorder.queue.pressure()
+        if pressure > 0.75 and self.record_stride < self.max_record_stride:
+            self.record_stride += 1
+            print(f"[DetectionEngine] Recorder queue under pressure, recording every {self.record_stride} frames")
+        elif pressure < 0.25 and self.record_stride > 1:
+            self.record_stride -= 1
 
-        for detector in self.detectors:
-            # Pass the actual frame copy into detector, where annotations are made
-            detections = detector.detect(base_frame)
-            if detections:
-                all_detections.extend(detections)
+        self.record_index += 1
+        if self.record_index % self.record_stride == 0:
+            return True
+        self.frames_skipped += 1
+        return False
 
-        return all_detections
+    def _predict(self, frame: np.ndarray) -> List[Detections]:
+        if not self.needs_inference(frame):
+            return self.tracked_predictions()
 
-    def _handle_trigger(self, frame: np.ndarray, detections: List[dict]):
+        start = time.perf_counter()
+        predictions = self._infer(frame)
+        latency = time.perf_counter() - start
+        self.observe(predictions, latency)
+        if self.latency_controller:
+            self.latency_controller.record(latency)
+        return predictions
+
+    def _infer(self, frame: np.ndarray) -> List[Detections]:
+        # Every detector infers on the clean frame; annotations are drawn afterwards
+        # in detector order, so the serial and parallel paths produce the same output.
+        image = self.inference_view(frame)
+        if self.pool:
+            predictions = self.pool.predict(image)
+        else:
+            predictions = [detector.predict(image) for detector in self.detectors]
+        if image is not frame:
+            FramePreprocessor.shared().discard(image)
+        return self.to_frame(predictions)
+
+    def _handle_trigger(self, frame: np.ndarray, detections: Detections):
         self.frame_buffer += 1
 
         if self.frame_buffer >= self.start_threshold:
@@ -79,34 +324,70 @@ class DetectionEngine:
     def _start_recording(self):
         if not self.recording:
             self.recorder.start()
+            if self.preroll is not None:
+                for jpeg in self.preroll.drain():
+                    self.recorder.write(jpeg)
             self.recording = True
-            self.recording_start_time = datetime.now()
+            self.recording_start_time = self.clock()
+            self.frames_skipped = 0
 
-    def _capture_and_send_image(self, frame: np.ndarray, detections: List[dict]):
+    def _capture_and_send_image(self, frame: np.ndarray, detections: Detections):
          if not self.isCaptured:
-                def on_image_saved(image_path):
-                    caption = Message.generate_message(detections)
-                    self.report.send_notif(message=caption, image=image_path)
-
-                self.capture.capture(frame.copy(), callback=on_image_saved)
+                _ALERTS.inc(camera=self.metrics_label)
+                self.event_detections = detections
+                # The alert photo is sent straight from memory; the capture only archives it
+                ok, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
+                if ok:
+                    jpeg = jpeg.tobytes()
+                    self.alert_message = self.alerts.submit(detections, jpeg, camera=self.location)
+                    self.capture.capture(jpeg)
+                else:
+                    self.alert_message = None
+                    self.capture.capture(frame)
+                    self.frame_shared = True
                 self.isCaptured = True
 
-    def _stop_recording_after_timeout(self, detections: List[dict], timeout_in_millis: int = 3000):
+    def _stop_recording_after_timeout(self, detections: Detections, timeout_in_millis: int = 3000):
         if self.recording and self.recording_start_time:
-            elapsed = datetime.now() - self.recording_start_time
+            elapsed = self.clock() - self.recording_start_time
             if elapsed >= timedelta(milliseconds=timeout_in_millis):
                 self._stop_and_send_recorded_video(detections)
                 self.recording_start_time = None
 
-    def _stop_and_send_recorded_video(self, detections: List[dict]):
+    def _stop_and_send_recorded_video(self, detections: Detections):
         self.frame_buffer = 0
         if self.recording:
+            self._flush_pending_record()
             path = self.recorder.stop()
-            caption = Message.generate_message(detections)
-            self.report.send_video_async(video=path, message=caption)
+            if path:
+                self.alerts.submit(
+                    detections or self.event_detections, path, media_type="video",
+                    camera=self.location, reply_to=self.alert_message,
+                )
+            # Later clips of a long event go through the throttle like any other alert
+            self.alert_message = None
             self.recording = False
 
-    def _overlay_timestamp(self, frame: np.ndarray):
-        now = datetime.now()
-        timestamp = now.strftime("%d %m %Y %H:%M:%S")
-        cvzone.putTextRect(frame, timestamp, (50, 50), scale=1, thickness=2)
+    def _collect_metrics(self):
+        labels = {"camera": self.metrics_label}
+        return [
+            ("engine_recording", labels, int(self.recording)),
+            ("engine_trigger_frames", labels, self.frame_buffer),
+            ("engine_record_stride", labels, self.record_stride),
+            ("engine_bytes_copied_per_frame", labels, self.copy_stats()["bytes_per_frame"]),
+        ]
+
+    def copy_stats(self) -> dict:
+        return {
+            "frames": self.frames_finished,
+            "bytes_copied": self.bytes_copied,
+            "bytes_per_frame": round(self.bytes_copied / self.frames_finished) if self.frames_finished else 0,
+            "pool": self.frame_pool.stats(),
+        }
+
+    def shutdown(self):
+        self._flush_pending_record()
+        if self.preroll is not None:
+            self.preroll.close()
+        if self.pool:
+            self.pool.shutdown()
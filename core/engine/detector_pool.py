@@ -0,0 +1,64 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+import numpy as np
+
+from core.helper.detections import Detections
+from usecase.base_detector import BaseDetector
+
+
+def _set_intra_op_threads(num_threads: int):
+    # Process-wide: torch has one intra-op setting for every model in the process,
+    # whichever thread sets it, so the last call wins.
+    try:
+        import torch
+        torch.set_num_threads(num_threads)
+    except ImportError:
+        pass
+
+
+class DetectorPool:
+    """
+    Runs `predict` of several detectors concurrently on the same frame, each on its own
+    single-thread worker, so models don't oversubscribe the cores. Results come back in
+    detector order.
+
+    Thread budgets are enforced per model only for ONNX Runtime sessions, each created with its
+    budget. PyTorch has a single process-wide intra-op setting: the budget is global, not per
+    model, and is set once to the smallest budget.
+    """
+
+    def __init__(self, detectors: List[BaseDetector], thread_budgets: Optional[List[int]] = None):
+        self.detectors = detectors
+        self.thread_budgets = thread_budgets or self._default_budgets(detectors)
+
+        if len(self.thread_budgets) != len(detectors):
+            raise ValueError("thread_budgets must have one entry per detector")
+
+        _set_intra_op_threads(min(self.thread_budgets))
+        for detector, budget in zip(detectors, self.thread_budgets):
+            for model in detector.models():
+                model.set_num_threads(budget)
+
+        self.workers = [
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"DetectorWorker-{type(detector).__name__}")
+            for detector in detectors
+        ]
+
+    @staticmethod
+    def _default_budgets(detectors: List[BaseDetector]) -> List[int]:
+        cpu_count = os.cpu_count() or 1
+        share = max(1, cpu_count // max(1, len(detectors)))
+        return [detector.num_threads or share for detector in detectors]
+
+    def predict(self, frame: np.ndarray) -> List[Detections]:
+        futures = [
+            worker.submit(detector.predict, frame)
+            for detector, worker in zip(self.detectors, self.workers)
+        ]
+        return [future.result() for future in futures]
+
+    def shutdown(self):
+        for worker in self.workers:
+            worker.shutdown(wait=True)
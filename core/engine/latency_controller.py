@@ -0,0 +1,167 @@
+import time
+from collections import deque
+from typing import List, Optional, Sequence
+
+from core.helper.metrics import metrics
+from usecase.base_detector import BaseDetector
+
+
+class _ModelState:
+    """Input size ladder of one `ObjectDetector`: level 0 is its native size, higher levels are cheaper."""
+
+    def __init__(self, model, sizes: Sequence[int], max_dets: Sequence[int]):
+        self.model = model
+        self.name = getattr(model, "metrics_label", type(model).__name__)
+        native = model.imgsz if isinstance(model.imgsz, int) else max(model.imgsz)
+        native_max_det = getattr(model, "max_det", 300)
+
+        ladder = [native] + [size for size in sorted(set(sizes), reverse=True) if size < native]
+        self.levels = [(native, native_max_det)]
+        for i, size in enumerate(ladder[1:], start=1):
+            # max_dets[i] goes with the i-th smaller size; the last entry covers any further sizes
+            max_det = max_dets[min(i, len(max_dets) - 1)] if max_dets else native_max_det
+            self.levels.append((size, min(native_max_det, max_det)))
+        self.level = 0
+        self.latency: Optional[float] = None  # moving average of preprocess + inference, in seconds
+
+    @property
+    def setting(self):
+        return self.levels[self.level]
+
+    def apply(self, level: int):
+        self.level = level
+        self.model.imgsz, self.model.max_det = self.levels[level]
+
+
+class LatencyController:
+    """
+    Keeps inference within `budget` seconds per frame by stepping model input sizes (and max
+    detections) down a ladder, e.g. 640 -> 512 -> 416 -> 320, and back up when there is room.
+    The target can also be given as `target_fps`, which allows `1 / target_fps` seconds per
+    frame; with both, the tighter one applies.
+
+    Hysteresis: the smoothed latency has to stay above `budget * high` (or below `budget * low`)
+    for `patience` consecutive inferences before anything changes, stepping up needs twice that,
+    and the counters restart after every change. Each step touches one model: on the way down the
+    slowest one, on the way up the most degraded one.
+    """
+
+    def __init__(
+            self,
+            detectors: List[BaseDetector],
+            budget: Optional[float] = None,
+            target_fps: Optional[float] = None,
+            sizes: Sequence[int] = (640, 512, 416, 320),
+            max_dets: Sequence[int] = (300, 100, 50),
+            high: float = 1.1,
+            low: float = 0.7,
+            patience: int = 10,
+            smoothing: float = 0.2,
+            label: str = "default",
+            history_size: int = 50,
+    ):
+        budgets = [seconds for seconds in (budget, 1 / target_fps if target_fps else None) if seconds]
+        if not budgets or min(budgets) <= 0:
+            raise ValueError("budget or target_fps must be positive")
+
+        self.budget = min(budgets)
+        self.target_fps = target_fps
+        self.high = high
+        self.low = low
+        self.patience = max(1, patience)
+        self.smoothing = smoothing
+        self.label = label
+        self.states = [
+            _ModelState(model, sizes, max_dets)
+            for detector in detectors for model in detector.models()
+        ]
+
+        self.latency: Optional[float] = None
+        self.over = 0
+        self.under = 0
+        self.history = deque(maxlen=history_size)
+        metrics.add_collector(self._collect_metrics)
+
+    def record(self, latency: float):
+        """Feed the wall time of one inference round (all detectors)."""
+        self.latency = latency if self.latency is None else self.smoothing * latency + (1 - self.smoothing) * self.latency
+        for state in self.states:
+            timings = state.model.last_timings
+            if timings:
+                seconds = timings.get("preprocess", 0.0) + timings.get("inference", 0.0)
+                state.latency = seconds if state.latency is None else (
+                    self.smoothing * seconds + (1 - self.smoothing) * state.latency
+                )
+
+        if self.latency > self.budget * self.high:
+            self.over += 1
+            self.under = 0
+        elif self.latency < self.budget * self.low:
+            self.under += 1
+            self.over = 0
+        else:
+            self.over = self.under = 0
+
+        if self.over >= self.patience:
+            self._step_down()
+        elif self.under >= 2 * self.patience:
+            self._step_up()
+
+    def _step_down(self):
+        candidates = [state for state in self.states if state.level < len(state.levels) - 1]
+        if candidates:
+            state = max(candidates, key=lambda s: s.latency or 0.0)
+            self._change(state, state.level + 1, "over budget")
+        self.over = 0
+
+    def _step_up(self):
+        candidates = [state for state in self.states if state.level > 0]
+        if candidates:
+            state = max(candidates, key=lambda s: s.level)
+            self._change(state, state.level - 1, "under budget")
+        self.under = 0
+
+    def _change(self, state: _ModelState, level: int, reason: str):
+        before = state.setting
+        state.apply(level)
+        imgsz, max_det = state.setting
+        self.history.append({
+            "ts": round(time.time(), 3),
+            "model": state.name,
+            "imgsz": imgsz,
+            "max_det": max_det,
+            "latency_ms": round(self.latency * 1000, 1),
+            "reason": reason,
+        })
+        print(f"[LatencyController] {self.label}: {state.name} {before[0]} -> {imgsz} "
+              f"(max_det {max_det}), {self.latency * 1000:.0f} ms vs {self.budget * 1000:.0f} ms budget")
+
+    @property
+    def degraded(self) -> bool:
+        return any(state.level > 0 for state in self.states)
+
+    def stats(self) -> dict:
+        return {
+            "budget_ms": round(self.budget * 1000, 1),
+            "target_fps": self.target_fps,
+            "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "degraded": self.degraded,
+            "models": {
+                state.name: {
+                    "imgsz": state.setting[0],
+                    "max_det": state.setting[1],
+                    "level": state.level,
+                    "latency_ms": round(state.latency * 1000, 1) if state.latency is not None else None,
+                }
+                for state in self.states
+            },
+            "history": list(self.history),
+        }
+
+    def _collect_metrics(self):
+        samples = [("latency_controller_degraded", {"camera": self.label}, int(self.degraded))]
+        for state in self.states:
+            labels = {"camera": self.label, "model": state.name}
+            samples.append(("latency_controller_imgsz", labels, state.setting[0]))
+            samples.append(("latency_controller_max_det", labels, state.setting[1]))
+        return samples
@@ -0,0 +1,94 @@
+import time
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from core.helper.metrics import metrics
+
+_GATE_SECONDS = metrics.histogram(
+    "motion_gate_seconds", "Time the motion gate spends on one frame",
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01),
+)
+_GATE_SKIPPED = metrics.counter("motion_gate_skipped_total", "Frames on which the models were skipped for lack of motion")
+
+
+class MotionGate:
+    """
+    Cheap check in front of the models: a small grayscale copy of each frame is compared against a
+    running-average background, and the models run only when more than `threshold` of its pixels
+    changed by over `pixel_delta` grey levels. Every `keepalive` frames the models run anyway, so an
+    object that walked in and stopped is still seen.
+    """
+
+    def __init__(
+            self,
+            threshold: float = 0.005,
+            pixel_delta: int = 25,
+            keepalive: int = 30,
+            width: int = 160,
+            learning_rate: float = 0.05,
+            label: str = "default",
+    ):
+        self.threshold = threshold
+        self.pixel_delta = pixel_delta
+        self.keepalive = max(1, keepalive)
+        self.width = width
+        self.learning_rate = learning_rate
+        self.label = label
+
+        self.background: Optional[np.ndarray] = None
+        self.frames_since_inference = 0
+        self.changed = 0.0  # fraction of changed pixels on the last frame
+
+        self.frames = 0
+        self.skipped = 0
+        self.keepalives = 0
+        self.seconds = 0.0
+
+    def _small_gray(self, frame: np.ndarray) -> np.ndarray:
+        height, width = frame.shape[:2]
+        size = (self.width, max(1, round(height * self.width / width)))
+        gray = cv2.cvtColor(cv2.resize(frame, size, interpolation=cv2.INTER_LINEAR), cv2.COLOR_BGR2GRAY)
+        # Blur away sensor noise and compression artifacts so they don't count as motion
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def should_infer(self, frame: np.ndarray) -> bool:
+        """Whether the models should run on `frame`. Call exactly once per frame, it updates the background."""
+        start = time.perf_counter()
+        gray = self._small_gray(frame)
+
+        if self.background is None or self.background.shape != gray.shape:
+            self.background = gray.astype(np.float32)
+            moved = True
+        else:
+            diff = cv2.absdiff(gray, cv2.convertScaleAbs(self.background))
+            self.changed = cv2.countNonZero(cv2.threshold(diff, self.pixel_delta, 255, cv2.THRESH_BINARY)[1]) / diff.size
+            moved = self.changed > self.threshold
+            cv2.accumulateWeighted(gray, self.background, self.learning_rate)
+
+        self.frames_since_inference += 1
+        infer = moved or self.frames_since_inference >= self.keepalive
+        if infer:
+            if not moved:
+                self.keepalives += 1
+            self.frames_since_inference = 0
+        else:
+            self.skipped += 1
+            _GATE_SKIPPED.inc(camera=self.label)
+
+        self.frames += 1
+        elapsed = time.perf_counter() - start
+        self.seconds += elapsed
+        _GATE_SECONDS.observe(elapsed, camera=self.label)
+        return infer
+
+    def stats(self) -> dict:
+        return {
+            "frames": self.frames,
+            "skipped_frames": self.skipped,
+            "skipped_ratio": round(self.skipped / self.frames, 3) if self.frames else 0.0,
+            "keepalive_inferences": self.keepalives,
+            "avg_cost_ms": round(self.seconds / self.frames * 1000, 3) if self.frames else 0.0,
+            "changed_ratio": round(self.changed, 4),
+        }
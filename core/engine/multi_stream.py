@@ -0,0 +1,159 @@
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from core.engine.detection_engine import DetectionEngine
+from core.engine.latency_controller import LatencyController
+from core.helper.capture import ImageCapture
+from core.helper.frame_source import FrameSource
+from core.helper.recorder import VideoRecorder
+from usecase.base_detector import BaseDetector
+
+
+@dataclass
+class StreamContext:
+    """Everything that belongs to one camera: its source and its own engine state."""
+    name: str
+    source: FrameSource
+    engine: DetectionEngine
+    recorder: VideoRecorder
+    capture: ImageCapture
+    frames_processed: int = 0
+    frames_skipped: int = 0  # rounds where the batch was already full when this stream's turn came
+
+
+class MultiStreamRunner:
+    """
+    Runs one set of detectors over many cameras.
+
+    Models are loaded once and shared; each stream keeps its own `DetectionEngine`
+    (trigger counters, recorder, capture). Every round gathers at most
+    `max_frames_per_stream` frames from each stream into one batch per model call.
+    Streams are visited round-robin starting after the last one served, so when the
+    batch is capped by `max_batch_size` a busy camera cannot starve the others.
+    The models are shared, so one `latency_controller` tunes them against the time per round: it is
+    per round rather than per stream, and a camera that slows rounds down lowers every camera's sizes.
+    """
+
+    def __init__(
+            self,
+            detectors: List[BaseDetector],
+            streams: List[StreamContext],
+            max_batch_size: int = 8,
+            max_frames_per_stream: int = 1,
+            idle_sleep: float = 0.005,
+            latency_controller: Optional[LatencyController] = None,
+    ):
+        if not streams:
+            raise ValueError("MultiStreamRunner needs at least one stream")
+
+        self.detectors = detectors
+        self.streams = streams
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_frames_per_stream = max(1, max_frames_per_stream)
+        self.idle_sleep = idle_sleep
+        self.latency_controller = latency_controller
+        self.cursor = 0
+        if self.max_frames_per_stream > 1:
+            # A round's frames are only handed out after the whole round, so a stream's earlier
+            # outputs must stay as they are while its later frames are processed
+            for ctx in streams:
+                ctx.engine.sync_output = False
+
+    def active_streams(self) -> List[StreamContext]:
+        return [ctx for ctx in self.streams if ctx.source.isOpened()]
+
+    def _gather(self) -> List[tuple]:
+        batch = []
+        count = len(self.streams)
+        last_index = None
+
+        for offset in range(count):
+            index = (self.cursor + offset) % count
+            ctx = self.streams[index]
+
+            for _ in range(self.max_frames_per_stream):
+                if len(batch) >= self.max_batch_size:
+                    ctx.frames_skipped += 1
+                    break
+
+                ret, frame = ctx.source.read(block=False)
+                if not ret:
+                    break
+
+                batch.append((ctx, ctx.engine.prepare_frame(frame)))
+                last_index = index
+
+        if last_index is not None:
+            self.cursor = (last_index + 1) % count
+        return batch
+
+    def step(self) -> List[tuple]:
+        """Process one round. Returns (stream, annotated frame) for every frame handled."""
+        batch = self._gather()
+        if not batch:
+            return []
+
+        to_infer = [i for i, (ctx, frame) in enumerate(batch) if ctx.engine.needs_inference(frame)]
+        predictions = [None] * len(batch)
+
+        if to_infer:
+            frames = [batch[i][0].engine.inference_view(batch[i][1]) for i in to_infer]
+            start = time.perf_counter()
+            # One model call per detector covering every stream in the batch
+            per_detector = [detector.predict_batch(frames) for detector in self.detectors]
+            latency = time.perf_counter() - start
+            if self.latency_controller:
+                self.latency_controller.record(latency)
+
+            for j, i in enumerate(to_infer):
+                predictions[i] = batch[i][0].engine.to_frame([results[j] for results in per_detector])
+                batch[i][0].engine.observe(predictions[i], latency)
+
+        outputs = []
+        for i, (ctx, frame) in enumerate(batch):
+            if predictions[i] is None:
+                predictions[i] = ctx.engine.tracked_predictions()
+
+            outputs.append((ctx, ctx.engine.finish_frame(frame, predictions[i])))
+            ctx.frames_processed += 1
+
+        return outputs
+
+    def run(self, on_frame: Optional[Callable[[StreamContext, np.ndarray], bool]] = None):
+        """Loop until every source is exhausted or `on_frame` returns False."""
+        while self.active_streams():
+            outputs = self.step()
+            if not outputs:
+                time.sleep(self.idle_sleep)
+                continue
+
+            if on_frame:
+                for ctx, frame in outputs:
+                    if on_frame(ctx, frame) is False:
+                        return
+
+    def stats(self) -> dict:
+        return {
+            ctx.name: {
+                "frames_processed": ctx.frames_processed,
+                "frames_skipped": ctx.frames_skipped,
+                **ctx.source.stats(),
+                **({"preroll": ctx.engine.preroll.stats()} if ctx.engine.preroll else {}),
+                **({"motion_gate": ctx.engine.motion_gate.stats()} if ctx.engine.motion_gate else {}),
+                **({"roi": ctx.engine.roi.stats()} if ctx.engine.roi else {}),
+                "frames": ctx.engine.copy_stats(),
+                "recorder_queue": ctx.recorder.stats(),
+                "capture_queue": ctx.capture.stats(),
+            }
+            for ctx in self.streams
+        }
+
+    def shutdown(self):
+        for ctx in self.streams:
+            ctx.source.release()
+            ctx.engine.shutdown()
+            ctx.recorder.release()
+            ctx.capture.shutdown()
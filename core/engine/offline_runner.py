@@ -0,0 +1,132 @@
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+import numpy as np
+
+from core.engine.detection_engine import DetectionEngine
+from core.helper.detections import Detections
+from core.helper.frame_source import FrameSource
+from core.helper.recorder import VideoRecorder
+from usecase.base_detector import BaseDetector
+
+
+class MediaClock:
+    """Clock that follows the position in a video file instead of the wall clock."""
+
+    def __init__(self, fps: float, start: Optional[datetime] = None):
+        self.fps = fps
+        self.start = start or datetime.now()
+        self.frame_index = 0
+
+    @property
+    def seconds(self) -> float:
+        return self.frame_index / self.fps
+
+    def now(self) -> datetime:
+        return self.start + timedelta(seconds=self.seconds)
+
+
+class OfflineRunner:
+    """
+    Processes a video file as fast as the CPU allows: frames are decoded ahead on the `FrameSource`
+    thread, each model gets `batch_size` frames per call, nothing is displayed, and every frame's
+    detections are written as one JSON line. Alerts and evidence clips run on media time, so a clip
+    covers the same footage however fast the file is processed.
+    """
+
+    def __init__(
+            self,
+            source: FrameSource,
+            detectors: List[BaseDetector],
+            engine: DetectionEngine,
+            clock: MediaClock,
+            batch_size: int = 8,
+            jsonl_path: Optional[str] = None,
+            annotated: Optional[VideoRecorder] = None,
+    ):
+        self.source = source
+        self.detectors = detectors
+        self.engine = engine
+        self.clock = clock
+        self.batch_size = max(1, batch_size)
+        self.jsonl_path = jsonl_path
+        self.annotated = annotated
+        self.names = [type(detector).__name__ for detector in detectors]
+
+        self.frames_processed = 0
+        self.inference_seconds = 0.0
+        self.elapsed = 0.0
+
+    def _next_batch(self) -> List[np.ndarray]:
+        batch = []
+        while len(batch) < self.batch_size:
+            ret, frame = self.source.read()
+            if not ret:
+                break
+            batch.append(self.engine.prepare_frame(frame))
+        return batch
+
+    def _record(self, frame_index: int, predictions: List[Detections]) -> str:
+        detections = []
+        for name, result in zip(self.names, predictions):
+            for det in result:
+                det["detector"] = name
+                detections.append(det)
+        return json.dumps({"frame": frame_index, "time": round(self.clock.seconds, 3), "detections": detections})
+
+    def run(self) -> dict:
+        if self.jsonl_path:
+            os.makedirs(os.path.dirname(self.jsonl_path) or ".", exist_ok=True)
+        output = open(self.jsonl_path, "w") if self.jsonl_path else None
+        if self.annotated:
+            self.annotated.start()
+
+        started = time.perf_counter()
+        try:
+            while True:
+                frames = self._next_batch()
+                if not frames:
+                    break
+
+                start = time.perf_counter()
+                views = [self.engine.inference_view(frame) for frame in frames]
+                per_detector = [detector.predict_batch(views) for detector in self.detectors]
+                latency = time.perf_counter() - start
+                self.inference_seconds += latency
+
+                for j, frame in enumerate(frames):
+                    predictions = self.engine.to_frame([results[j] for results in per_detector])
+                    self.engine.observe(predictions, latency / len(frames))
+                    processed = self.engine.finish_frame(frame, predictions)
+
+                    if output:
+                        output.write(self._record(self.clock.frame_index, predictions) + "\n")
+                    if self.annotated:
+                        self.annotated.write(processed)
+
+                    self.clock.frame_index += 1
+                    self.frames_processed += 1
+        finally:
+            self.elapsed = time.perf_counter() - started
+            if output:
+                output.close()
+            if self.annotated:
+                self.annotated.stop()
+
+        return self.stats()
+
+    def stats(self) -> dict:
+        media_seconds = self.clock.seconds
+        return {
+            "frames": self.frames_processed,
+            "media_seconds": round(media_seconds, 2),
+            "elapsed_seconds": round(self.elapsed, 2),
+            "fps": round(self.frames_processed / self.elapsed, 2) if self.elapsed else 0.0,
+            "realtime_factor": round(media_seconds / self.elapsed, 2) if self.elapsed else 0.0,
+            "inference_seconds": round(self.inference_seconds, 2),
+            "jsonl": self.jsonl_path,
+            "annotated": self.annotated.path if self.annotated else None,
+        }
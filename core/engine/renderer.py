@@ -0,0 +1,179 @@
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from core.helper.detections import Detections
+from core.helper.extensions import to_camel_case
+from core.helper.frame_pool import count_copy
+from usecase.base_detector import BaseDetector
+
+
+class AnnotationRenderer:
+    """
+    Draws the results of all detectors onto a frame in one pass.
+
+    Filled shapes are blended only inside the bounding ROI of those shapes (one blend per opacity),
+    then outlines and labels are drawn on top. Labels are pre-rendered once into small sprites that
+    look like `cvzone.putTextRect` and are pasted from an LRU cache afterwards.
+
+    With an `undo` list, the clean pixels of every region about to be drawn on are saved into it as
+    (index, pixels) first; `frame[index] = pixels` in reverse order removes the annotations again.
+    """
+
+    def __init__(
+            self,
+            font: int = cv2.FONT_HERSHEY_PLAIN,
+            scale: float = 1,
+            thickness: int = 1,
+            offset: int = 10,
+            text_color: Tuple[int, int, int] = (255, 255, 255),
+            max_sprites: int = 256,
+    ):
+        self.font = font
+        self.scale = scale
+        self.thickness = thickness
+        self.offset = offset
+        self.text_color = text_color
+        self.max_sprites = max_sprites
+        self.sprites: "OrderedDict[tuple, Tuple[np.ndarray, int]]" = OrderedDict()
+        self.scratch = np.empty(0, dtype=np.uint8)  # reused for the fill overlay, grown as needed
+        self.undo: Optional[list] = None
+
+    def render(
+            self,
+            frame: np.ndarray,
+            layers: Iterable[Tuple[BaseDetector, Detections]],
+            timestamp: Optional[str] = None,
+            undo: Optional[list] = None,
+    ) -> np.ndarray:
+        self.undo = undo
+        try:
+            return self._render(frame, layers, timestamp)
+        finally:
+            self.undo = None
+
+    def _render(self, frame: np.ndarray, layers: Iterable[Tuple[BaseDetector, Detections]],
+                timestamp: Optional[str]) -> np.ndarray:
+        shapes = []  # (detector, visible detections)
+        fills = {}  # alpha -> [(polygon, color)]
+
+        for detector, detections in layers:
+            visible = detector.visible(detections)
+            if not len(visible):
+                continue
+            shapes.append((detector, visible))
+
+            if detector.fill_alpha > 0 and visible.has_polygons:
+                for cls_name, polygon in zip(visible.class_name.tolist(), visible.polygons()):
+                    if len(polygon):
+                        fills.setdefault(detector.fill_alpha, []).append((polygon, detector.color_of(cls_name)))
+
+        for alpha, polygons in fills.items():
+            self._blend_fills(frame, polygons, alpha)
+
+        for detector, visible in shapes:
+            self._draw_outlines(frame, detector, visible)
+
+        for detector, visible in shapes:
+            if detector.show_label:
+                self._draw_labels(frame, detector, visible)
+
+        if timestamp:
+            self._paste_label(frame, timestamp, (50, 50), (255, 0, 255), thickness=2)
+
+        return frame
+
+    def _blend_fills(self, frame: np.ndarray, polygons: List[Tuple[np.ndarray, tuple]], alpha: float):
+        height, width = frame.shape[:2]
+        points = np.concatenate([polygon for polygon, _ in polygons])
+        x1, y1 = np.clip(points.min(axis=0), 0, (width, height))
+        x2, y2 = np.clip(points.max(axis=0) + 1, 0, (width, height))
+        if x2 <= x1 or y2 <= y1:
+            return
+
+        self._save(frame, x1, y1, x2, y2)
+        roi = frame[y1:y2, x1:x2]
+        if self.scratch.size < roi.size:
+            self.scratch = np.empty(roi.size, dtype=np.uint8)
+        overlay = self.scratch[:roi.size].reshape(roi.shape)
+        np.copyto(overlay, roi)
+        count_copy(roi.nbytes, "fill_overlay")
+        for polygon, color in polygons:
+            cv2.fillPoly(overlay, [polygon], color, offset=(-int(x1), -int(y1)))
+        cv2.addWeighted(overlay, alpha, roi, 1 - alpha, 0, roi)
+
+    def _save(self, frame: np.ndarray, x1: int, y1: int, x2: int, y2: int):
+        """Keep the pixels of [x1, x2) x [y1, y2) for `undo`, before they are drawn on."""
+        if self.undo is None:
+            return
+        height, width = frame.shape[:2]
+        x1, y1, x2, y2 = max(int(x1), 0), max(int(y1), 0), min(int(x2), width), min(int(y2), height)
+        if x2 > x1 and y2 > y1:
+            index = (slice(y1, y2), slice(x1, x2))
+            self.undo.append((index, frame[index].copy()))
+
+    def _draw_outlines(self, frame: np.ndarray, detector: BaseDetector, visible: Detections):
+        if visible.has_polygons:
+            for cls_name, polygon in zip(visible.class_name.tolist(), visible.polygons()):
+                if len(polygon):
+                    if not detector.fill_alpha:  # filled ones were saved along with their fill
+                        (x1, y1), (x2, y2) = polygon.min(axis=0), polygon.max(axis=0)
+                        self._save(frame, x1, y1, x2 + 1, y2 + 1)
+                    cv2.polylines(frame, [polygon], isClosed=True, color=detector.color_of(cls_name), thickness=1)
+        else:
+            for (x1, y1, x2, y2), cls_name in zip(visible.xyxy.tolist(), visible.class_name.tolist()):
+                if self.undo is not None:
+                    # Only the one pixel wide edges change, not the inside of the box
+                    x1, x2 = min(x1, x2), max(x1, x2)
+                    y1, y2 = min(y1, y2), max(y1, y2)
+                    for edge in ((x1, y1, x2 + 1, y1 + 1), (x1, y2, x2 + 1, y2 + 1),
+                                 (x1, y1 + 1, x1 + 1, y2), (x2, y1 + 1, x2 + 1, y2)):
+                        self._save(frame, *edge)
+                cv2.rectangle(frame, (x1, y1), (x2, y2), detector.color_of(cls_name), 1)
+
+    def _draw_labels(self, frame: np.ndarray, detector: BaseDetector, visible: Detections):
+        if visible.has_polygons:
+            # Polygons are labelled at their first vertex, boxes at their top-left corner
+            anchors = [polygon[0].tolist() if len(polygon) else box[:2] for polygon, box
+                       in zip(visible.polygons(), visible.xyxy.tolist())]
+        else:
+            anchors = [box[:2] for box in visible.xyxy.tolist()]
+
+        for (x, y), cls_name in zip(anchors, visible.class_name.tolist()):
+            self._paste_label(frame, cls_name, (max(20, x), max(20, y)), detector.color_of(cls_name), camel=True)
+
+    def _sprite(self, text: str, color: tuple, thickness: int, camel: bool) -> Tuple[np.ndarray, int]:
+        key = (text, color, thickness, camel)
+        sprite = self.sprites.get(key)
+        if sprite is not None:
+            self.sprites.move_to_end(key)
+            return sprite
+
+        label = to_camel_case(text) if camel else text
+        (w, h), _ = cv2.getTextSize(label, self.font, self.scale, thickness)
+        o = self.offset
+        image = np.empty((h + 2 * o + 1, w + 2 * o + 1, 3), dtype=np.uint8)
+        image[:] = color
+        cv2.putText(image, label, (o, o + h), self.font, self.scale, self.text_color, thickness)
+
+        sprite = (image, h)
+        self.sprites[key] = sprite
+        if len(self.sprites) > self.max_sprites:
+            self.sprites.popitem(last=False)
+        return sprite
+
+    def _paste_label(self, frame: np.ndarray, text: str, origin: Tuple[int, int], color: tuple,
+                     thickness: Optional[int] = None, camel: bool = False):
+        image, text_h = self._sprite(text, tuple(color), thickness or self.thickness, camel)
+        height, width = frame.shape[:2]
+
+        # Same placement as cvzone.putTextRect: `origin` is the text baseline start
+        left, top = origin[0] - self.offset, origin[1] - text_h - self.offset
+        x1, y1 = max(left, 0), max(top, 0)
+        x2, y2 = min(left + image.shape[1], width), min(top + image.shape[0], height)
+        if x2 <= x1 or y2 <= y1:
+            return
+        self._save(frame, x1, y1, x2, y2)
+        frame[y1:y2, x1:x2] = image[y1 - top:y2 - top, x1 - left:x2 - left]
@@ -0,0 +1,111 @@
+import json
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from core.helper.detections import Detections
+
+Polygon = Sequence[Sequence[int]]
+
+
+class RegionOfInterest:
+    """
+    The part of a camera's frame worth looking at, as one or more polygons in frame pixels.
+
+    Inference runs on the crop to the polygons' bounding box (plus `padding`, so objects on the
+    edge keep some context), and results are shifted back to frame coordinates. Detections whose
+    anchor, the bottom-centre of the box where a person or vehicle touches the ground, falls
+    outside the polygons are dropped before they can trigger anything.
+    """
+
+    def __init__(self, polygons: List[Polygon], frame_size: Tuple[int, int] = (1280, 720), padding: int = 16):
+        if not polygons:
+            raise ValueError("A region of interest needs at least one polygon")
+
+        width, height = frame_size
+        self.polygons = [np.asarray(polygon, dtype=np.int32).reshape(-1, 2) for polygon in polygons]
+        self.mask = np.zeros((height, width), dtype=np.uint8)
+        cv2.fillPoly(self.mask, self.polygons, 255)
+
+        points = np.concatenate(self.polygons)
+        x1, y1 = np.clip(points.min(axis=0) - padding, 0, (width, height))
+        x2, y2 = np.clip(points.max(axis=0) + padding + 1, 0, (width, height))
+        if x2 <= x1 or y2 <= y1:
+            raise ValueError("Region of interest lies outside the frame")
+        self.box = (int(x1), int(y1), int(x2), int(y2))
+        self.pixel_ratio = (x2 - x1) * (y2 - y1) / (width * height)
+        self.outline: Optional[Tuple[np.ndarray, np.ndarray]] = None  # pixel coordinates, found on first draw
+
+        self.kept = 0
+        self.dropped = 0
+
+    def crop(self, frame: np.ndarray) -> np.ndarray:
+        """View of `frame` limited to the region's bounding box (no copy)."""
+        x1, y1, x2, y2 = self.box
+        return frame[y1:y2, x1:x2]
+
+    def restore(self, detections: Detections) -> Detections:
+        """Map detections made on `crop()` back to the frame and keep those anchored inside the polygons."""
+        if not len(detections):
+            return detections
+
+        x1, y1 = self.box[:2]
+        shifted = Detections(
+            detections.xyxy + (x1, y1, x1, y1),
+            detections.class_id,
+            detections.class_name,
+            detections.confidence,
+            detections.points + (x1, y1) if detections.has_polygons else None,
+            detections.offsets if detections.has_polygons else None,
+        )
+
+        height, width = self.mask.shape
+        anchor_x = np.clip((shifted.xyxy[:, 0] + shifted.xyxy[:, 2]) // 2, 0, width - 1)
+        anchor_y = np.clip(shifted.xyxy[:, 3] - 1, 0, height - 1)
+        inside = self.mask[anchor_y, anchor_x] > 0
+
+        kept = int(inside.sum())
+        self.kept += kept
+        self.dropped += len(inside) - kept
+        return shifted if kept == len(inside) else shifted[inside]
+
+    def draw(self, frame: np.ndarray, color: Tuple[int, int, int] = (255, 255, 0), undo: Optional[list] = None) -> np.ndarray:
+        """Outline the polygons; with `undo`, their clean pixels are saved first (see `AnnotationRenderer`)."""
+        if undo is not None:
+            if self.outline is None:
+                # The outline never moves: find its pixels once, then save and restore just those
+                mask = np.zeros(frame.shape[:2], dtype=np.uint8)
+                cv2.polylines(mask, self.polygons, isClosed=True, color=255, thickness=1)
+                self.outline = np.nonzero(mask)
+            undo.append((self.outline, frame[self.outline]))
+        cv2.polylines(frame, self.polygons, isClosed=True, color=color, thickness=1)
+        return frame
+
+    def stats(self) -> dict:
+        return {
+            "box": list(self.box),
+            "pixel_ratio": round(float(self.pixel_ratio), 3),
+            "kept_detections": self.kept,
+            "dropped_detections": self.dropped,
+        }
+
+
+def load_rois(path: str) -> Dict[str, List[Polygon]]:
+    """
+    Read `{"<source>": polygon or [polygons...], ...}` from a JSON file. Sources are written as given
+    to --video (a device id, file path or stream URL); points are pixels of the 1280x720 working frame.
+    """
+    with open(path) as f:
+        raw = json.load(f)
+
+    rois = {}
+    for source, value in raw.items():
+        # A single polygon is a list of [x, y] pairs, several polygons a list of those
+        rois[str(source)] = [value] if np.asarray(value[0]).ndim == 1 else value
+    return rois
+
+
+def roi_for(rois: Dict[str, List[Polygon]], source, frame_size: Tuple[int, int] = (1280, 720)) -> Optional[RegionOfInterest]:
+    polygons = rois.get(str(source))
+    return RegionOfInterest(polygons, frame_size) if polygons else None
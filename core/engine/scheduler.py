@@ -0,0 +1,49 @@
+import math
+
+
+class InferenceScheduler:
+    """
+    Decides on which frames the models run. The stride N is tuned from the measured
+    inference latency so that (1 inference + N-1 tracked frames) keeps up with `target_fps`.
+    """
+
+    def __init__(self, target_fps: float, max_stride: int = 6, smoothing: float = 0.2):
+        if target_fps <= 0:
+            raise ValueError("target_fps must be positive")
+
+        self.target_fps = target_fps
+        self.max_stride = max(1, max_stride)
+        self.smoothing = smoothing
+
+        self.stride = 1
+        self.latency = None  # exponential moving average, in seconds
+        self.frames_since_inference = None
+        self.inferred_frames = 0
+        self.tracked_frames = 0
+
+    def should_infer(self) -> bool:
+        if self.frames_since_inference is None or self.frames_since_inference + 1 >= self.stride:
+            self.frames_since_inference = 0
+            self.inferred_frames += 1
+            return True
+
+        self.frames_since_inference += 1
+        self.tracked_frames += 1
+        return False
+
+    def record(self, latency: float):
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency = self.smoothing * latency + (1 - self.smoothing) * self.latency
+
+        stride = math.ceil(self.latency * self.target_fps)
+        self.stride = min(self.max_stride, max(1, stride))
+
+    def stats(self) -> dict:
+        return {
+            "stride": self.stride,
+            "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "inferred_frames": self.inferred_frames,
+            "tracked_frames": self.tracked_frames,
+        }
@@ -0,0 +1,128 @@
+import numpy as np
+
+from core.helper.detections import Detections, iou_matrix
+
+
+class BoxTracker:
+    """
+    Constant-velocity Kalman tracker over xyxy boxes, vectorized across all tracks.
+    `update()` is fed real detections on inference frames; `predict()` carries the last
+    matched detections (boxes and polygons) forward on the frames in between.
+    """
+
+    def __init__(self, iou_threshold: float = 0.3, max_misses: int = 2):
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+
+        # state: x1, y1, x2, y2, vx1, vy1, vx2, vy2
+        self.F = np.eye(8, dtype=np.float64)
+        self.F[:4, 4:] = np.eye(4)
+        self.H = np.eye(4, 8, dtype=np.float64)
+        self.Q = np.diag([1.0, 1.0, 1.0, 1.0, 0.5, 0.5, 0.5, 0.5])
+        self.R = np.eye(4) * 4.0
+
+        self.x = np.zeros((0, 8))
+        self.P = np.zeros((0, 8, 8))
+        self.misses = np.zeros(0, dtype=np.int32)
+        self.anchors = np.zeros((0, 4))  # box each template was observed with
+        self.templates = Detections.empty()  # last matched detection of every track, one row per track
+
+    def __len__(self):
+        return len(self.templates)
+
+    def predict(self) -> Detections:
+        """Advance all tracks by one frame and return the detections to show for it."""
+        if not len(self.templates):
+            return Detections.empty()
+
+        self.x = self.x @ self.F.T
+        self.P = self.F @ self.P @ self.F.T + self.Q
+        return self._carry(np.flatnonzero(self.misses == 0))
+
+    def update(self, detections: Detections):
+        boxes = detections.xyxy.astype(np.float64)
+        matched_tracks, matched_dets = self._match(boxes, detections)
+        track_count = len(self.templates)
+
+        if len(matched_tracks):
+            self._correct(matched_tracks, boxes[matched_dets])
+            self.anchors[matched_tracks] = boxes[matched_dets]
+
+        unmatched_tracks = np.setdiff1d(np.arange(track_count), matched_tracks)
+        self.misses[matched_tracks] = 0
+        self.misses[unmatched_tracks] += 1
+
+        # Rows of [old templates, new detections] that make up the next template table:
+        # matched tracks take their new detection, new detections are appended as tracks.
+        rows = np.arange(track_count)
+        rows[matched_tracks] = track_count + matched_dets
+        keep = self.misses <= self.max_misses
+        new_dets = np.setdiff1d(np.arange(len(detections)), matched_dets)
+
+        combined = Detections.merge([self.templates, detections]) if len(detections) else self.templates
+        self.templates = combined[np.concatenate([rows[keep], track_count + new_dets])]
+        self.x, self.P, self.misses, self.anchors = self.x[keep], self.P[keep], self.misses[keep], self.anchors[keep]
+
+        if len(new_dets):
+            self._spawn(boxes[new_dets])
+
+    def reset(self):
+        self.__init__(self.iou_threshold, self.max_misses)
+
+    def _match(self, boxes: np.ndarray, detections: Detections):
+        if not len(self.templates) or not len(boxes):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        ious = iou_matrix(self.x[:, :4], boxes)
+        ious[self.templates.class_name[:, None] != detections.class_name[None, :]] = 0
+
+        # Greedy assignment in order of decreasing IoU
+        tracks, dets = [], []
+        used_t, used_d = set(), set()
+        order = np.argsort(-ious, axis=None)
+        for flat in order:
+            t, d = divmod(int(flat), ious.shape[1])
+            if ious[t, d] < self.iou_threshold:
+                break
+            if t in used_t or d in used_d:
+                continue
+            used_t.add(t)
+            used_d.add(d)
+            tracks.append(t)
+            dets.append(d)
+
+        return np.array(tracks, dtype=np.int64), np.array(dets, dtype=np.int64)
+
+    def _correct(self, idx: np.ndarray, z: np.ndarray):
+        x, P = self.x[idx], self.P[idx]
+        S = self.H @ P @ self.H.T + self.R
+        K = np.linalg.solve(S, (P @ self.H.T).transpose(0, 2, 1)).transpose(0, 2, 1)
+        y = z - x[:, :4]
+        self.x[idx] = x + np.einsum("nij,nj->ni", K, y)
+        self.P[idx] = (np.eye(8) - K @ self.H) @ P
+
+    def _spawn(self, boxes: np.ndarray):
+        n = len(boxes)
+        x = np.zeros((n, 8))
+        x[:, :4] = boxes
+        P = np.tile(np.diag([10.0, 10.0, 10.0, 10.0, 100.0, 100.0, 100.0, 100.0]), (n, 1, 1))
+
+        self.x = np.concatenate([self.x, x])
+        self.P = np.concatenate([self.P, P])
+        self.misses = np.concatenate([self.misses, np.zeros(n, dtype=np.int32)])
+        self.anchors = np.concatenate([self.anchors, boxes])
+
+    def _carry(self, tracks: np.ndarray) -> Detections:
+        carried = self.templates[tracks]
+        boxes = self.x[tracks, :4]
+        carried.xyxy = np.rint(boxes).astype(np.int32)
+
+        if carried.has_polygons:
+            # Move each polygon with its box: scale around the anchor's origin, then translate
+            anchors = self.anchors[tracks]
+            scale = (boxes[:, 2:] - boxes[:, :2]) / np.maximum(anchors[:, 2:] - anchors[:, :2], 1e-6)
+            owner = np.repeat(np.arange(len(tracks)), np.diff(carried.offsets))
+            points = (carried.points - anchors[owner, :2]) * scale[owner] + boxes[owner, :2]
+            carried.points = np.rint(points).astype(np.int32)
+
+        return carried
@@ -0,0 +1,216 @@
+import glob
+import hashlib
+import os
+from typing import Iterable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+from ultralytics import YOLO
+
+import config
+from core.helper.detections import Detections, iou_matrix
+from core.helper.extensions import letterbox
+
+TORCH = "torch"
+ONNX = "onnx"
+ONNX_INT8 = "onnx-int8"
+BACKENDS = (TORCH, ONNX, ONNX_INT8)
+
+
+def weights_hash(model_path: str) -> str:
+    sha = hashlib.sha256()
+    with open(model_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()[:12]
+
+
+def _artifact_path(model_path: str, suffix: str) -> str:
+    # Stored next to the weights and keyed by their hash, so retrained weights get a fresh export
+    stem, _ = os.path.splitext(model_path)
+    return f"{stem}.{weights_hash(model_path)}{suffix}"
+
+
+def export_onnx(model_path: str, imgsz: int = 640) -> str:
+    """Export `model_path` to ONNX once and return the cached file."""
+    onnx_path = _artifact_path(model_path, ".onnx")
+    if os.path.exists(onnx_path):
+        return onnx_path
+
+    print(f"[Backend] Exporting {model_path} to ONNX...")
+    # Dynamic axes keep batched calls and other input sizes working
+    exported = YOLO(model_path).export(format="onnx", imgsz=imgsz, dynamic=True)
+    os.replace(exported, onnx_path)
+    print(f"[Backend] Exported to {onnx_path}")
+    return onnx_path
+
+
+def _calibration_frames(source: str, limit: int = 64) -> List[np.ndarray]:
+    if os.path.isdir(source):
+        paths = sorted(
+            path for ext in ("jpg", "jpeg", "png")
+            for path in glob.glob(os.path.join(source, f"*.{ext}"))
+        )
+        frames = [cv2.imread(path) for path in paths[:limit]]
+        return [frame for frame in frames if frame is not None]
+
+    cap = cv2.VideoCapture(source)
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or limit
+    step = max(1, total // limit)
+    frames = []
+    index = 0
+    while len(frames) < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if index % step == 0:
+            frames.append(frame)
+        index += 1
+    cap.release()
+    return frames
+
+
+def quantize_int8(model_path: str, calibration_source: str, imgsz: int = 640) -> str:
+    """Static int8 (QDQ) quantization of the exported ONNX model, calibrated on real frames."""
+    from onnxruntime import InferenceSession
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+
+    int8_path = _artifact_path(model_path, ".int8.onnx")
+    if os.path.exists(int8_path):
+        return int8_path
+
+    onnx_path = export_onnx(model_path, imgsz)
+    frames = _calibration_frames(calibration_source)
+    if not frames:
+        raise ValueError(f"No calibration frames found in {calibration_source}")
+
+    input_name = InferenceSession(onnx_path, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+
+    class _Reader(CalibrationDataReader):
+        def __init__(self):
+            self.batches = iter(frames)
+
+        def get_next(self):
+            frame = next(self.batches, None)
+            if frame is None:
+                return None
+            image, _, _ = letterbox(frame, imgsz, auto=False)
+            tensor = image[..., ::-1].transpose(2, 0, 1)[None].astype(np.float32) / 255.0
+            return {input_name: np.ascontiguousarray(tensor)}
+
+    print(f"[Backend] Quantizing {onnx_path} to int8 with {len(frames)} calibration frames...")
+    quantize_static(
+        onnx_path,
+        int8_path,
+        _Reader(),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+    )
+    print(f"[Backend] Quantized model saved to {int8_path}")
+    return int8_path
+
+
+def load_model(model_path: str, backend: str = TORCH, num_threads: Optional[int] = None) -> Tuple[YOLO, str]:
+    """
+    Load `model_path` with the requested backend. Returns the model and the backend actually used;
+    anything that goes wrong with ONNX Runtime falls back to PyTorch. `num_threads` sets the intra-op
+    thread count of the ONNX Runtime session; PyTorch has no per-model setting and ignores it.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unsupported backend: {backend}")
+    if backend == TORCH:
+        return YOLO(model_path), TORCH
+
+    try:
+        import onnxruntime  # noqa: F401
+
+        if backend == ONNX_INT8:
+            if not config.ONNX_CALIBRATION_SOURCE:
+                raise ValueError("ONNX_CALIBRATION_SOURCE is not configured")
+            path = quantize_int8(model_path, config.ONNX_CALIBRATION_SOURCE)
+        else:
+            path = export_onnx(model_path)
+        model = YOLO(path)
+    except Exception as e:
+        print(f"[Backend] {backend} unavailable for {model_path} ({e}), falling back to {TORCH}")
+        return YOLO(model_path), TORCH
+
+    if num_threads:
+        try:
+            _limit_session_threads(model, path, num_threads)
+        except Exception as e:
+            print(f"[Backend] Cannot limit {path} to {num_threads} threads ({e}), using the default session")
+    return model, backend
+
+
+def _limit_session_threads(model: YOLO, path: str, num_threads: int):
+    # ultralytics creates the session on the first call and takes no session options, so make that
+    # call now and recreate the session with its own options and providers plus the thread count.
+    # The model is new and not shared yet, so nothing else holds the session being replaced.
+    import onnxruntime
+
+    model(np.zeros((64, 64, 3), dtype=np.uint8), device=-1, verbose=False)
+    backend = model.predictor.model
+    session = backend.session
+    options = session.get_session_options()
+    options.intra_op_num_threads = num_threads
+    providers = session.get_providers()
+    provider_options = session.get_provider_options()
+    backend.session = onnxruntime.InferenceSession(
+        path, options, providers=providers, provider_options=[provider_options.get(p, {}) for p in providers]
+    )
+
+
+def parity_check(
+        model_path: str,
+        backend: str,
+        frames: Iterable[np.ndarray],
+        iou_threshold: float = 0.5,
+        max_conf_diff: float = 0.05,
+        min_match_ratio: float = 0.9,
+) -> dict:
+    """Compare a backend's detections against the PyTorch path on the same frames."""
+    reference, _ = load_model(model_path, TORCH)
+    candidate, used = load_model(model_path, backend)
+
+    matched = total = 0
+    ious, conf_diffs = [], []
+    for frame in frames:
+        expected = Detections.from_ultralytics(reference(frame, device=-1, verbose=False)[0])
+        actual = Detections.from_ultralytics(candidate(frame, device=-1, verbose=False)[0])
+        total += max(len(expected), len(actual))
+        if not len(expected) or not len(actual):
+            continue
+
+        overlap = iou_matrix(expected.xyxy.astype(np.float64), actual.xyxy.astype(np.float64))
+        overlap[expected.class_id[:, None] != actual.class_id[None, :]] = 0
+        best = overlap.argmax(axis=1)
+        hit = overlap[np.arange(len(expected)), best] >= iou_threshold
+        matched += int(hit.sum())
+        ious.extend(overlap[np.arange(len(expected)), best][hit].tolist())
+        conf_diffs.extend(np.abs(expected.confidence[hit] - actual.confidence[best[hit]]).tolist())
+
+    match_ratio = matched / total if total else 1.0
+    mean_conf_diff = float(np.mean(conf_diffs)) if conf_diffs else 0.0
+    return {
+        "model": model_path,
+        "backend": used,
+        "match_ratio": round(match_ratio, 4),
+        "mean_iou": round(float(np.mean(ious)), 4) if ious else None,
+        "mean_conf_diff": round(mean_conf_diff, 4),
+        "ok": used == backend and match_ratio >= min_match_ratio and mean_conf_diff <= max_conf_diff,
+    }
+
+
+def find_models(root: str = "model") -> List[str]:
+    return sorted(glob.glob(os.path.join(root, "**", "*.pt"), recursive=True))
+
+
+def sample_frames(source: Optional[str], count: int = 16, size: Tuple[int, int] = (1280, 720)) -> List[np.ndarray]:
+    if source:
+        return _calibration_frames(source, limit=count)
+    # No footage at hand: a fixed-seed noise pattern still exercises the whole graph
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 255, (size[1], size[0], 3), dtype=np.uint8) for _ in range(count)]
@@ -1,14 +1,31 @@
 import cv2
 import queue
 import threading
+import time
 import traceback
+from typing import Optional
+
+import config
+from core.helper.frame_pool import count_copy
+from core.helper.frame_queue import BoundedFrameQueue
 from core.helper.output_path import get_output_path  # Adjust this import to match your project
 
 
 class ImageCapture:
-    def __init__(self, enable: bool = True):
+    def __init__(
+            self,
+            enable: bool = True,
+            output_dir: str = "images",
+            queue_size: Optional[int] = None,
+            queue_policy: Optional[str] = None,
+    ):
         self.enable = enable
-        self.queue = queue.Queue()
+        self.output_dir = output_dir
+        self.queue = BoundedFrameQueue(
+            maxsize=queue_size or config.CAPTURE_QUEUE_SIZE,
+            policy=queue_policy or config.CAPTURE_QUEUE_POLICY,
+            name=f"capture:{output_dir}",
+        )
         self.stop_event = threading.Event()
         self.thread = threading.Thread(target=self._worker, name="ImageCaptureWorker", daemon=True)
         self.thread.start()
@@ -21,9 +38,18 @@ class ImageCapture:
             except queue.Empty:
                 continue  # No item, loop again
 
+            start = time.perf_counter()
+            success = False
             try:
-                path = get_output_path("images", "jpg")
-                success = cv2.imwrite(path, frame)
+                path = get_output_path(self.output_dir, "jpg")
+                if isinstance(frame, bytes):
+                    # Already encoded, e.g. the photo that went out with the alert
+                    with open(path, "wb") as f:
+                        f.write(frame)
+                    success = True
+                else:
+                    success = cv2.imwrite(path, frame)
+                elapsed = time.perf_counter() - start
 
                 if success:
                     print(f"[ImageCapture] Image saved to {path}")
@@ -35,12 +61,24 @@ class ImageCapture:
                 print(f"[ImageCapture] Error: {e}")
                 traceback.print_exc()
             finally:
-                self.queue.task_done()
+                self.queue.task_done(elapsed if success else None)
 
     def capture(self, frame, callback=None):
+        """
+        Queue `frame` for saving, or JPEG bytes which are written as they are. Read-only frames are
+        shared as is, writable ones are copied first.
+        """
         if self.enable:
-            self.queue.put((frame.copy(), callback))
-            print("[ImageCapture] Image capture queued.")
+            if not isinstance(frame, bytes) and frame.flags.writeable:
+                frame = frame.copy()
+                count_copy(frame.nbytes, "capture")
+            if self.queue.put((frame, callback)):
+                print("[ImageCapture] Image capture queued.")
+            else:
+                print("[ImageCapture] Capture queue full, image dropped.")
+
+    def stats(self) -> dict:
+        return self.queue.stats()
 
     def shutdown(self):
         """Signal the worker thread to stop and wait for it to finish."""
@@ -2,8 +2,37 @@ import os
 import subprocess
 import asyncio
 import shutil
+import json
 
 class CompressVideo:
+    @staticmethod
+    def is_compliant(input_path: str, resolution: str = "1280x720") -> bool:
+        """
+        True if the clip is already H.264/yuv420p no larger than `resolution`, e.g. written by the
+        ffmpeg recorder backend, so it can be uploaded as is.
+        """
+        if not shutil.which("ffprobe"):
+            return False
+
+        command = [
+            "ffprobe", "-v", "error", "-select_streams", "v:0",
+            "-show_entries", "stream=codec_name,pix_fmt,width,height", "-of", "json",
+            input_path,
+        ]
+        try:
+            output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+            stream = json.loads(output)["streams"][0]
+        except (subprocess.CalledProcessError, KeyError, IndexError, ValueError):
+            return False
+
+        max_width, max_height = (int(v) for v in resolution.split("x"))
+        return (
+            stream.get("codec_name") == "h264"
+            and stream.get("pix_fmt") == "yuv420p"
+            and stream.get("width", 0) <= max_width
+            and stream.get("height", 0) <= max_height
+        )
+
     @staticmethod
     async def compress_video(input_path: str, crf: int = 28, resolution: str = "1280x720") -> str:
         """
@@ -17,6 +46,10 @@ class CompressVideo:
             print("[CompressVideo] ffmpeg not found in PATH. Skipping compression.")
             return input_path  # Fallback: return original
 
+        if await asyncio.to_thread(CompressVideo.is_compliant, input_path, resolution):
+            print(f"[CompressVideo] {input_path} is already H.264. Skipping compression.")
+            return input_path
+
         print(f"[CompressVideo] Compressing {input_path}...")
 
         abs_input_path = os.path.abspath(input_path)
@@ -0,0 +1,259 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+
+def iou_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU between two (N, 4) and (M, 4) xyxy arrays."""
+    if len(boxes_a) == 0 or len(boxes_b) == 0:
+        return np.zeros((len(boxes_a), len(boxes_b)), dtype=np.float32)
+
+    a = boxes_a[:, None, :]
+    b = boxes_b[None, :, :]
+    inter_w = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    inter_h = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = inter_w * inter_h
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    return inter / np.maximum(area_a + area_b - inter, 1e-6)
+
+
+def _unletterbox(points: np.ndarray, letterbox: Tuple[float, Tuple[int, int], Tuple[int, int]]) -> np.ndarray:
+    gain, (left, top), (height, width) = letterbox
+    points = (points - (left, top)) / gain
+    return np.clip(points, 0, (width, height))
+
+
+def _points(polygon) -> np.ndarray:
+    # Lists and numpy arrays alike: `polygon or []` is ambiguous for an array
+    if polygon is None or len(polygon) == 0:
+        return np.empty((0, 2), dtype=np.int32)
+    return np.asarray(polygon, dtype=np.int32).reshape(-1, 2)
+
+
+class Detections:
+    """
+    Columnar detection results backed by NumPy arrays.
+
+    * xyxy        (N, 4) int32 boxes
+    * class_id    (N,)   int32, ids of the model that produced the row
+    * class_name  (N,)   str, so rows from different models can be merged and summarized
+    * confidence  (N,)   float32
+    * points      (M, 2) int32 polygon vertices of all rows, concatenated
+    * offsets     (N+1,) int64, row i owns points[offsets[i]:offsets[i + 1]] (empty for box-only rows)
+
+    Iterating yields the legacy dict view (`bbox`, `class_id`, `class_name`, `confidence`, `polygon`).
+    """
+
+    __slots__ = ("xyxy", "class_id", "class_name", "confidence", "points", "offsets")
+
+    def __init__(
+            self,
+            xyxy: np.ndarray,
+            class_id: np.ndarray,
+            class_name: np.ndarray,
+            confidence: np.ndarray,
+            points: Optional[np.ndarray] = None,
+            offsets: Optional[np.ndarray] = None,
+    ):
+        self.xyxy = np.asarray(xyxy, dtype=np.int32).reshape(-1, 4)
+        self.class_id = np.asarray(class_id, dtype=np.int32).reshape(-1)
+        self.class_name = np.asarray(class_name, dtype=str).reshape(-1)
+        self.confidence = np.asarray(confidence, dtype=np.float32).reshape(-1)
+
+        if points is None:
+            points = np.zeros((0, 2), dtype=np.int32)
+            offsets = np.zeros(len(self.xyxy) + 1, dtype=np.int64)
+        self.points = np.asarray(points, dtype=np.int32).reshape(-1, 2)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+
+    # ---- construction -------------------------------------------------
+
+    @classmethod
+    def empty(cls) -> "Detections":
+        return cls(np.zeros((0, 4)), np.zeros(0), np.zeros(0, dtype=str), np.zeros(0))
+
+    @classmethod
+    def from_ultralytics(
+            cls,
+            result,
+            allowed_classes: Optional[Iterable[int]] = None,
+            polygons: bool = False,
+            letterbox: Optional[Tuple[float, Tuple[int, int], Tuple[int, int]]] = None,
+    ) -> "Detections":
+        """
+        Build from one ultralytics `Results` in a single vectorized step.
+        `letterbox` = (gain, (left, top), (height, width)) maps coordinates of a pre-letterboxed
+        input tensor back onto the original frame.
+        """
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return cls.empty()
+
+        boxes = boxes.cpu().numpy()
+        xyxy = boxes.xyxy
+        if letterbox is not None:
+            xyxy = _unletterbox(xyxy.reshape(-1, 2), letterbox).reshape(-1, 4)
+        class_id = boxes.cls.astype(np.int32)
+        confidence = boxes.conf
+
+        names = result.names
+        lookup = np.array([names.get(i, str(i)) for i in range(max(names) + 1)] if names else [], dtype=str)
+
+        keep = np.isin(class_id, list(allowed_classes)) if allowed_classes else np.ones(len(class_id), dtype=bool)
+
+        points = offsets = None
+        if polygons:
+            if result.masks is not None:
+                segments = [seg for seg, k in zip(result.masks.xy, keep) if k]
+                lengths = np.array([len(seg) for seg in segments], dtype=np.int64)
+                points = np.concatenate(segments) if segments else np.zeros((0, 2))
+                if letterbox is not None:
+                    points = _unletterbox(points, letterbox)
+            else:
+                # Models without masks get their box as a rectangle polygon
+                corners = xyxy[keep][:, [0, 1, 2, 1, 2, 3, 0, 3]]
+                points = corners.reshape(-1, 2)
+                lengths = np.full(len(corners), 4, dtype=np.int64)
+            offsets = np.concatenate([[0], np.cumsum(lengths)])
+
+        class_id = class_id[keep]
+        return cls(xyxy[keep], class_id, lookup[class_id], confidence[keep], points, offsets)
+
+    @classmethod
+    def from_dicts(cls, detections: List[Dict]) -> "Detections":
+        if not detections:
+            return cls.empty()
+
+        polygons = [_points(det.get("polygon")) for det in detections]
+        xyxy = []
+        for det, polygon in zip(detections, polygons):
+            if det.get("bbox") is not None:
+                xyxy.append(det["bbox"])
+            elif len(polygon):
+                xyxy.append((*polygon.min(axis=0), *polygon.max(axis=0)))
+            else:
+                xyxy.append((0, 0, 0, 0))
+
+        return cls(
+            xyxy,
+            [det.get("class_id", -1) for det in detections],
+            [det["class_name"] for det in detections],
+            [det["confidence"] for det in detections],
+            np.concatenate(polygons),
+            np.concatenate([[0], np.cumsum([len(p) for p in polygons])]),
+        )
+
+    @classmethod
+    def merge(cls, items: List["Detections"]) -> "Detections":
+        items = [item for item in items if item is not None and len(item)]
+        if not items:
+            return cls.empty()
+        if len(items) == 1:
+            return items[0]
+
+        point_counts = np.cumsum([0] + [len(item.points) for item in items[:-1]])
+        offsets = np.concatenate(
+            [[0]] + [item.offsets[1:] + shift for item, shift in zip(items, point_counts)]
+        )
+        return cls(
+            np.concatenate([item.xyxy for item in items]),
+            np.concatenate([item.class_id for item in items]),
+            np.concatenate([item.class_name for item in items]),
+            np.concatenate([item.confidence for item in items]),
+            np.concatenate([item.points for item in items]),
+            offsets,
+        )
+
+    # ---- access -------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self.confidence)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __getitem__(self, index: Union[int, slice, np.ndarray, List[int]]):
+        if isinstance(index, (int, np.integer)):
+            return self.to_dict(int(index))
+
+        rows = np.arange(len(self))[index]
+        starts = self.offsets[rows]
+        lengths = self.offsets[rows + 1] - starts
+        offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        point_index = np.arange(offsets[-1]) - np.repeat(offsets[:-1] - starts, lengths)
+
+        return Detections(
+            self.xyxy[rows],
+            self.class_id[rows],
+            self.class_name[rows],
+            self.confidence[rows],
+            self.points[point_index],
+            offsets,
+        )
+
+    def __iter__(self) -> Iterator[Dict]:
+        return (self.to_dict(i) for i in range(len(self)))
+
+    def __repr__(self) -> str:
+        return f"Detections(n={len(self)}, classes={sorted(set(self.class_name.tolist()))})"
+
+    @property
+    def has_polygons(self) -> bool:
+        return len(self.points) > 0
+
+    def polygon(self, i: int) -> np.ndarray:
+        return self.points[self.offsets[i]:self.offsets[i + 1]]
+
+    def polygons(self) -> List[np.ndarray]:
+        return np.split(self.points, self.offsets[1:-1]) if len(self) else []
+
+    def to_dict(self, i: int) -> Dict:
+        det = {
+            "bbox": tuple(int(v) for v in self.xyxy[i]),
+            "class_id": int(self.class_id[i]),
+            "class_name": str(self.class_name[i]),
+            "confidence": float(self.confidence[i]),
+        }
+        polygon = self.polygon(i)
+        if len(polygon):
+            det["polygon"] = [(int(x), int(y)) for x, y in polygon]
+        return det
+
+    def to_dicts(self) -> List[Dict]:
+        return list(self)
+
+    # ---- array operations ---------------------------------------------
+
+    def filter(self, min_conf: Optional[float] = None, classes: Optional[Iterable[str]] = None) -> "Detections":
+        keep = np.ones(len(self), dtype=bool)
+        if min_conf is not None:
+            keep &= self.confidence >= min_conf
+        if classes is not None:
+            keep &= np.isin(self.class_name, list(classes))
+        return self if keep.all() else self[keep]
+
+    def top(self) -> Optional[Dict]:
+        if not len(self):
+            return None
+        return self.to_dict(int(np.argmax(self.confidence)))
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Per-class count, average and max confidence, in first-seen order."""
+        if not len(self):
+            return {}
+
+        classes, first_seen, inverse = np.unique(self.class_name, return_index=True, return_inverse=True)
+        counts = np.bincount(inverse, minlength=len(classes))
+        sums = np.bincount(inverse, weights=self.confidence, minlength=len(classes))
+        maxima = np.full(len(classes), -np.inf)
+        np.maximum.at(maxima, inverse, self.confidence)
+
+        return {
+            str(classes[k]): {
+                "count": int(counts[k]),
+                "avg_confidence": float(sums[k] / counts[k]),
+                "max_confidence": float(maxima[k]),
+            }
+            for k in np.argsort(first_seen)
+        }
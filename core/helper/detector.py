@@ -1,82 +1,124 @@
-from ultralytics import YOLO
+import os
+import time
+from typing import Dict, List, Optional
 
+import numpy as np
+import torch
 
-class ObjectDetector:
-    def __init__(self, model_path, allowed_classes, stream: bool = False):
-        self.model = YOLO(model_path)
-        self.allowed_classes = set(allowed_classes) if allowed_classes else set()
-        self.stream = stream
-
-    def detect(self, frame):
-        results = self.model(frame, stream=self.stream, device=-1)
-        if not results:
-            return []
-
-        detections = []
-        class_names = results[0].names if results else []
-
-        for result in results:
-            for box in result.boxes:
-                cls_id = int(box.cls[0])
-                if self.allowed_classes and cls_id not in self.allowed_classes:
-                    continue
+from core.helper.backends import TORCH, load_model
+from core.helper.detections import Detections
+from core.helper.metrics import metrics
+from core.helper.model_cache import ModelCache
+from core.helper.preprocess import FramePreprocessor, PreparedFrame
 
-                conf = float(box.conf[0])
-                x1, y1, x2, y2 = map(int, box.xyxy[0])
+_STAGE_SECONDS = metrics.histogram("detector_stage_seconds", "Time per model call by stage")
 
-                detections.append({
-                    "bbox": (x1, y1, x2, y2),
-                    "class_id": cls_id,
-                    "class_name": class_names[cls_id],
-                    "confidence": conf
-                })
 
+class ObjectDetector:
+    def __init__(
+            self,
+            model_path,
+            allowed_classes,
+            stream: bool = False,
+            backend: str = TORCH,
+            cache: Optional[ModelCache] = None,
+            shared_preprocess: bool = True,
+            num_threads: Optional[int] = None,
+    ):
+        self.model_path = model_path
+        self.requested_backend = backend
+        self.cache = cache or ModelCache.shared()
+        self._load(num_threads)
+        self.allowed_classes = set(allowed_classes) if allowed_classes else set()
+        self.stream = stream
+        imgsz = self.model.overrides.get("imgsz", 640)
+        self.imgsz = imgsz if isinstance(imgsz, int) else tuple(imgsz)
+        # Both may be lowered at runtime by LatencyController to stay within a latency budget
+        self.max_det = self.model.overrides.get("max_det", 300)
+        # Detectors with the same input size reuse one letterboxed tensor per frame
+        self.preprocessor = FramePreprocessor.shared() if shared_preprocess else None
+        # Seconds spent in each stage of the last call (preprocess / inference / extract)
+        self.last_timings: Dict[str, float] = {}
+        self.metrics_label = os.path.basename(model_path)
+
+    def _load(self, num_threads: Optional[int]):
+        # Weights are loaded once per process and shared by every detector using the same file and
+        # backend. ONNX Runtime fixes the thread count when the session is created, so each budget
+        # gets its own entry; PyTorch models share one entry whatever the budget.
+        budget = None if self.requested_backend == TORCH else num_threads
+        entry = self.cache.entry(
+            (self.model_path, self.requested_backend, budget),
+            lambda: load_model(self.model_path, self.requested_backend, budget),
+            path=self.model_path,
+        )
+        self.model, self.backend = entry.model
+        self.model_lock = entry.lock
+        self.num_threads = num_threads
+
+    def set_num_threads(self, num_threads: int):
+        """
+        Run this model's ONNX Runtime session with `num_threads` intra-op threads, by switching to the
+        cached model loaded with that budget. Call it before the detector is in use.
+        PyTorch models have no per-model setting: the budget is the process-wide `torch.set_num_threads`.
+        """
+        if num_threads != self.num_threads:
+            self._load(num_threads)
+
+    def _run(self, frames: List[np.ndarray], polygons: bool) -> List[Detections]:
+        start = time.perf_counter()
+        prepared = self._prepare(frames)
+        if prepared is not None:
+            source = torch.cat([p.tensor for p in prepared]) if len(prepared) > 1 else prepared[0].tensor
+        else:
+            source = frames if len(frames) > 1 else frames[0]
+        prepared_at = time.perf_counter()
+
+        with self.model_lock:
+            results = list(self.model(source, stream=self.stream, device=-1, imgsz=self.imgsz, max_det=self.max_det))
+        inferred_at = time.perf_counter()
+
+        detections = [
+            self._parse(result, polygons, prepared[i] if prepared is not None else None)
+            for i, result in enumerate(results)
+        ]
+        self.last_timings = {
+            "preprocess": prepared_at - start,
+            "inference": inferred_at - prepared_at,
+            "extract": time.perf_counter() - inferred_at,
+        }
+        for stage, seconds in self.last_timings.items():
+            _STAGE_SECONDS.observe(seconds, model=self.metrics_label, stage=stage)
         return detections
 
-
-    def detect_plg(self, frame):
-        results = self.model(frame, stream=self.stream, device=-1)
-        if not results:
+    def _prepare(self, frames: List[np.ndarray]) -> Optional[List[PreparedFrame]]:
+        if self.preprocessor is None:
+            return None
+        prepared = [self.preprocessor.prepare(frame, self.imgsz) for frame in frames]
+        # Frames of different sizes can't be stacked into one tensor; let ultralytics letterbox them
+        if len({p.tensor.shape for p in prepared}) > 1:
+            return None
+        return prepared
+
+    def detect(self, frame) -> Detections:
+        return self._run([frame], polygons=False)[0]
+
+    def detect_batch(self, frames) -> List[Detections]:
+        """Run one model call over several frames, returns one `Detections` per frame."""
+        if not frames:
             return []
+        return self._run(list(frames), polygons=False)
 
-        detections = []
-        class_names = results[0].names if results else []
-
-        for result in results:
-            # Check if result contains masks (only in segmentation models)
-            if result.masks is not None:
-                for seg, cls_id, conf in zip(result.masks.xy, result.boxes.cls, result.boxes.conf):
-                    cls_id = int(cls_id)
-                    if len(self.allowed_classes) > 0 and cls_id not in self.allowed_classes:
-                        continue
-
-                    polygon = [(int(x), int(y)) for x, y in seg]
-
-                    detections.append({
-                        "bbox": None,  # No bounding box for masks
-                        "polygon": polygon,
-                        "class_id": cls_id,
-                        "class_name": class_names[cls_id],
-                        "confidence": float(conf)
-                    })
-            else:
-                # Fallback for models without masks (returns rectangle polygon)
-                for box in result.boxes:
-                    cls_id = int(box.cls[0])
-                    if len(self.allowed_classes) > 0 and cls_id not in self.allowed_classes:
-                        continue
-
-                    conf = float(box.conf[0])
-                    x1, y1, x2, y2 = map(int, box.xyxy[0])
-                    polygon = [(x1, y1), (x2, y1), (x2, y2), (x1, y2)]
-
-                    detections.append({
-                        "bbox": (x1, y1, x2, y2),
-                        "polygon": polygon,
-                        "class_id": cls_id,
-                        "class_name": class_names[cls_id],
-                        "confidence": conf
-                    })
+    def detect_plg(self, frame) -> Detections:
+        """Like `detect`, with polygons from segmentation masks (or the box corners for detection-only models)."""
+        return self._run([frame], polygons=True)[0]
 
-        return detections
+    def detect_plg_batch(self, frames) -> List[Detections]:
+        if not frames:
+            return []
+        return self._run(list(frames), polygons=True)
 
+    def _parse(self, result, polygons: bool, prepared: Optional[PreparedFrame] = None) -> Detections:
+        letterbox = (prepared.gain, prepared.pad, prepared.orig_shape) if prepared is not None else None
+        return Detections.from_ultralytics(
+            result, allowed_classes=self.allowed_classes, polygons=polygons, letterbox=letterbox
+        )
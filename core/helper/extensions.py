@@ -1,3 +1,44 @@
+from urllib.parse import urlsplit
+
+
 def to_camel_case(text: str) -> str:
     parts = text.split()
-    return parts[0].lower() + ''.join(word.capitalize() for word in parts[1:])
\ No newline at end of file
+    return parts[0].lower() + ''.join(word.capitalize() for word in parts[1:])
+
+def safe_source(source) -> str:
+    """A video source as it can be shown in alerts and logs: stream URLs lose credentials and query."""
+    text = str(source)
+    if "://" not in text:
+        return text
+    url = urlsplit(text)
+    host = url.hostname or ""
+    if url.port:
+        host += f":{url.port}"
+    return f"{url.scheme}://{host}{url.path}"
+
+def letterbox(image, new_shape=640, color=(114, 114, 114), stride: int = 32, auto: bool = True):
+    """
+    Resize keeping the aspect ratio and pad to `new_shape` like ultralytics does before inference.
+    With `auto`, padding is only added up to the next multiple of `stride` (rectangular inference).
+    Returns the padded image, the scale gain and the (left, top) padding.
+    """
+    import cv2
+    import numpy as np
+
+    height, width = image.shape[:2]
+    if isinstance(new_shape, int):
+        new_shape = (new_shape, new_shape)
+
+    gain = min(new_shape[0] / height, new_shape[1] / width)
+    resized_w, resized_h = int(round(width * gain)), int(round(height * gain))
+    pad_w, pad_h = new_shape[1] - resized_w, new_shape[0] - resized_h
+    if auto:
+        pad_w, pad_h = np.mod(pad_w, stride), np.mod(pad_h, stride)
+
+    if (width, height) != (resized_w, resized_h):
+        image = cv2.resize(image, (resized_w, resized_h), interpolation=cv2.INTER_LINEAR)
+
+    left, top = int(round(pad_w / 2 - 0.1)), int(round(pad_h / 2 - 0.1))
+    right, bottom = int(round(pad_w / 2 + 0.1)), int(round(pad_h / 2 + 0.1))
+    image = cv2.copyMakeBorder(image, top, bottom, left, right, cv2.BORDER_CONSTANT, value=color)
+    return image, gain, (left, top)
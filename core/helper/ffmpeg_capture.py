@@ -0,0 +1,230 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+from collections import deque
+from typing import List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from core.helper.frame_pool import FramePool
+from core.helper.extensions import safe_source
+
+KEYFRAMES = "keyframes"
+
+
+def parse_skip(skip: Union[None, int, str]) -> Union[None, int, str]:
+    """None/""/1 = every frame, "keyframes" = keyframes only, N = every Nth frame."""
+    if skip in (None, "", 0, 1, "0", "1"):
+        return None
+    if skip == KEYFRAMES:
+        return KEYFRAMES
+    n = int(skip)
+    if n < 1:
+        raise ValueError(f"Invalid frame skip: {skip}")
+    return n if n > 1 else None
+
+
+def _parse_rate(rate: str) -> float:
+    num, _, den = (rate or "0/1").partition("/")
+    try:
+        return float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return 0.0
+
+
+class FFmpegCapture:
+    """
+    `cv2.VideoCapture` look-alike that decodes with an ffmpeg subprocess and reads raw frames from
+    its stdout, already scaled to `frame_size`. With `skip`, frames are dropped inside ffmpeg
+    (keyframes only, or every Nth frame), so discarded frames are never scaled, converted or copied.
+
+    ffmpeg sends I420 (half the bytes of BGR through the pipe), which is read into one reused buffer
+    and converted by OpenCV straight into a `FramePool` of up to `buffers` BGR arrays. Frames are
+    returned read-only, and a buffer is only reused once nothing refers to its frame any more, so a
+    frame held by a consumer is never overwritten.
+    """
+
+    def __init__(
+            self,
+            source: Union[int, str],
+            frame_size: Tuple[int, int] = (1280, 720),
+            skip: Union[None, int, str] = None,
+            buffers: int = 4,
+            rtsp_transport: str = "tcp",
+    ):
+        self.source = source
+        self.width, self.height = frame_size
+        self.skip = parse_skip(skip)
+        self.rtsp_transport = rtsp_transport
+        if self.width % 2 or self.height % 2:
+            raise ValueError("FFmpegCapture needs an even frame width and height")
+        self.raw = np.empty((self.height * 3 // 2, self.width), dtype=np.uint8)  # I420: Y plane, then U and V
+        self.frame_bytes = self.raw.size
+        self.pool = FramePool((self.height, self.width, 3), max_buffers=max(2, buffers))
+        self.frames_read = 0
+        self.process: Optional[subprocess.Popen] = None
+        self.errors = deque(maxlen=20)  # last lines ffmpeg wrote to stderr
+        self.pending = None  # first frame, read while opening to know the input works
+
+        self.input_args = self._input_args(source)
+        if self.input_args is None or not shutil.which("ffmpeg"):
+            return
+
+        self.fps, self.frame_count = self._probe()
+        self.process = subprocess.Popen(
+            self._command(), stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            bufsize=self.frame_bytes,
+        )
+        # Drain stderr so a chatty stream can't fill the pipe and stall ffmpeg
+        stderr_reader = threading.Thread(target=self._read_errors, name="FFmpegCaptureStderr", daemon=True)
+        stderr_reader.start()
+
+        ret, frame = self._read_frame()
+        if not ret:
+            stderr_reader.join(timeout=2)
+            print(f"[FFmpegCapture] Cannot decode {safe_source(source)}: {self.errors[-1] if self.errors else 'no frames'}")
+            self.release()
+            return
+        self.pending = frame
+
+    def _read_errors(self):
+        for line in self.process.stderr:
+            self.errors.append(line.decode(errors="replace").strip())
+
+    def _input_args(self, source: Union[int, str]) -> Optional[List[str]]:
+        if isinstance(source, int) or (isinstance(source, str) and source.isdigit()):
+            if sys.platform.startswith("linux"):
+                return ["-f", "v4l2", "-i", f"/dev/video{int(source)}"]
+            if sys.platform == "darwin":
+                return ["-f", "avfoundation", "-i", str(int(source))]
+            return None  # DirectShow needs device names, leave those to OpenCV
+
+        args = []
+        if source.startswith("rtsp://"):
+            args += ["-rtsp_transport", self.rtsp_transport]
+        if "://" in source:
+            args += ["-fflags", "nobuffer"]  # live: don't build up a backlog of frames
+        elif not os.path.exists(source):
+            return None
+        return args + ["-i", source]
+
+    def _command(self) -> List[str]:
+        command = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-nostdin"]
+        if self.skip == KEYFRAMES:
+            command += ["-skip_frame", "nokey"]  # the decoder itself skips everything but keyframes
+
+        filters = []
+        if isinstance(self.skip, int):
+            filters.append(f"select=not(mod(n\\,{self.skip}))")
+        filters.append(f"scale={self.width}:{self.height}:flags=bilinear")
+
+        command += self.input_args
+        command += ["-an", "-sn", "-vf", ",".join(filters)]
+        if self.skip:
+            command += ["-fps_mode", "passthrough"]  # don't duplicate frames to fill the gaps
+        return command + ["-f", "rawvideo", "-pix_fmt", "yuv420p", "pipe:1"]
+
+    def _probe(self) -> Tuple[float, int]:
+        """Output fps and frame count (0 = unknown), accounting for skipped frames."""
+        fps, count = self._stream_info()
+        if isinstance(self.skip, int):
+            return fps / self.skip, -(-count // self.skip)
+        if self.skip == KEYFRAMES:
+            ratio = self._keyframe_ratio()
+            return fps * ratio, round(count * ratio)
+        return fps, count
+
+    def _stream_info(self) -> Tuple[float, int]:
+        if shutil.which("ffprobe"):
+            try:
+                output = subprocess.run(
+                    ["ffprobe", "-v", "error", "-select_streams", "v:0", "-show_entries",
+                     "stream=avg_frame_rate,r_frame_rate,nb_frames", "-of", "json", *self.input_args],
+                    capture_output=True, timeout=15, check=True,
+                ).stdout
+                stream = json.loads(output).get("streams", [{}])[0]
+                fps = _parse_rate(stream.get("avg_frame_rate")) or _parse_rate(stream.get("r_frame_rate"))
+                return fps or 30.0, int(stream.get("nb_frames") or 0)
+            except (subprocess.SubprocessError, ValueError, IndexError):
+                pass
+
+        if isinstance(self.source, str) and os.path.isfile(self.source):
+            # Container metadata is cheap to read through OpenCV for files
+            cap = cv2.VideoCapture(self.source)
+            fps, count = cap.get(cv2.CAP_PROP_FPS), int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            cap.release()
+            return fps or 30.0, max(count, 0)
+        return 30.0, 0
+
+    def _keyframe_ratio(self, packets: int = 300) -> float:
+        """Share of keyframes among the first packets of a file; live sources are not sampled."""
+        if "://" in str(self.source) or not isinstance(self.source, str):
+            return 1.0
+        try:
+            output = subprocess.run(
+                ["ffprobe", "-v", "error", "-select_streams", "v:0", "-show_entries", "packet=flags",
+                 "-read_intervals", f"%+#{packets}", "-of", "csv=p=0", *self.input_args],
+                capture_output=True, timeout=15, check=True,
+            ).stdout.decode().split()
+        except subprocess.SubprocessError:
+            return 1.0
+        keyframes = sum(1 for flags in output if "K" in flags)
+        return keyframes / len(output) if output and keyframes else 1.0
+
+    def _read_frame(self):
+        view = memoryview(self.raw.reshape(-1))
+        filled = 0
+        while filled < self.frame_bytes:
+            n = self.process.stdout.readinto(view[filled:])
+            if not n:
+                return False, None
+            filled += n
+
+        buffer, frame = self.pool.acquire()
+        cv2.cvtColor(self.raw, cv2.COLOR_YUV2BGR_I420, dst=buffer)
+        self.frames_read += 1
+        return True, frame
+
+    def isOpened(self) -> bool:
+        return self.process is not None
+
+    def read(self):
+        if self.pending is not None:
+            frame, self.pending = self.pending, None
+            return True, frame
+        if self.process is None:
+            return False, None
+        return self._read_frame()
+
+    def get(self, prop_id: int) -> float:
+        if prop_id == cv2.CAP_PROP_FPS:
+            return self.fps if self.process else 0.0
+        if prop_id == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.width)
+        if prop_id == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.height)
+        if prop_id == cv2.CAP_PROP_FRAME_COUNT:
+            return float(self.frame_count) if self.process else 0.0
+        if prop_id == cv2.CAP_PROP_POS_FRAMES:
+            return float(self.frames_read)
+        return 0.0
+
+    def set(self, prop_id: int, value: float) -> bool:
+        return False
+
+    def release(self):
+        if self.process is None:
+            return
+        if self.process.poll() is None:
+            self.process.terminate()
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self.process.stdout.close()
+        self.process = None
@@ -0,0 +1,106 @@
+import sys
+import threading
+import weakref
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from core.helper.metrics import metrics
+
+_BYTES_COPIED = metrics.counter("frame_bytes_copied_total", "Bytes of frame data copied, by stage")
+
+
+# Every buffer a FramePool ever handed out, by id; weak, so one-off buffers still go away
+_POOLED = weakref.WeakValueDictionary()
+
+
+def count_copy(nbytes: int, stage: str):
+    _BYTES_COPIED.inc(nbytes, stage=stage)
+
+
+def read_only(frame: np.ndarray) -> np.ndarray:
+    """Read-only view of `frame` (no copy)."""
+    view = frame.view()
+    view.flags.writeable = False
+    return view
+
+
+def writable_alias(frame: np.ndarray) -> Optional[np.ndarray]:
+    """The writable array a read-only view was made from, if it covers exactly the same pixels."""
+    base = frame.base
+    if (
+            isinstance(base, np.ndarray) and base.flags.writeable and base.shape == frame.shape
+            and base.strides == frame.strides and base.ctypes.data == frame.ctypes.data
+    ):
+        return base
+    return None
+
+
+def pooled(frame: np.ndarray) -> bool:
+    """Whether `frame` is a view handed out by a `FramePool`, whose buffer isn't reused while the view lives."""
+    base = frame.base
+    return base is not None and _POOLED.get(id(base)) is base and writable_alias(frame) is not None
+
+
+class FramePool:
+    """
+    Reusable frame-sized buffers, so steady-state processing doesn't allocate a new frame each time.
+
+    `acquire()` hands out a read-only view of a pooled buffer. Every view, or slice of one, that is
+    still alive (queued for the recorder, waiting for the capture thread, cached for a detector...)
+    holds a reference to its buffer, and a buffer is reused only once nothing references it any more:
+    Python's own reference count decides, so a consumer can never see its frame overwritten. When
+    all `max_buffers` are in use, a one-off array is allocated instead.
+    """
+
+    def __init__(self, shape: Tuple[int, ...], dtype=np.uint8, max_buffers: int = 16):
+        self.shape = tuple(shape)
+        self.dtype = dtype
+        self.max_buffers = max_buffers
+        self.buffers: List[np.ndarray] = []
+        self.lock = threading.Lock()
+        # What `_refs` reports for a buffer only the pool holds; measured rather than assumed,
+        # since how many references the interpreter itself adds varies between versions
+        self.free_refs = self._refs([np.empty(0)], 0)
+
+        self.reused = 0
+        self.allocated = 0
+        self.overflow = 0
+
+    def acquire(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns (writable buffer, read-only view of it). Fill the buffer, then hand out only the view."""
+        with self.lock:
+            buffer = self._free_buffer()
+            if buffer is None:
+                buffer = np.empty(self.shape, dtype=self.dtype)
+                if len(self.buffers) < self.max_buffers:
+                    self.buffers.append(buffer)
+                    self.allocated += 1
+                else:
+                    self.overflow += 1
+                _POOLED[id(buffer)] = buffer
+            else:
+                self.reused += 1
+
+        return buffer, read_only(buffer)
+
+    @staticmethod
+    def _refs(buffers: List[np.ndarray], index: int) -> int:
+        return sys.getrefcount(buffers[index])
+
+    def _free_buffer(self) -> Optional[np.ndarray]:
+        for i in range(len(self.buffers)):
+            if self._refs(self.buffers, i) <= self.free_refs:
+                return self.buffers[i]
+        return None
+
+    def stats(self) -> dict:
+        with self.lock:
+            in_use = sum(1 for i in range(len(self.buffers)) if self._refs(self.buffers, i) > self.free_refs)
+            return {
+                "buffers": len(self.buffers),
+                "in_use": in_use,
+                "reused": self.reused,
+                "allocated": self.allocated,
+                "overflow": self.overflow,
+            }
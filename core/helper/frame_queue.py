@@ -0,0 +1,126 @@
+import queue
+import threading
+from collections import deque
+from typing import Any, Optional
+
+from core.helper.metrics import metrics
+
+
+class BoundedFrameQueue:
+    """
+    Bounded producer/consumer queue for frames headed to disk, with an overflow policy:
+
+    * "block"       the producer waits for room (nothing is lost, the pipeline slows down)
+    * "drop-oldest" the oldest queued item is discarded to make room
+    * "drop-newest" the new item is discarded
+
+    Same `get`/`task_done`/`empty`/`join` surface as `queue.Queue`; consumers call
+    `task_done(write_seconds)` so write latency shows up in `stats()`.
+    """
+
+    BLOCK = "block"
+    DROP_OLDEST = "drop-oldest"
+    DROP_NEWEST = "drop-newest"
+    POLICIES = (BLOCK, DROP_OLDEST, DROP_NEWEST)
+
+    def __init__(self, maxsize: int = 64, policy: str = DROP_OLDEST, name: Optional[str] = None):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unsupported queue policy: {policy}")
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+
+        self.items = deque()
+        self.cond = threading.Condition()
+        self.unfinished = 0
+
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.high_water = 0
+        self.write_seconds = 0.0
+        self.max_write_seconds = 0.0
+
+        if name:
+            self.name = name
+            metrics.add_collector(self._collect_metrics)
+
+    def put(self, item: Any, timeout: Optional[float] = None) -> bool:
+        """Queue `item`. Returns False if it (or, with "block", the wait) was dropped."""
+        with self.cond:
+            if len(self.items) >= self.maxsize:
+                if self.policy == self.BLOCK:
+                    if not self.cond.wait_for(lambda: len(self.items) < self.maxsize, timeout=timeout):
+                        self.dropped += 1
+                        return False
+                elif self.policy == self.DROP_OLDEST:
+                    self.items.popleft()
+                    self.unfinished -= 1
+                    self.dropped += 1
+                else:
+                    self.dropped += 1
+                    return False
+
+            self.items.append(item)
+            self.unfinished += 1
+            self.enqueued += 1
+            self.high_water = max(self.high_water, len(self.items))
+            self.cond.notify_all()
+            return True
+
+    def get(self, timeout: Optional[float] = None) -> Any:
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.items, timeout=timeout):
+                raise queue.Empty
+            item = self.items.popleft()
+            self.cond.notify_all()
+            return item
+
+    def task_done(self, write_seconds: Optional[float] = None):
+        with self.cond:
+            self.unfinished -= 1
+            if write_seconds is not None:
+                self.written += 1
+                self.write_seconds += write_seconds
+                self.max_write_seconds = max(self.max_write_seconds, write_seconds)
+            self.cond.notify_all()
+
+    def empty(self) -> bool:
+        with self.cond:
+            return not self.items
+
+    def qsize(self) -> int:
+        with self.cond:
+            return len(self.items)
+
+    def pressure(self) -> float:
+        """Fill level between 0 (empty) and 1 (full)."""
+        return len(self.items) / self.maxsize
+
+    def join(self):
+        with self.cond:
+            self.cond.wait_for(lambda: self.unfinished <= 0)
+
+    def _collect_metrics(self):
+        labels = {"queue": self.name}
+        with self.cond:
+            return [
+                ("queue_depth", labels, len(self.items)),
+                ("queue_high_water", labels, self.high_water),
+                ("queue_enqueued_total", labels, self.enqueued),
+                ("queue_dropped_total", labels, self.dropped),
+                ("queue_written_total", labels, self.written),
+            ]
+
+    def stats(self) -> dict:
+        with self.cond:
+            return {
+                "policy": self.policy,
+                "size": len(self.items),
+                "maxsize": self.maxsize,
+                "high_water": self.high_water,
+                "enqueued": self.enqueued,
+                "dropped": self.dropped,
+                "written": self.written,
+                "avg_write_ms": round(1000 * self.write_seconds / self.written, 2) if self.written else 0.0,
+                "max_write_ms": round(1000 * self.max_write_seconds, 2),
+            }
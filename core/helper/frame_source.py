@@ -0,0 +1,152 @@
+import os
+import threading
+from collections import deque
+from typing import Optional, Tuple, Union
+
+import cv2
+
+import config
+from core.helper.extensions import safe_source
+from core.helper.ffmpeg_capture import FFmpegCapture
+
+
+class FrameSource:
+    """
+    Drop-in replacement for `cv2.VideoCapture` that decodes on its own thread.
+
+    * "latest" mode keeps a small ring buffer and `read()` returns only the newest frame,
+      older ones are counted as dropped. Use it for live cameras and RTSP so alerts
+      describe the scene now, not whatever was sitting in OpenCV's buffer.
+    * "lossless" mode hands out every frame in order and makes the decoder wait when the
+      buffer is full. Use it for video files.
+
+    With `decoder="ffmpeg"` frames are decoded by `FFmpegCapture`, already scaled to `frame_size`
+    and optionally thinned out by `skip`; sources ffmpeg can't open fall back to OpenCV. Those
+    frames are read-only views of pooled buffers that are reused only once released.
+    """
+
+    LATEST = "latest"
+    LOSSLESS = "lossless"
+
+    def __init__(
+            self,
+            source: Union[int, str, cv2.VideoCapture, FFmpegCapture],
+            mode: Optional[str] = None,
+            buffer_size: Optional[int] = None,
+            decoder: Optional[str] = None,
+            frame_size: Tuple[int, int] = (1280, 720),
+            skip: Union[None, int, str] = None,
+    ):
+        self.source = source
+        self.mode = mode or self._default_mode(source)
+        if self.mode not in (self.LATEST, self.LOSSLESS):
+            raise ValueError(f"Unsupported frame source mode: {self.mode}")
+
+        self.buffer = deque(maxlen=buffer_size or (2 if self.mode == self.LATEST else 8))
+        self.cap = self._open(
+            source, decoder or config.DECODER, frame_size, config.DECODE_SKIP if skip is None else skip,
+            # frames buffered here, plus the one being read and the one handed out; more are
+            # allocated on demand while consumers hold on to frames
+            buffers=self.buffer.maxlen + 2,
+        )
+        if self.mode == self.LATEST:
+            # Keep OpenCV's own backlog as short as the backend allows
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        self.cond = threading.Condition()
+        self.stop_event = threading.Event()
+        self.eof = False
+
+        self.frames_read = 0
+        self.frames_delivered = 0
+        self.frames_dropped = 0
+
+        self.thread = None
+        if self.cap.isOpened():
+            self.thread = threading.Thread(target=self._reader, name="FrameSourceReader", daemon=True)
+            self.thread.start()
+
+    @staticmethod
+    def _open(source, decoder: str, frame_size: Tuple[int, int], skip, buffers: int):
+        if hasattr(source, "read"):
+            return source
+        if decoder == "ffmpeg":
+            cap = FFmpegCapture(source, frame_size, skip=skip, buffers=buffers)
+            if cap.isOpened():
+                return cap
+            print(f"[FrameSource] ffmpeg unavailable or cannot open {safe_source(source)}, falling back to OpenCV")
+        return cv2.VideoCapture(source)
+
+    @staticmethod
+    def _default_mode(source) -> str:
+        if isinstance(source, str) and os.path.isfile(source):
+            return FrameSource.LOSSLESS
+        return FrameSource.LATEST
+
+    def _reader(self):
+        while not self.stop_event.is_set():
+            ret, frame = self.cap.read()
+            if not ret:
+                break
+
+            with self.cond:
+                self.frames_read += 1
+                if self.mode == self.LOSSLESS:
+                    while len(self.buffer) == self.buffer.maxlen and not self.stop_event.is_set():
+                        self.cond.wait(timeout=0.1)
+                elif len(self.buffer) == self.buffer.maxlen:
+                    self.frames_dropped += 1  # deque drops the oldest on append
+                self.buffer.append(frame)
+                self.cond.notify_all()
+
+        with self.cond:
+            self.eof = True
+            self.cond.notify_all()
+
+    def isOpened(self) -> bool:
+        if self.thread is None or self.stop_event.is_set():
+            return False
+        with self.cond:
+            return not (self.eof and not self.buffer)
+
+    def read(self, block: bool = True):
+        """Returns (ret, frame). With block=False, returns (False, None) right away when no new frame is ready."""
+        with self.cond:
+            while block and not self.buffer and not self.eof and not self.stop_event.is_set():
+                self.cond.wait(timeout=0.1)
+
+            if not self.buffer:
+                return False, None
+
+            if self.mode == self.LATEST:
+                frame = self.buffer.pop()
+                self.frames_dropped += len(self.buffer)
+                self.buffer.clear()
+            else:
+                frame = self.buffer.popleft()
+                self.cond.notify_all()
+
+            self.frames_delivered += 1
+            return True, frame
+
+    def get(self, prop_id: int) -> float:
+        return self.cap.get(prop_id)
+
+    def stats(self) -> dict:
+        with self.cond:
+            return {
+                "mode": self.mode,
+                "frames_read": self.frames_read,
+                "frames_delivered": self.frames_delivered,
+                "frames_dropped": self.frames_dropped,
+                "buffered": len(self.buffer),
+            }
+
+    def release(self):
+        self.stop_event.set()
+        with self.cond:
+            self.cond.notify_all()
+        if self.thread:
+            self.thread.join()
+        self.cap.release()
+        print(f"[FrameSource] Released. {self.stats()}")
@@ -1,6 +1,8 @@
 import html
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional, Union
+
+from core.helper.detections import Detections
 
 
 class Message:
@@ -13,25 +15,33 @@ class Message:
 
     @staticmethod
     def generate_message(
-        detections: list[dict],
+        detections: Union[Detections, list[dict]],
         video_url: Optional[str] = None,
-        location: Optional[str] = None
+        location: Optional[str] = None,
+        suppressed: Optional[Dict[str, int]] = None,
+        video_attached: bool = False,
+        timestamp: Optional[datetime] = None,
     ) -> str:
+        if not isinstance(detections, Detections):
+            detections = Detections.from_dicts(detections)
+
         if not detections:
             return "⚠️ <b>Video detections report.</b>"
 
-        top_detection = max(detections, key=lambda d: d["confidence"])
+        top_detection = detections.top()
         top_class = top_detection["class_name"]
         confidence_percent = Message._format_confidence(top_detection["confidence"])
-        current_time = datetime.now().strftime("%d/%m/%Y %H:%M")
+        current_time = (timestamp or datetime.now()).strftime("%d/%m/%Y %H:%M")
 
         parts = [
             Message._format_header(top_class, confidence_percent),
             "",
             Message._format_top_detection(top_class, location, current_time, confidence_percent),
             Message._format_summary(detections),
-            Message._format_video_link(video_url),
         ]
+        if suppressed:
+            parts.append(Message._format_suppressed(suppressed))
+        parts.append(Message._format_video_link(video_url, video_attached))
 
         return "\n".join(parts)
 
@@ -48,29 +58,30 @@ class Message:
         emoji = Message.emoji_map.get(top_class.lower(), "⚠️")
         lines = [
             f"{emoji} <b>Top Detection:</b> {top_class}",
-            f"📍 <b>Location:</b> {location}" if location else "",
+            f"📍 <b>Location:</b> {html.escape(location)}" if location else "",
             f"⏰ <b>Time:</b> {time_str}",
             f"🎯 <b>Confidence:</b> {confidence}%",
         ]
         return "\n".join(filter(None, lines))
 
     @staticmethod
-    def _format_summary(detections: list[dict]) -> str:
-        class_conf_map = {}
-        for det in detections:
-            cls = det["class_name"]
-            class_conf_map.setdefault(cls, []).append(det["confidence"])
-
+    def _format_summary(detections: Detections) -> str:
         summary_lines = []
-        for cls, confs in class_conf_map.items():
-            avg = sum(confs) / len(confs)
-            summary_lines.append(f"• {cls}: avg {avg * 100:.1f}%, count {len(confs)}")
+        for cls, stats in detections.summary().items():
+            summary_lines.append(f"• {cls}: avg {stats['avg_confidence'] * 100:.1f}%, count {stats['count']}")
 
         return "<b>📌 Detection Summary:</b>\n\n" + "\n".join(summary_lines)
 
     @staticmethod
-    def _format_video_link(video_url: Optional[str]) -> str:
+    def _format_suppressed(suppressed: Dict[str, int]) -> str:
+        counts = ", ".join(f"{cls} ×{count}" for cls, count in suppressed.items())
+        return f"\n🔕 <b>Grouped alerts:</b> {counts}"
+
+    @staticmethod
+    def _format_video_link(video_url: Optional[str], attached: bool = False) -> str:
         if video_url:
             safe_url = html.escape(video_url)
             return f"\n📹 <a href='{safe_url}'><b>► VIEW DETECTION EVIDENCE</b></a>"
+        if attached:
+            return "\n📹 <b>Video evidence attached.</b>"
         return "\n📹 <i>Video evidence processing...</i>"
@@ -0,0 +1,301 @@
+import bisect
+import json
+import threading
+import time
+import weakref
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+Labels = Tuple[Tuple[str, str], ...]
+Sample = Tuple[str, Dict[str, str], float]  # (name, labels, value)
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _labels_key(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+class _Child:
+    __slots__ = ("lock", "value")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.value = 0.0
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self.type = "counter"
+        self.children: Dict[Labels, _Child] = {}
+        self.lock = threading.Lock()
+
+    def _child(self, labels: Dict[str, str]) -> _Child:
+        key = _labels_key(labels)
+        child = self.children.get(key)
+        if child is None:
+            with self.lock:
+                child = self.children.setdefault(key, _Child())
+        return child
+
+    def inc(self, amount: float = 1, **labels):
+        child = self._child(labels)
+        with child.lock:
+            child.value += amount
+
+    def samples(self) -> Iterable[Tuple[str, Labels, float]]:
+        for key, child in list(self.children.items()):
+            yield self.name, key, child.value
+
+
+class Gauge(Counter):
+    def __init__(self, name: str, help_text: str):
+        super().__init__(name, help_text)
+        self.type = "gauge"
+
+    def set(self, value: float, **labels):
+        child = self._child(labels)
+        child.value = float(value)
+
+
+class _HistogramChild:
+    __slots__ = ("lock", "counts", "sum", "count")
+
+    def __init__(self, buckets: int):
+        self.lock = threading.Lock()
+        self.counts = [0] * (buckets + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.type = "histogram"
+        self.buckets = tuple(sorted(buckets))
+        self.children: Dict[Labels, _HistogramChild] = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _labels_key(labels)
+        child = self.children.get(key)
+        if child is None:
+            with self.lock:
+                child = self.children.setdefault(key, _HistogramChild(len(self.buckets)))
+        index = bisect.bisect_left(self.buckets, value)
+        with child.lock:
+            child.counts[index] += 1
+            child.sum += value
+            child.count += 1
+
+    def samples(self) -> Iterable[Tuple[str, Labels, float]]:
+        for key, child in list(self.children.items()):
+            with child.lock:
+                counts, total, count = list(child.counts), child.sum, child.count
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                yield f"{self.name}_bucket", key + (("le", le),), cumulative
+            yield f"{self.name}_sum", key, total
+            yield f"{self.name}_count", key, count
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        """Upper bucket bound below which `q` of the observations fall (a coarse estimate)."""
+        child = self.children.get(_labels_key(labels))
+        if child is None or not child.count:
+            return None
+        target = q * child.count
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), child.counts):
+            cumulative += bucket_count
+            if cumulative >= target:
+                return bound
+        return None
+
+
+class MetricsRegistry:
+    """
+    Process-wide counters, gauges and histograms. Recording is a dict lookup plus a short lock,
+    cheap enough to leave on. Values that already live elsewhere (queue depths...) are read
+    only when metrics are collected, through collectors.
+    """
+
+    _shared: Optional["MetricsRegistry"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self):
+        self.metrics: Dict[str, object] = {}
+        self.collectors: List[Callable[[], Optional[Callable[[], Iterable[Sample]]]]] = []
+        self.lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> "MetricsRegistry":
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def _get_or_create(self, kind, name: str, help_text: str, **kwargs):
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = kind(name, help_text, **kwargs)
+            return metric
+
+    def counter(self, name: str, help_text: str = "") -> Counter:
+        return self._get_or_create(Counter, name, help_text)
+
+    def gauge(self, name: str, help_text: str = "") -> Gauge:
+        return self._get_or_create(Gauge, name, help_text)
+
+    def histogram(self, name: str, help_text: str = "", buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, buckets=buckets)
+
+    def add_collector(self, collect: Callable[[], Iterable[Sample]]):
+        """
+        Register `collect()` returning (name, labels, value) samples: gauges, or counters when the name
+        ends in `_total` (cumulative counts). Bound methods are held weakly.
+        """
+        ref = weakref.WeakMethod(collect) if hasattr(collect, "__self__") else (lambda: collect)
+        with self.lock:
+            self.collectors.append(ref)
+
+    def _collected(self) -> List[Sample]:
+        samples = []
+        with self.lock:
+            self.collectors = [ref for ref in self.collectors if ref() is not None]
+            collectors = [ref() for ref in self.collectors]
+        for collect in collectors:
+            if collect is not None:
+                samples.extend(collect())
+        return samples
+
+    def to_prometheus(self) -> str:
+        lines = []
+        with self.lock:
+            metrics = list(self.metrics.values())
+        for metric in metrics:
+            if metric.help:
+                lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        # Several collectors report the same names (one per queue, camera...); every sample of a
+        # metric has to follow its single TYPE line, so group them by name first
+        families: Dict[str, List[str]] = {}
+        for name, labels, value in self._collected():
+            families.setdefault(name, []).append(f"{name}{_format_labels(_labels_key(labels))} {value}")
+        for name, samples in families.items():
+            lines.append(f"# TYPE {name} {'counter' if name.endswith('_total') else 'gauge'}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        """Compact view for logs: counters/gauges by label set, histograms as count, mean and ~p95."""
+        result = {}
+        with self.lock:
+            metrics = list(self.metrics.values())
+        for metric in metrics:
+            values = {}
+            for key, child in list(metric.children.items()):
+                label = ",".join(f"{k}={v}" for k, v in key) or "_"
+                if isinstance(metric, Histogram):
+                    if child.count:
+                        values[label] = {
+                            "count": child.count,
+                            "mean": round(child.sum / child.count, 4),
+                            "p95": metric.quantile(0.95, **dict(key)),
+                        }
+                else:
+                    values[label] = round(child.value, 4)
+            if values:
+                result[metric.name] = values
+
+        for name, labels, value in self._collected():
+            label = ",".join(f"{k}={v}" for k, v in sorted(labels.items())) or "_"
+            result.setdefault(name, {})[label] = value
+        return result
+
+
+metrics = MetricsRegistry.shared()
+
+
+class MetricsServer:
+    """Serves `registry.to_prometheus()` at http://<host>:<port>/metrics."""
+
+    def __init__(self, port: int = 9100, host: str = "127.0.0.1", registry: Optional[MetricsRegistry] = None):
+        self.port = port
+        self.host = host
+        self.registry = registry or metrics
+        self.server: Optional[ThreadingHTTPServer] = None
+
+    def start(self):
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.to_prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name="MetricsServer", daemon=True).start()
+        print(f"[Metrics] Prometheus endpoint at http://{self.host}:{self.port}/metrics")
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+class MetricsLogger:
+    """Prints `registry.snapshot()` as one JSON line every `interval` seconds."""
+
+    def __init__(self, interval: float = 60, registry: Optional[MetricsRegistry] = None):
+        self.interval = interval
+        self.registry = registry or metrics
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="MetricsLogger", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            self.log()
+
+    def log(self):
+        print(json.dumps({"metrics": self.registry.snapshot(), "ts": round(time.time(), 3)}))
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
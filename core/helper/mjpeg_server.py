@@ -0,0 +1,114 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+import cv2
+import numpy as np
+
+BOUNDARY = "frame"
+
+
+class MJPEGServer:
+    """
+    Minimal MJPEG preview for headless runs, served at http://<host>:<port>/.
+
+    Frames are JPEG-encoded only while at least one client is connected, and at most `max_fps`
+    times per second; every client streams the same encoded frame.
+    """
+
+    def __init__(self, port: int = 8080, host: str = "127.0.0.1", max_fps: float = 5, quality: int = 70):
+        self.host = host
+        self.port = port
+        self.interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        self.quality = quality
+
+        self.condition = threading.Condition()
+        self.jpeg: Optional[bytes] = None
+        self.sequence = 0
+        self.clients = 0
+        self.last_encode = 0.0
+        self.frames_encoded = 0
+        self.running = False
+
+        self.server: Optional[ThreadingHTTPServer] = None
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path not in ("/", "/stream.mjpg"):
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+                self.end_headers()
+                server._stream(self.wfile)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.server.daemon_threads = True
+        self.running = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name="MJPEGServer", daemon=True)
+        self.thread.start()
+        print(f"[MJPEGServer] Preview at http://{self.host}:{self.port}/")
+
+    def wants_frame(self) -> bool:
+        """True when a client is connected and the next frame is due. Use it to skip rendering too."""
+        return self.clients > 0 and time.monotonic() - self.last_encode >= self.interval
+
+    def publish(self, frame: np.ndarray):
+        if not self.wants_frame():
+            return
+
+        self.last_encode = time.monotonic()
+        ok, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            return
+
+        with self.condition:
+            self.jpeg = buffer.tobytes()
+            self.sequence += 1
+            self.frames_encoded += 1
+            self.condition.notify_all()
+
+    def _stream(self, wfile):
+        with self.condition:
+            self.clients += 1
+            seen = self.sequence
+        try:
+            while self.running:
+                with self.condition:
+                    self.condition.wait_for(lambda: self.sequence != seen or not self.running, timeout=1.0)
+                    if self.sequence == seen:
+                        continue
+                    seen, jpeg = self.sequence, self.jpeg
+
+                wfile.write(
+                    f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n".encode()
+                )
+                wfile.write(jpeg)
+                wfile.write(b"\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            with self.condition:
+                self.clients -= 1
+
+    def stats(self) -> dict:
+        return {"clients": self.clients, "frames_encoded": self.frames_encoded}
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        print("[MJPEGServer] Stopped.")
@@ -0,0 +1,106 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+import config
+
+
+def _estimate_size(model: Any, path: Optional[str] = None) -> int:
+    """Bytes held by the model's weights, falling back to the weight file size."""
+    if isinstance(model, tuple):
+        model = model[0]
+    try:
+        module = getattr(model, "model", model)
+        return sum(p.numel() * p.element_size() for p in module.parameters())
+    except Exception:
+        pass
+    try:
+        return os.path.getsize(path) if path else 0
+    except OSError:
+        return 0
+
+
+class _Entry:
+    __slots__ = ("model", "size", "lock")
+
+    def __init__(self, model: Any, size: int):
+        self.model = model
+        self.size = size
+        self.lock = threading.Lock()  # ultralytics predictors are not safe to call concurrently
+
+
+class ModelCache:
+    """
+    Keyed, process-wide cache of loaded models with LRU eviction.
+    Bounded by number of models and, optionally, by the estimated bytes of their weights.
+    Evicted models stay alive for as long as a detector still holds them.
+    """
+
+    _shared: Optional["ModelCache"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_models: int = 4, max_bytes: Optional[int] = None):
+        self.max_models = max(1, max_models)
+        self.max_bytes = max_bytes or None
+        self.entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self.lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def shared(cls) -> "ModelCache":
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls(
+                    max_models=config.MODEL_CACHE_MAX_MODELS,
+                    max_bytes=int(config.MODEL_CACHE_MAX_MB * 1024 * 1024),
+                )
+            return cls._shared
+
+    def get(self, key: Hashable, loader: Callable[[], Any], path: Optional[str] = None) -> Any:
+        return self.entry(key, loader, path).model
+
+    def entry(self, key: Hashable, loader: Callable[[], Any], path: Optional[str] = None) -> _Entry:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+            # Loading under the lock keeps two callers from reading the same weights twice
+            self.misses += 1
+            print(f"[ModelCache] Loading {key}")
+            model = loader()
+            entry = _Entry(model, _estimate_size(model, path))
+            self.entries[key] = entry
+            self._evict()
+            return entry
+
+    def _evict(self):
+        while len(self.entries) > 1 and (
+                len(self.entries) > self.max_models
+                or (self.max_bytes and self.total_bytes() > self.max_bytes)
+        ):
+            key, _ = self.entries.popitem(last=False)
+            self.evictions += 1
+            print(f"[ModelCache] Evicted {key}")
+
+    def total_bytes(self) -> int:
+        return sum(entry.size for entry in self.entries.values())
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "models": list(self.entries.keys()),
+                "total_mb": round(self.total_bytes() / (1024 * 1024), 1),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
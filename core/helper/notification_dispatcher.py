@@ -0,0 +1,113 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Optional
+
+from core.helper.metrics import metrics
+
+
+class NotificationDispatcher:
+    """
+    One long-lived event loop on a background thread for all outgoing notifications.
+
+    Jobs are coroutine functions submitted from any thread. At most `max_pending` jobs may be
+    queued or running (further ones are rejected and counted) and at most `max_concurrency`
+    run at the same time, so a slow network can't pile up uploads or threads.
+    """
+
+    def __init__(self, max_pending: int = 32, max_concurrency: int = 2):
+        self.max_pending = max_pending
+        self.max_concurrency = max_concurrency
+
+        self.loop = asyncio.new_event_loop()
+        self.semaphore: Optional[asyncio.Semaphore] = None
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.submitted = 0
+        self.rejected = 0
+        self.failed = 0
+
+        metrics.add_collector(self._collect_metrics)
+
+        self.thread = threading.Thread(target=self._run_loop, name="NotificationDispatcher", daemon=True)
+        self.thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, job: Callable[..., Awaitable[Any]], *args, **kwargs) -> Optional[Future]:
+        """Schedule `job(*args, **kwargs)` on the loop. Returns None if the queue is full."""
+        return self._submit(None, job, args, kwargs)
+
+    def submit_after(self, previous: Future, job: Callable[..., Awaitable[Any]], *args, **kwargs) -> Optional[Future]:
+        """Like `submit`, but `job` starts once `previous` is done (without holding a concurrency slot meanwhile)."""
+        return self._submit(previous, job, args, kwargs)
+
+    def _submit(self, previous: Optional[Future], job, args, kwargs) -> Optional[Future]:
+        with self.lock:
+            if self.pending >= self.max_pending or self.loop.is_closed():
+                self.rejected += 1
+                print(f"[Dispatcher] Queue full, dropping {getattr(job, '__name__', job)}")
+                return None
+            self.pending += 1
+            self.submitted += 1
+
+        return asyncio.run_coroutine_threadsafe(self._run(previous, job, args, kwargs), self.loop)
+
+    def call(self, job: Callable[..., Awaitable[Any]], *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Run `job` on the loop and wait for its result."""
+        future = self.submit(job, *args, **kwargs)
+        return future.result(timeout=timeout) if future else None
+
+    async def _run(self, previous: Optional[Future], job, args, kwargs):
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        try:
+            if previous is not None:
+                await asyncio.wait([asyncio.wrap_future(previous)])
+            async with self.semaphore:
+                return await job(*args, **kwargs)
+        except Exception as e:
+            with self.lock:
+                self.failed += 1
+            print(f"[Dispatcher] {getattr(job, '__name__', job)} failed: {e}")
+            raise
+        finally:
+            with self.lock:
+                self.pending -= 1
+
+    def _collect_metrics(self):
+        # Everything but the number in flight only ever grows
+        return [
+            (f"notifications_{key}" if key == "pending" else f"notifications_{key}_total", {}, value)
+            for key, value in self.stats().items()
+        ]
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "pending": self.pending,
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "failed": self.failed,
+            }
+
+    def shutdown(self, close: Optional[Callable[[], Awaitable[Any]]] = None, timeout: float = 30):
+        """Wait (up to `timeout`) for queued jobs, run `close()` on the loop, then stop it."""
+        async def drain():
+            while self.pending:
+                await asyncio.sleep(0.05)
+            if close:
+                await close()
+
+        if self.loop.is_closed():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(drain(), self.loop).result(timeout=timeout)
+        except Exception as e:
+            print(f"[Dispatcher] Shutdown did not finish cleanly: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
+        if not self.thread.is_alive():
+            self.loop.close()
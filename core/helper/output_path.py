@@ -4,4 +4,10 @@ from datetime import datetime, timezone
 def get_output_path(path, extension):
     os.makedirs(f"output/{path}", exist_ok=True)
     timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
-    return os.path.join("output", path, f"{timestamp}.{extension}")
\ No newline at end of file
+    output = os.path.join("output", path, f"{timestamp}.{extension}")
+    # Offline runs can produce several files per second
+    index = 1
+    while os.path.exists(output):
+        output = os.path.join("output", path, f"{timestamp}_{index}.{extension}")
+        index += 1
+    return output
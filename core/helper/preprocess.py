@@ -0,0 +1,90 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+
+from core.helper.extensions import letterbox
+
+
+@dataclass
+class PreparedFrame:
+    """A frame letterboxed and converted to the model's input tensor, plus what's needed to map results back."""
+    tensor: "torch.Tensor"  # (1, 3, H, W) float32 RGB in [0, 1]
+    gain: float
+    pad: Tuple[int, int]  # (left, top)
+    orig_shape: Tuple[int, int]  # (height, width)
+
+
+def to_tensor(image: np.ndarray):
+    import torch
+
+    chw = np.ascontiguousarray(image[..., ::-1].transpose(2, 0, 1))  # BGR HWC -> RGB CHW
+    return torch.from_numpy(chw).unsqueeze(0).float().div_(255.0)
+
+
+class FramePreprocessor:
+    """
+    Letterbox + tensor conversion done once per frame and input size, shared by every detector.
+
+    Entries are keyed by the frame object itself (a reference is kept so the id can't be reused)
+    and by (imgsz, stride). Concurrent callers asking for the same entry wait for the first one
+    instead of computing it again, so it is safe to use from `DetectorPool` workers.
+    """
+
+    _shared: Optional["FramePreprocessor"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_frames: int = 8):
+        self.max_frames = max_frames
+        self.frames: "OrderedDict[int, tuple]" = OrderedDict()  # id(frame) -> (frame, {key: Future})
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def shared(cls) -> "FramePreprocessor":
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def prepare(self, frame: np.ndarray, imgsz: int = 640, stride: int = 32) -> PreparedFrame:
+        key = (imgsz, stride)
+        with self.lock:
+            cached = self.frames.get(id(frame))
+            if cached is None or cached[0] is not frame:
+                cached = (frame, {})
+                self.frames[id(frame)] = cached
+                while len(self.frames) > self.max_frames:
+                    self.frames.popitem(last=False)
+
+            future = cached[1].get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                cached[1][key] = future
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if owner:
+            try:
+                image, gain, pad = letterbox(frame, imgsz, stride=stride, auto=True)
+                future.set_result(PreparedFrame(to_tensor(image), gain, pad, frame.shape[:2]))
+            except Exception as e:
+                future.set_exception(e)
+        return future.result()
+
+    def discard(self, frame: np.ndarray):
+        """Drop everything cached for `frame` once all detectors are done with it."""
+        with self.lock:
+            cached = self.frames.get(id(frame))
+            if cached is not None and cached[0] is frame:
+                del self.frames[id(frame)]
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"frames": len(self.frames), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,116 @@
+import queue
+import threading
+import time
+from collections import deque
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+from core.helper.frame_queue import BoundedFrameQueue
+
+
+class PreRollBuffer:
+    """
+    Ring buffer of the last `seconds` of frames, kept JPEG-compressed so a few seconds of 720p
+    fit in a few MB. Bounded both by frame count (`seconds * fps`) and by `max_bytes`.
+
+    Frames are encoded on a worker thread (a 720p frame costs about 5 ms at quality 80), so the
+    caller only queues a reference and must not modify the frame afterwards. If the worker falls
+    more than `queue_size` frames behind, the oldest waiting frames are dropped.
+    """
+
+    def __init__(
+            self,
+            seconds: float,
+            fps: float,
+            max_bytes: Optional[int] = None,
+            quality: int = 80,
+            queue_size: int = 4,
+    ):
+        self.capacity = max(1, int(round(seconds * fps)))
+        self.max_bytes = max_bytes
+        self.quality = quality
+        self.frames = deque()
+        self.lock = threading.Lock()
+        self.bytes = 0
+        self.frames_pushed = 0
+        self.frames_repeated = 0
+        self.frames_evicted = 0
+
+        self.queue = BoundedFrameQueue(maxsize=queue_size, policy=BoundedFrameQueue.DROP_OLDEST)
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._worker, name="PreRollEncoder", daemon=True)
+        self.thread.start()
+
+    def push(self, frame: np.ndarray):
+        """Queue `frame` for encoding. It is read later, on the worker thread."""
+        self.queue.put(frame)
+
+    def repeat_last(self):
+        """Add the last frame again without encoding, for frames known to be unchanged."""
+        self.queue.put(None)
+
+    def _worker(self):
+        while not self.stop_event.is_set():
+            try:
+                frame = self.queue.get(timeout=1)
+            except queue.Empty:
+                continue
+
+            start = time.perf_counter()
+            encoded = False
+            try:
+                if frame is None:
+                    with self.lock:
+                        jpeg = self.frames[-1] if self.frames else None
+                    if jpeg is not None:
+                        self._append(jpeg, repeated=True)
+                else:
+                    encoded, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+                    if encoded:
+                        self._append(buffer.tobytes())
+            except Exception as e:
+                print(f"[PreRoll] Error: {e}")
+            finally:
+                del frame  # release the frame before waiting for the next one
+                self.queue.task_done(time.perf_counter() - start if encoded else None)
+
+    def _append(self, jpeg: bytes, repeated: bool = False):
+        with self.lock:
+            self.frames.append(jpeg)
+            self.bytes += len(jpeg)
+            self.frames_pushed += 1
+            self.frames_repeated += repeated
+            while len(self.frames) > self.capacity or (self.max_bytes and self.bytes > self.max_bytes):
+                self.bytes -= len(self.frames.popleft())
+                self.frames_evicted += 1
+
+    def drain(self) -> List[bytes]:
+        """Wait for the queued frames, then return the buffered JPEG frames, oldest first, and empty the buffer."""
+        self.queue.join()
+        with self.lock:
+            frames = list(self.frames)
+            self.frames.clear()
+            self.bytes = 0
+        return frames
+
+    def stats(self) -> dict:
+        encoder = self.queue.stats()
+        with self.lock:
+            return {
+                "frames": len(self.frames),
+                "capacity": self.capacity,
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "frames_pushed": self.frames_pushed,
+                "frames_repeated": self.frames_repeated,
+                "frames_evicted": self.frames_evicted,
+                "frames_dropped": encoder["dropped"],
+                "avg_encode_ms": encoder["avg_write_ms"],
+            }
+
+    def close(self):
+        """Stop the encoder thread; frames still queued are discarded."""
+        self.stop_event.set()
+        self.thread.join()
@@ -1,35 +1,130 @@
 import cv2
+import numpy as np
 import threading
 import queue
 import os
+import shutil
+import subprocess
+import time
+from typing import Optional
+
+import config
+from core.helper.frame_queue import BoundedFrameQueue
 from core.helper.output_path import get_output_path
 
+FFMPEG = "ffmpeg"
+OPENCV = "opencv"
+
+
+class FFmpegWriter:
+    """
+    `cv2.VideoWriter`-like writer that pipes raw BGR frames into ffmpeg, which encodes the final
+    H.264 clip in one pass (no mp4v intermediate, no re-encode before upload).
+    """
+
+    def __init__(self, path, fps, frame_size, crf: int = 28, preset: str = "veryfast", scale: Optional[str] = None):
+        width, height = frame_size
+        command = [
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{width}x{height}", "-r", str(fps),
+            "-i", "-",
+            "-c:v", "libx264", "-preset", preset, "-crf", str(crf), "-pix_fmt", "yuv420p",
+        ]
+        if scale:
+            command += ["-vf", f"scale={scale.replace('x', ':')}"]
+        command += ["-movflags", "+faststart", path]
+
+        self.frame_size = (width, height)
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL)
+
+    def isOpened(self) -> bool:
+        return self.process.poll() is None
+
+    def write(self, frame):
+        if (frame.shape[1], frame.shape[0]) != self.frame_size:
+            frame = cv2.resize(frame, self.frame_size)
+        self.process.stdin.write(np.ascontiguousarray(frame).data)
+
+    def release(self):
+        try:
+            self.process.stdin.close()
+        except BrokenPipeError:
+            pass
+        if self.process.wait() != 0:
+            print(f"[VideoRecorder] ffmpeg exited with code {self.process.returncode}")
+
 
 class VideoRecorder:
-    def __init__(self, frame_size, fps, output_dir="videos", enable=True):
+    def __init__(
+            self,
+            frame_size,
+            fps,
+            output_dir="videos",
+            enable=True,
+            backend: Optional[str] = None,
+            crf: Optional[int] = None,
+            preset: Optional[str] = None,
+            scale: Optional[str] = None,
+            queue_size: Optional[int] = None,
+            queue_policy: Optional[str] = None,
+    ):
         self.fourcc = cv2.VideoWriter_fourcc(*'mp4v')
         self.frame_size = frame_size
         self.fps = fps
         self.output_dir = output_dir
         self.enable = enable
 
+        # ffmpeg writes the final H.264 clip directly; OpenCV's mp4v is the fallback
+        self.backend = backend or config.RECORDER_BACKEND
+        self.crf = crf if crf is not None else config.RECORDER_CRF
+        self.preset = preset or config.RECORDER_PRESET
+        self.scale = scale if scale is not None else config.RECORDER_SCALE
+        if self.backend == FFMPEG and not shutil.which("ffmpeg"):
+            print("[VideoRecorder] ffmpeg not found in PATH. Falling back to OpenCV.")
+            self.backend = OPENCV
+
         self.writer = None
-        self.queue = queue.Queue()
+        # Bounded so a stalled disk or encoder can't grow memory without limit
+        self.queue = BoundedFrameQueue(
+            maxsize=queue_size or config.RECORDER_QUEUE_SIZE,
+            policy=queue_policy or config.RECORDER_QUEUE_POLICY,
+            name=f"recorder:{output_dir}",
+        )
         self.thread = None
         self.stop_event = threading.Event()
         self.path = None
 
+    def _open_writer(self, path):
+        if self.backend == FFMPEG:
+            try:
+                return FFmpegWriter(path, self.fps, self.frame_size, crf=self.crf, preset=self.preset,
+                                    scale=self.scale)
+            except OSError as e:
+                print(f"[VideoRecorder] Could not start ffmpeg ({e}). Falling back to OpenCV.")
+                self.backend = OPENCV
+        return cv2.VideoWriter(path, self.fourcc, self.fps, self.frame_size)
+
     def _write_frames(self):
         while not self.stop_event.is_set() or not self.queue.empty():
             try:
-                frame = self.queue.get(timeout=1)
-                if self.writer:
-                    self.writer.write(frame)
-                self.queue.task_done()
+                frame, repeat = self.queue.get(timeout=1)
             except queue.Empty:
                 continue
+
+            start = time.perf_counter()
+            written = False
+            try:
+                if isinstance(frame, bytes):
+                    # JPEG frames from the pre-roll buffer
+                    frame = cv2.imdecode(np.frombuffer(frame, dtype=np.uint8), cv2.IMREAD_COLOR)
+                if self.writer and frame is not None:
+                    for _ in range(repeat):
+                        self.writer.write(frame)
+                    written = True
             except Exception as e:
                 print(f"[VideoRecorder] Error writing frame: {e}")
+            finally:
+                self.queue.task_done(time.perf_counter() - start if written else None)
 
     def start(self):
         if not self.enable:
@@ -37,16 +132,23 @@ class VideoRecorder:
 
         if not self.writer:
             self.path = get_output_path(path=self.output_dir, extension="mp4")
-            self.writer = cv2.VideoWriter(self.path, self.fourcc, self.fps, self.frame_size)
+            self.writer = self._open_writer(self.path)
 
         self.stop_event.clear()
         self.thread = threading.Thread(target=self._write_frames, name="VideoRecorderWorker", daemon=True)
         self.thread.start()
-        print("[VideoRecorder] Recording started.")
+        print(f"[VideoRecorder] Recording started ({self.backend}).")
 
-    def write(self, frame):
+    def write(self, frame, repeat: int = 1):
+        """
+        Queue a BGR frame, or JPEG bytes which are decoded on the writer thread. `repeat` writes it
+        that many times, standing in for frames that were skipped, so the clip keeps its real speed.
+        """
         if self.enable and not self.stop_event.is_set():
-            self.queue.put(frame)
+            self.queue.put((frame, max(1, repeat)))
+
+    def stats(self) -> dict:
+        return self.queue.stats()
 
     def stop(self):
         if self.stop_event.is_set():
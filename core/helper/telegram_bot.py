@@ -3,43 +3,114 @@ from typing import Any, Optional, Dict, Union
 
 import aiohttp
 import asyncio
+import json
 from telegram import Bot
 from telegram.constants import ParseMode
 import os
+import time
 
 from core.helper.compress_video import CompressVideo
+from core.helper.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
+_REQUEST_SECONDS = metrics.histogram("telegram_request_seconds", "Bot API request latency, per attempt")
+_REQUESTS = metrics.counter("telegram_requests_total", "Bot API requests by final outcome")
+_RETRIES = metrics.counter("telegram_retries_total", "Bot API attempts that were retried")
+
 
 class TelegramBot:
-    def __init__(self, token: str, chat_id: str, parse_mode: ParseMode = ParseMode.MARKDOWN_V2):
+    def __init__(
+            self,
+            token: str,
+            chat_id: str,
+            parse_mode: ParseMode = ParseMode.MARKDOWN_V2,
+            api_base: str = "https://api.telegram.org",
+            max_retries: int = 4,
+            base_delay: float = 1.0,
+            max_delay: float = 30.0,
+            max_connections: int = 4,
+    ):
         self.chat_id = chat_id
         self.token = token
         self.bot = Bot(token=self.token)
         self.parse_mode = parse_mode
+        self.api_base = api_base.rstrip("/")
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_connections = max_connections
+        # One keep-alive session, created on (and bound to) the loop that first uses it
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    def _url(self, method: str) -> str:
+        return f"{self.api_base}/bot{self.token}/{method}"
+
+    def _session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60)
+            self.session = aiohttp.ClientSession(connector=connector)
+        return self.session
+
+    async def close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    def _retry_delay(self, attempt: int, result: Optional[Dict[str, Any]]) -> float:
+        retry_after = ((result or {}).get("parameters") or {}).get("retry_after")
+        if retry_after is not None:
+            return float(retry_after)
+        return min(self.max_delay, self.base_delay * 2 ** attempt)
 
     async def _post(self, url: str, data=None, files=None) -> Optional[Dict[str, Any]]:
-        try:
-            async with aiohttp.ClientSession() as session:
+        """
+        POST to the Bot API, retrying network errors, 429 (after `retry_after`) and 5xx with
+        exponential backoff. `files` maps field names to bytes, so every attempt can resend them.
+        """
+        result = None
+        method = url.rsplit("/", 1)[-1]
+        for attempt in range(self.max_retries + 1):
+            status = None
+            start = time.perf_counter()
+            try:
                 if files:
-                    data_form = aiohttp.FormData()
+                    payload = aiohttp.FormData()
                     for key, value in data.items():
-                        data_form.add_field(key, str(value))
-                    for name, file_obj in files.items():
-                        data_form.add_field(name, file_obj, filename=name)
-
-                    async with session.post(url, data=data_form, timeout=30) as response:
-                        return await response.json()
+                        if value is not None:
+                            payload.add_field(key, str(value))
+                    for name, (filename, content) in files.items():
+                        payload.add_field(name, content, filename=filename)
+                    timeout = aiohttp.ClientTimeout(total=60)
                 else:
-                    async with session.post(url, data=data, timeout=15) as response:
-                        return await response.json()
-        except Exception as e:
-            logger.error(f"HTTP request failed: {e}")
-            return None
+                    payload = {key: value for key, value in data.items() if value is not None}
+                    timeout = aiohttp.ClientTimeout(total=15)
+
+                async with self._session().post(url, data=payload, timeout=timeout) as response:
+                    status = response.status
+                    result = await response.json(content_type=None)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                logger.error(f"HTTP request failed: {e}")
+                result = None
+            _REQUEST_SECONDS.observe(time.perf_counter() - start, method=method)
+
+            if result is not None and result.get("ok"):
+                _REQUESTS.inc(method=method, outcome="ok")
+                return result
+            retryable = result is None or status == 429 or (status is not None and status >= 500)
+            if not retryable or attempt == self.max_retries:
+                break
+
+            delay = self._retry_delay(attempt, result)
+            _RETRIES.inc(method=method, status=str(status))
+            logger.warning(f"Retrying {method} in {delay:.1f}s (attempt {attempt + 1}, status {status})")
+            await asyncio.sleep(delay)
+
+        _REQUESTS.inc(method=method, outcome="failed")
+        return result
 
     async def send_message(self, text: str, **kwargs) -> Union[bool, int]:
-        url = f"https://api.telegram.org/bot{self.token}/sendMessage"
+        url = self._url("sendMessage")
         payload = {
             'chat_id': self.chat_id,
             'text': text,
@@ -53,8 +124,9 @@ class TelegramBot:
         logger.error(f"❌ Failed to send message: {result}")
         return False
 
-    async def send_photo(self, photo_path: str, caption: str = None, **kwargs) -> Union[bool, int]:
-        url = f"https://api.telegram.org/bot{self.token}/sendPhoto"
+    async def send_photo(self, photo: Union[str, bytes], caption: str = None, **kwargs) -> Union[bool, int]:
+        """Send a photo from a file path or from encoded JPEG bytes."""
+        url = self._url("sendPhoto")
         payload = {
             'chat_id': self.chat_id,
             'caption': caption,
@@ -63,17 +135,20 @@ class TelegramBot:
         }
 
         try:
-            with open(photo_path, 'rb') as f:
-                files = {'photo': f}
-                result = await self._post(url, data=payload, files=files)
-                if result and result.get("ok"):
-                    return result['result']['message_id']
+            if isinstance(photo, bytes):
+                files = {'photo': ("alert.jpg", photo)}
+            else:
+                with open(photo, 'rb') as f:
+                    files = {'photo': (os.path.basename(photo), f.read())}
+            result = await self._post(url, data=payload, files=files)
+            if result and result.get("ok"):
+                return result['result']['message_id']
         except Exception as e:
             logger.error(f"❌ Error sending photo: {e}")
         return False
 
     async def send_video(self, video_path: str, caption: str = None, **kwargs) -> Union[bool, int]:
-        url = f"https://api.telegram.org/bot{self.token}/sendVideo"
+        url = self._url("sendVideo")
         payload = {
             'chat_id': self.chat_id,
             'caption': caption,
@@ -86,19 +161,19 @@ class TelegramBot:
                 raise FileNotFoundError(f"Video not found: {video_path}")
 
             with open(video_path, 'rb') as f:
-                files = {'video': f}
-                result = await self._post(url, data=payload, files=files)
-                if result and result.get("ok"):
-                    return result['result']['message_id']
-                else:
-                    print(f"Sending video failed {result}")
-                    return False
+                files = {'video': (os.path.basename(video_path), f.read())}
+            result = await self._post(url, data=payload, files=files)
+            if result and result.get("ok"):
+                return result['result']['message_id']
+            else:
+                print(f"Sending video failed {result}")
+                return False
         except Exception as e:
             logger.error(f"❌ Error sending video: {e}")
         return False
 
     async def edit_message_text(self, message_id: int, text: str, **kwargs) -> bool:
-        url = f"https://api.telegram.org/bot{self.token}/editMessageText"
+        url = self._url("editMessageText")
         payload = {
             'chat_id': self.chat_id,
             'message_id': message_id,
@@ -109,8 +184,33 @@ class TelegramBot:
         result = await self._post(url, data=payload)
         return bool(result and result.get("ok"))
 
+    async def edit_message_video(self, message_id: int, video_path: str, caption: str = None) -> bool:
+        """Replace the media of `message_id` (e.g. the alert photo) with a video and a new caption."""
+        url = self._url("editMessageMedia")
+        media = {
+            'type': 'video',
+            'media': 'attach://video',
+            'caption': caption,
+            'parse_mode': self.parse_mode.value,
+            'supports_streaming': True,
+        }
+        payload = {
+            'chat_id': self.chat_id,
+            'message_id': message_id,
+            'media': json.dumps({key: value for key, value in media.items() if value is not None}),
+        }
+
+        try:
+            with open(video_path, 'rb') as f:
+                files = {'video': (os.path.basename(video_path), f.read())}
+            result = await self._post(url, data=payload, files=files)
+            return bool(result and result.get("ok"))
+        except Exception as e:
+            logger.error(f"❌ Error attaching video: {e}")
+        return False
+
     async def edit_caption(self, message_id: int, caption: str, **kwargs) -> bool:
-        url = f"https://api.telegram.org/bot{self.token}/editMessageCaption"
+        url = self._url("editMessageCaption")
         payload = {
             'chat_id': self.chat_id,
             'message_id': message_id,
@@ -129,18 +229,41 @@ class TelegramBot:
             logger.error(f"get_me failed: {e}")
             return None
 
-    def send_media_sync(self, caption: str, media: str, media_type: str = "photo"):
-        return asyncio.run(self.send_media(caption=caption, media=media, media_type=media_type))
+    def send_media_sync(self, caption: str, media: Union[str, bytes], media_type: str = "photo"):
+        """One-off blocking send on a temporary loop; long-running code should go through `NotificationDispatcher`."""
+        async def send_and_close():
+            try:
+                return await self.send_media(caption=caption, media=media, media_type=media_type)
+            finally:
+                await self.close()
 
-    async def send_media(self, caption: str, media: str, media_type: str = "photo"):
+        return asyncio.run(send_and_close())
+
+    async def send_media(self, caption: str, media: Union[str, bytes], media_type: str = "photo"):
         if media_type == "photo":
-            return await self.send_photo(photo_path=media, caption=caption)
+            return await self.send_photo(photo=media, caption=caption)
         elif media_type == "video":
             compressed_media = await CompressVideo.compress_video(input_path=media)
             return await self.send_video(video_path=compressed_media, caption=caption)
         else:
             raise ValueError(f"Unsupported media_type: {media_type}")
 
+    async def attach_video(self, message_id: int, video: str, caption: str) -> Union[bool, int]:
+        """
+        Attach the clip of an event to its alert message: replace the photo with the video, or if
+        Telegram refuses, reply to the photo with the video and update the photo's caption.
+        """
+        video = await CompressVideo.compress_video(input_path=video)
+        if await self.edit_message_video(message_id, video, caption=caption):
+            return message_id
+
+        reply_id = await self.send_video(
+            video_path=video, reply_parameters=json.dumps({"message_id": message_id}),
+        )
+        if reply_id:
+            await self.edit_caption(message_id, caption)
+        return reply_id
+
 
 
 def escape_markdown_v2(text: str) -> str:
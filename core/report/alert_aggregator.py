@@ -0,0 +1,167 @@
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from core.helper.detections import Detections
+from core.helper.message import Message
+from core.report.report import Report
+
+
+@dataclass
+class _Pending:
+    detections: Detections
+    since: float
+    suppressed: Dict[str, int] = field(default_factory=dict)
+    media: Union[str, bytes, None] = None
+    media_type: str = "photo"
+
+
+class AlertAggregator:
+    """
+    Sits between `DetectionEngine` and `Report` and turns bursts of alerts into summaries.
+
+    The first alert for a (camera, class) goes out immediately. After that the pair is throttled
+    for `min_interval` seconds: further alerts of that camera are merged for at least `window`
+    seconds and sent as one message (latest clip or photo, merged detections and how many alerts
+    were suppressed per class) once one of their classes is due again. With `min_interval=0`
+    every alert is passed straight through.
+    """
+
+    def __init__(
+            self,
+            report: Report,
+            window: float = 10.0,
+            min_interval: float = 60.0,
+            max_rows: int = 256,
+            clock: Callable[[], float] = time.monotonic,
+            wall_clock: Callable[[], datetime] = datetime.now,
+    ):
+        self.report = report
+        self.window = window
+        self.min_interval = min_interval
+        self.max_rows = max_rows
+        self.clock = clock
+        # Time printed in the messages; offline runs pass the media time
+        self.wall_clock = wall_clock
+
+        self.lock = threading.Lock()
+        self.last_sent: Dict[Tuple[str, str], float] = {}
+        self.pending: Dict[str, _Pending] = {}
+        self.alerts_sent = 0
+        self.alerts_suppressed = 0
+
+    def submit(
+            self,
+            detections: Detections,
+            media: Union[str, bytes],
+            media_type: str = "photo",
+            camera: Optional[str] = None,
+            reply_to: Optional[Future] = None,
+    ) -> Optional[Future]:
+        """
+        Send or hold back one alert (`media` is a file path or JPEG bytes). `reply_to` is the
+        pending photo alert of the same event: the clip always goes through and is attached
+        to that message. Returns the notification future if the alert was sent now.
+        """
+        camera = camera or ""
+        if reply_to is not None:
+            caption = Message.generate_message(
+                detections, location=camera or None, video_attached=True, timestamp=self.wall_clock(),
+            )
+            with self.lock:
+                self.alerts_sent += 1
+            return self.report.attach_video(reply_to, media, caption)
+
+        classes = set(detections.class_name.tolist())
+        with self.lock:
+            now = self.clock()
+            due = any(self._is_due(camera, cls, now) for cls in classes)
+            if due and camera not in self.pending:
+                self._mark_sent(camera, classes, now)
+                send = True
+            else:
+                self._hold(camera, detections, media, media_type, classes, now)
+                send = False
+
+        return self._send(camera, detections, media, media_type) if send else None
+
+    def poll(self):
+        """Flush summaries whose window is over and that have a class due again. Call regularly."""
+        ready = []
+        with self.lock:
+            now = self.clock()
+            for camera, pending in list(self.pending.items()):
+                if now - pending.since < self.window:
+                    continue
+                classes = set(pending.detections.class_name.tolist())
+                if any(self._is_due(camera, cls, now) for cls in classes):
+                    del self.pending[camera]
+                    self._mark_sent(camera, classes, now)
+                    ready.append((camera, pending))
+
+        self._send_pending(ready)
+
+    def flush(self):
+        """Send every held back summary now, whether due or not, e.g. before shutting down."""
+        with self.lock:
+            now = self.clock()
+            ready = list(self.pending.items())
+            self.pending.clear()
+            for camera, pending in ready:
+                self._mark_sent(camera, set(pending.detections.class_name.tolist()), now)
+        self._send_pending(ready)
+
+    def _send_pending(self, ready):
+        for camera, pending in ready:
+            if pending.media:
+                self._send(camera, pending.detections, pending.media, pending.media_type, pending.suppressed)
+
+    def _is_due(self, camera: str, cls: str, now: float) -> bool:
+        last = self.last_sent.get((camera, cls))
+        return last is None or now - last >= self.min_interval
+
+    def _mark_sent(self, camera: str, classes, now: float):
+        for cls in classes:
+            self.last_sent[(camera, cls)] = now
+
+    def _hold(self, camera: str, detections: Detections, media: Union[str, bytes], media_type: str, classes, now: float):
+        pending = self.pending.get(camera)
+        if pending is None:
+            pending = self.pending[camera] = _Pending(Detections.empty(), since=now)
+
+        merged = Detections.merge([pending.detections, detections])
+        if len(merged) > self.max_rows:
+            merged = merged[np.argsort(-merged.confidence)[:self.max_rows]]
+        pending.detections = merged
+
+        for cls in classes:
+            pending.suppressed[cls] = pending.suppressed.get(cls, 0) + 1
+        # Prefer the latest clip over photos for the summary
+        if media_type == "video" or pending.media_type != "video":
+            pending.media, pending.media_type = media, media_type
+        self.alerts_suppressed += 1
+
+    def _send(self, camera: str, detections: Detections, media: Union[str, bytes], media_type: str,
+              suppressed: Optional[Dict[str, int]] = None) -> Optional[Future]:
+        caption = Message.generate_message(
+            detections, location=camera or None, suppressed=suppressed, video_attached=media_type == "video",
+            timestamp=self.wall_clock(),
+        )
+        with self.lock:
+            self.alerts_sent += 1
+        if media_type == "video":
+            return self.report.send_video_async(video=media, message=caption)
+        return self.report.send_notif(message=caption, image=media)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "sent": self.alerts_sent,
+                "suppressed": self.alerts_suppressed,
+                "pending": {camera or "default": sum(p.suppressed.values()) for camera, p in self.pending.items()},
+            }
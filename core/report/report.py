@@ -1,8 +1,10 @@
-import threading
+from concurrent.futures import Future
+from typing import Optional, Union
 
 from telegram.constants import ParseMode
 
 import config
+from core.helper.notification_dispatcher import NotificationDispatcher
 from core.helper.telegram_bot import TelegramBot
 
 
@@ -12,36 +14,58 @@ def _init_telegram_bot():
     return TelegramBot(
         token=config.TELEGRAM_BOT_TOKEN,
         chat_id=config.TELEGRAM_CHAT_ID,
-        parse_mode=ParseMode.HTML
+        parse_mode=ParseMode.HTML,
+        api_base=config.TELEGRAM_API_BASE,
+        max_retries=config.NOTIFY_MAX_RETRIES,
+        max_connections=config.NOTIFY_MAX_CONCURRENCY,
     )
 
 
 class Report:
-    def __init__(self):
-        self.bot = _init_telegram_bot()
+    def __init__(self, bot: Optional[TelegramBot] = None, dispatcher: Optional[NotificationDispatcher] = None):
+        self.bot = bot or _init_telegram_bot()
+        # Every upload runs on the dispatcher's loop and session; callers never block on the network
+        self.dispatcher = dispatcher or NotificationDispatcher(
+            max_pending=config.NOTIFY_QUEUE_SIZE,
+            max_concurrency=config.NOTIFY_MAX_CONCURRENCY,
+        )
 
-    def send_notif(self, message: str, image: str):
+    def send_notif(self, message: str, image: Union[str, bytes]) -> Optional[Future]:
+        """Send a photo (path or JPEG bytes). The future resolves to the message id, or False."""
+        print(f"[Report] Sending notification with image: {image if isinstance(image, str) else 'in memory'}")
+        return self.dispatcher.submit(self.bot.send_media, caption=message, media=image)
+
+    def attach_video(self, photo: Future, video: str, message: str) -> Optional[Future]:
+        """Once the `photo` notification is sent, attach `video` to that message with a new caption."""
+        print(f"[Report] Attaching video to alert: {video}")
+        return self.dispatcher.submit_after(photo, self._attach_video, photo, video, message)
+
+    async def _attach_video(self, photo: Future, video: str, message: str):
         try:
-            print(f"[Report] Sending notification with image: {image}")
-            return self.bot.send_media_sync(caption=message, media=image)
-        except Exception as e:
-            print(f"[Report] Error sending image notification: {e}")
-            return None
+            message_id = photo.result()
+        except Exception:
+            message_id = None
+        if not message_id:
+            # The photo never made it, send the clip on its own
+            return await self.bot.send_media(caption=message, media=video, media_type="video")
+        return await self.bot.attach_video(message_id, video, caption=message)
 
     def send_video(self, video: str, message: str):
+        """Blocking variant of `send_video_async`, returns the message id or False."""
+        future = self.send_video_async(video, message)
         try:
-            print(f"[Report] Sending notification with video: {video}")
-            return self.bot.send_media_sync(caption=message, media=video, media_type="video")
+            return future.result() if future else None
         except Exception as e:
             print(f"[Report] Error sending video notification: {e}")
             return None
 
-    def send_video_async(self, video: str, message: str):
+    def send_video_async(self, video: str, message: str) -> Optional[Future]:
+        print(f"[Report] Sending notification with video: {video}")
+        return self.dispatcher.submit(self.bot.send_media, caption=message, media=video, media_type="video")
 
-        def wrapper():
-            try:
-                self.send_video(video, message)
-            except Exception as e:
-                print(f"[Report] send_video_async failed: {e}")
+    def stats(self) -> dict:
+        return self.dispatcher.stats()
 
-        threading.Thread(target=wrapper, daemon=True).start()
+    def close(self, timeout: float = 30):
+        """Flush queued notifications and close the HTTP session."""
+        self.dispatcher.shutdown(close=self.bot.close, timeout=timeout)
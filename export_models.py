@@ -0,0 +1,34 @@
+import argparse
+import json
+import sys
+
+import config
+from core.helper.backends import BACKENDS, ONNX, ONNX_INT8, TORCH, export_onnx, find_models, parity_check, quantize_int8, sample_frames
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the models to ONNX (optionally int8) and check them against PyTorch.")
+    parser.add_argument("--backend", choices=[b for b in BACKENDS if b != TORCH], default=ONNX)
+    parser.add_argument("--models", nargs="*", help="Weight files to export. Defaults to every .pt under model/")
+    parser.add_argument(
+        "--calibration",
+        default=config.ONNX_CALIBRATION_SOURCE,
+        help="Folder of images or a video used for int8 calibration and the parity check",
+    )
+    parser.add_argument("--skip-parity", action="store_true", help="Only export, don't compare against PyTorch")
+    args = parser.parse_args()
+
+    failed = False
+    for model_path in args.models or find_models():
+        if args.backend == ONNX_INT8:
+            if not args.calibration:
+                parser.error("--calibration (or ONNX_CALIBRATION_SOURCE) is required for onnx-int8")
+            quantize_int8(model_path, args.calibration)
+        else:
+            export_onnx(model_path)
+
+        if not args.skip_parity:
+            report = parity_check(model_path, args.backend, sample_frames(args.calibration or None))
+            print(json.dumps(report))
+            failed |= not report["ok"]
+
+    sys.exit(1 if failed else 0)
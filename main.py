@@ -1,21 +1,104 @@
 import argparse
-import cv2
+import os
 
-from run_detection import run_detection
+from core.helper.frame_source import FrameSource
+from run_detection import run_detection, run_multi_detection, run_offline
+from usecase.registry import registry
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run object detection on a video file.")
-    parser.add_argument("--video", required=True, help="Path to the video file")
+    parser.add_argument(
+        "--video",
+        required=True,
+        nargs="+",
+        help="Path to the video file. Pass several sources (files, device IDs, RTSP URLs) to run them together",
+    )
     parser.add_argument(
         "--usecase",
         required=True,
-        choices=["palm_security", "ppe", "road_damage"],
+        choices=registry.names(),
         help="Choose usecase: palm_security, ppe, or road_damage",
     )
+    parser.add_argument(
+        "--frame-mode",
+        choices=[FrameSource.LATEST, FrameSource.LOSSLESS],
+        default=None,
+        help="latest: always process the newest frame (cameras/RTSP), lossless: process every frame (files). "
+             "Defaults to lossless for files and latest otherwise",
+    )
+    parser.add_argument(
+        "--target-fps",
+        type=float,
+        default=None,
+        help="Run the models only every N frames, tuned to keep up with this fps; boxes are tracked in between",
+    )
+    parser.add_argument(
+        "--latency-budget-ms",
+        type=float,
+        default=None,
+        help="Per-frame inference budget; model input sizes step down while it is exceeded (default LATENCY_BUDGET_MS)",
+    )
+    parser.add_argument(
+        "--latency-target-fps",
+        type=float,
+        default=None,
+        help="Like --latency-budget-ms, given as the fps inference must keep up with (default LATENCY_TARGET_FPS)",
+    )
+    parser.add_argument(
+        "--max-batch-size",
+        type=int,
+        default=8,
+        help="With several sources, the maximum number of frames per model call",
+    )
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="No window and no drawing (servers); stop with SIGINT/SIGTERM",
+    )
+    parser.add_argument(
+        "--preview-port",
+        type=int,
+        default=None,
+        help="In headless mode, serve an MJPEG preview on localhost at this port",
+    )
+    parser.add_argument(
+        "--preview-fps",
+        type=float,
+        default=5,
+        help="Maximum fps of the MJPEG preview",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Process a video file as fast as possible: batched inference, no display, alerts on media time",
+    )
+    parser.add_argument("--batch-size", type=int, default=8, help="Frames per model call in offline mode")
+    parser.add_argument("--jsonl", default=None, help="In offline mode, write per-frame detections to this file")
+    parser.add_argument(
+        "--annotated-output",
+        action="store_true",
+        help="In offline mode, also write an annotated copy of the video (to output/offline/)",
+    )
     args = parser.parse_args()
-    if args.video == "0":
-        args.video = 0
-        
-    cap = cv2.VideoCapture(args.video)
+    sources = [int(video) if video.isdigit() else video for video in args.video]
 
-    run_detection(cap, args.usecase)
+    if args.offline:
+        for index, source in enumerate(sources):
+            jsonl = args.jsonl
+            if jsonl and len(sources) > 1:
+                jsonl = f"{os.path.splitext(jsonl)[0]}_{index}.jsonl"
+            run_offline(source, args.usecase, batch_size=args.batch_size, jsonl_path=jsonl,
+                        annotated=args.annotated_output)
+    elif len(sources) > 1:
+        run_multi_detection(
+            sources, args.usecase, target_fps=args.target_fps, max_batch_size=args.max_batch_size,
+            headless=args.headless, latency_budget_ms=args.latency_budget_ms,
+            latency_target_fps=args.latency_target_fps,
+        )
+    else:
+        cap = FrameSource(sources[0], mode=args.frame_mode)
+        run_detection(
+            cap, args.usecase, target_fps=args.target_fps, headless=args.headless,
+            preview_port=args.preview_port, preview_fps=args.preview_fps, source=sources[0],
+            latency_budget_ms=args.latency_budget_ms, latency_target_fps=args.latency_target_fps,
+        )
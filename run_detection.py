@@ -1,15 +1,130 @@
 from core.engine.detection_engine import DetectionEngine
+from core.engine.latency_controller import LatencyController
+from core.engine.motion_gate import MotionGate
+from core.engine.multi_stream import MultiStreamRunner, StreamContext
+from core.engine.offline_runner import MediaClock, OfflineRunner
+from core.engine.roi import RegionOfInterest, load_rois, roi_for
 from core.helper.capture import ImageCapture
+from core.helper.extensions import safe_source
+from core.helper.frame_source import FrameSource
+from core.helper.metrics import MetricsLogger, MetricsServer
+from core.helper.mjpeg_server import MJPEGServer
+from core.helper.preroll import PreRollBuffer
 from core.helper.recorder import VideoRecorder
+from core.report.alert_aggregator import AlertAggregator
 from core.report.report import Report
-from usecase.fire_detector import FireDetector
-from usecase.general_detector import GeneralDetector
-from usecase.ppe_detector import PPEDetector
-from usecase.road_dmg_detector import RoadDmgDetector
+from usecase.registry import registry
+from datetime import datetime
+from typing import Callable, List, Optional, Union
+import config
 import cv2
+import signal
+import threading
 
 
-def run_detection(cap: cv2.VideoCapture, use_case: str = "palm_security"):
+def _handle_stop_signals(stop: threading.Event) -> Callable[[], None]:
+    """Set `stop` on SIGINT/SIGTERM. Returns a function restoring the previous handlers."""
+    # Signal handlers can only be installed from the main thread (not e.g. inside Streamlit)
+    if threading.current_thread() is not threading.main_thread():
+        return lambda: None
+
+    def on_signal(signum, _frame):
+        print(f"[Detection] Received {signal.Signals(signum).name}, shutting down...")
+        stop.set()
+
+    previous = {sig: signal.signal(sig, on_signal) for sig in (signal.SIGINT, signal.SIGTERM)}
+    return lambda: [signal.signal(sig, handler) for sig, handler in previous.items()]
+
+
+def _start_metrics() -> Callable[[], None]:
+    """Start the configured metrics endpoint/log. Returns a function stopping them."""
+    server = MetricsServer(config.METRICS_PORT) if config.METRICS_PORT else None
+    logger = MetricsLogger(config.METRICS_LOG_INTERVAL) if config.METRICS_LOG_INTERVAL > 0 else None
+    for service in (server, logger):
+        if service:
+            service.start()
+
+    def stop():
+        for service in (server, logger):
+            if service:
+                service.stop()
+        if logger:
+            logger.log()
+
+    return stop
+
+
+def _make_preroll(fps: float) -> Optional[PreRollBuffer]:
+    if config.PREROLL_SECONDS <= 0:
+        return None
+    max_bytes = int(config.PREROLL_MAX_MB * 1024 * 1024) or None
+    return PreRollBuffer(config.PREROLL_SECONDS, fps, max_bytes=max_bytes, quality=config.PREROLL_JPEG_QUALITY)
+
+
+def _make_motion_gate(use_case: str, label: str = "default") -> Optional[MotionGate]:
+    if not config.MOTION_GATE or not registry.is_motion_gated(use_case):
+        return None
+    return MotionGate(config.MOTION_THRESHOLD, keepalive=config.MOTION_KEEPALIVE_FRAMES, label=label)
+
+
+def _make_roi(source, frame_size) -> Optional[RegionOfInterest]:
+    if source is None or not config.ROI_CONFIG:
+        return None
+    roi = roi_for(load_rois(config.ROI_CONFIG), source, frame_size)
+    if roi:
+        print(f"[ROI] {safe_source(source)}: inference on {roi.box}, {roi.pixel_ratio:.0%} of the frame")
+    return roi
+
+
+def _make_latency_controller(
+        detectors,
+        budget_ms: Optional[float],
+        target_fps: Optional[float] = None,
+        label: str = "default",
+) -> Optional[LatencyController]:
+    budget_ms = config.LATENCY_BUDGET_MS if budget_ms is None else budget_ms
+    target_fps = config.LATENCY_TARGET_FPS if target_fps is None else target_fps
+    budget = budget_ms / 1000 if budget_ms and budget_ms > 0 else None
+    target_fps = target_fps if target_fps and target_fps > 0 else None
+    if budget is None and target_fps is None:
+        return None
+    return LatencyController(
+        detectors, budget, target_fps=target_fps, sizes=config.LATENCY_IMGSZ_STEPS,
+        max_dets=config.LATENCY_MAX_DET_STEPS, label=label,
+    )
+
+
+def _make_alerts(
+        report: Report,
+        clock: Optional[Callable[[], float]] = None,
+        wall_clock: Optional[Callable[[], datetime]] = None,
+) -> AlertAggregator:
+    kwargs = {"clock": clock} if clock else {}
+    if wall_clock:
+        kwargs["wall_clock"] = wall_clock
+    return AlertAggregator(
+        report, window=config.ALERT_WINDOW_SECONDS, min_interval=config.ALERT_MIN_INTERVAL_SECONDS, **kwargs
+    )
+
+
+def run_detection(
+        cap: Union[FrameSource, cv2.VideoCapture],
+        use_case: str = "palm_security",
+        target_fps: Optional[float] = None,
+        headless: bool = False,
+        preview_port: Optional[int] = None,
+        preview_fps: float = 5,
+        source: Optional[Union[int, str]] = None,
+        latency_budget_ms: Optional[float] = None,
+        latency_target_fps: Optional[float] = None,
+):
+    """
+    Run `use_case` on `cap`. With `headless` nothing is displayed or drawn and SIGINT/SIGTERM stop
+    the loop cleanly; `preview_port` additionally serves an MJPEG preview on localhost. `source`
+    names the input in ROI_CONFIG. `latency_budget_ms` (default LATENCY_BUDGET_MS) lowers the model
+    input sizes while inference takes longer than that per frame; `latency_target_fps` (default
+    LATENCY_TARGET_FPS) does the same for a budget of 1000 / fps ms.
+    """
     if not cap.isOpened():
         print(f"❌ Error: Cannot open video ")
         return
@@ -22,16 +137,7 @@ def run_detection(cap: cv2.VideoCapture, use_case: str = "palm_security"):
     capture = ImageCapture()
     report = Report()
 
-    use_case_map = {
-        "palm_security": [GeneralDetector(), FireDetector()],
-        "ppe": [PPEDetector()],
-        "road_damage": [RoadDmgDetector()],
-    }
-
-    detectors = use_case_map.get(use_case)
-
-    if detectors is None:
-        raise ValueError(f"Unknown usecase: {use_case}")
+    detectors = registry.create(use_case, warm_up=True)
 
     engine = DetectionEngine(
         detectors=detectors,
@@ -41,21 +147,218 @@ def run_detection(cap: cv2.VideoCapture, use_case: str = "palm_security"):
         frame_size=(frame_width, frame_height),
         start_threshold=30,
         show_timestamp=False,
+        parallel=True,
+        target_fps=target_fps,
+        annotate=not headless,
+        preroll=_make_preroll(fps),
+        alerts=_make_alerts(report),
+        motion_gate=_make_motion_gate(use_case),
+        roi=_make_roi(source, (frame_width, frame_height)),
+        latency_controller=_make_latency_controller(detectors, latency_budget_ms, latency_target_fps),
     )
 
-    # Main loop
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
+    preview = MJPEGServer(preview_port, max_fps=preview_fps) if headless and preview_port else None
+    stop = threading.Event()
+    restore_signals = _handle_stop_signals(stop) if headless else lambda: None
+    stop_metrics = _start_metrics()
+
+    try:
+        if preview:
+            preview.start()
+
+        # Main loop
+        while cap.isOpened() and not stop.is_set():
+            ret, frame = cap.read()
+            if not ret:
+                break
+
+            if headless:
+                # Only draw when a preview client is going to receive this frame
+                engine.annotate = preview is not None and preview.wants_frame()
+                processed_frame = engine.process_frame(frame)
+                if engine.annotate:
+                    preview.publish(processed_frame)
+                continue
 
-        processed_frame = engine.process_frame(frame)
-        cv2.imshow("Detection", processed_frame)
+            processed_frame = engine.process_frame(frame)
+            cv2.imshow("Detection", processed_frame)
 
-        if cv2.waitKey(1) & 0xFF == ord("q"):
-            break
+            if cv2.waitKey(1) & 0xFF == ord("q"):
+                break
+    finally:
+        restore_signals()
+        stop_metrics()
+        if engine.preroll:
+            print(f"[PreRoll] {engine.preroll.stats()}")
+        if engine.motion_gate:
+            print(f"[MotionGate] {engine.motion_gate.stats()}")
+        if engine.roi:
+            print(f"[ROI] {engine.roi.stats()}")
+        if engine.latency_controller:
+            print(f"[LatencyController] {engine.latency_controller.stats()}")
+        print(f"[Frames] {engine.copy_stats()}")
+        print(f"[VideoRecorder] queue {recorder.stats()}")
+        print(f"[ImageCapture] queue {capture.stats()}")
+        print(f"[Alerts] {engine.alerts.stats()}")
+        if preview:
+            preview.stop()
+        cap.release()
+        engine.shutdown()
+        recorder.release()
+        capture.shutdown()
+        engine.alerts.flush()
+        report.close()
+        if not headless:
+            cv2.destroyAllWindows()
 
-    cap.release()
-    recorder.release()
-    capture.shutdown()
-    cv2.destroyAllWindows()
\ No newline at end of file
+
+def run_multi_detection(
+        sources: List[Union[int, str]],
+        use_case: str = "palm_security",
+        target_fps: Optional[float] = None,
+        max_batch_size: int = 8,
+        headless: bool = False,
+        latency_budget_ms: Optional[float] = None,
+        latency_target_fps: Optional[float] = None,
+):
+    """
+    Run one use case over several cameras, sharing each model and batching frames across streams.
+    `latency_budget_ms` and `latency_target_fps` apply to each round, in which every camera gets one
+    frame. The controller is per round, not per stream: the streams share the models and so their
+    input sizes, and a camera that makes rounds slow lowers the sizes for every camera.
+    """
+    frame_width, frame_height = (1280, 720)
+    report = Report()
+    alerts = _make_alerts(report)  # shared, throttled per camera
+    detectors = registry.create(use_case, warm_up=True)
+
+    streams = []
+    for index, source in enumerate(sources):
+        cap = FrameSource(source)
+        if not cap.isOpened():
+            print(f"❌ Error: Cannot open video {safe_source(source)}")
+            cap.release()
+            continue
+
+        name = f"cam{index}"
+        location = f"{name} ({safe_source(source)})"
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30
+        recorder = VideoRecorder((frame_width, frame_height), fps, output_dir=f"videos/{name}")
+        capture = ImageCapture(output_dir=f"images/{name}")
+        engine = DetectionEngine(
+            detectors=detectors,
+            recorder=recorder,
+            capture=capture,
+            report=report,
+            frame_size=(frame_width, frame_height),
+            start_threshold=30,
+            show_timestamp=False,
+            target_fps=target_fps,
+            location=location,
+            name=name,
+            annotate=not headless,
+            preroll=_make_preroll(fps),
+            alerts=alerts,
+            motion_gate=_make_motion_gate(use_case, label=name),
+            roi=_make_roi(source, (frame_width, frame_height)),
+        )
+        streams.append(StreamContext(name=name, source=cap, engine=engine, recorder=recorder, capture=capture))
+
+    if not streams:
+        return
+
+    runner = MultiStreamRunner(
+        detectors, streams, max_batch_size=max_batch_size,
+        latency_controller=_make_latency_controller(
+            detectors, latency_budget_ms, latency_target_fps, label="multi_stream"
+        ),
+    )
+
+    stop = threading.Event()
+    restore_signals = _handle_stop_signals(stop) if headless else lambda: None
+    stop_metrics = _start_metrics()
+
+    def show(ctx: StreamContext, frame):
+        if headless:
+            return not stop.is_set()
+        cv2.imshow(f"Detection - {ctx.name}", frame)
+        return not (cv2.waitKey(1) & 0xFF == ord("q"))
+
+    try:
+        runner.run(on_frame=show)
+    finally:
+        restore_signals()
+        stop_metrics()
+        print(f"[MultiStream] {runner.stats()}")
+        if runner.latency_controller:
+            print(f"[LatencyController] {runner.latency_controller.stats()}")
+        runner.shutdown()
+        print(f"[Alerts] {alerts.stats()}")
+        alerts.flush()
+        report.close()
+        if not headless:
+            cv2.destroyAllWindows()
+
+
+def run_offline(
+        path: str,
+        use_case: str = "palm_security",
+        batch_size: int = 8,
+        jsonl_path: Optional[str] = None,
+        annotated: bool = False,
+):
+    """Process a video file faster than realtime: batched inference, JSONL output, alerts on media time."""
+    source = FrameSource(path, mode=FrameSource.LOSSLESS, buffer_size=batch_size * 4)
+    if not source.isOpened():
+        print(f"❌ Error: Cannot open video {path}")
+        source.release()
+        return
+
+    frame_width, frame_height = (1280, 720)
+    fps = source.get(cv2.CAP_PROP_FPS) or 30
+    clock = MediaClock(fps)
+
+    recorder = VideoRecorder((frame_width, frame_height), fps, queue_policy="block")
+    capture = ImageCapture(queue_policy="block")
+    report = Report()
+    detectors = registry.create(use_case, warm_up=True)
+
+    engine = DetectionEngine(
+        detectors=detectors,
+        recorder=recorder,
+        capture=capture,
+        report=report,
+        frame_size=(frame_width, frame_height),
+        start_threshold=30,
+        show_timestamp=annotated,
+        target_fps=None,
+        location=path,
+        name="offline",
+        annotate=annotated,
+        preroll=_make_preroll(fps),
+        max_record_stride=1,  # nothing is live, so never thin out the clips
+        alerts=_make_alerts(report, clock=lambda: clock.seconds, wall_clock=clock.now),
+        clock=clock.now,
+        roi=_make_roi(path, (frame_width, frame_height)),
+        sync_output=not annotated,  # annotated frames are queued for their own writer
+    )
+    annotated_output = VideoRecorder(
+        (frame_width, frame_height), fps, output_dir="offline", queue_policy="block"
+    ) if annotated else None
+
+    runner = OfflineRunner(
+        source, detectors, engine, clock,
+        batch_size=batch_size, jsonl_path=jsonl_path, annotated=annotated_output,
+    )
+    stop_metrics = _start_metrics()
+    try:
+        runner.run()
+    finally:
+        stop_metrics()
+        print(f"[Offline] {runner.stats()}")
+        source.release()
+        engine.shutdown()
+        recorder.release()
+        capture.shutdown()
+        engine.alerts.flush()
+        report.close()
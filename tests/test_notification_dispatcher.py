@@ -0,0 +1,142 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import pytest
+from telegram.constants import ParseMode
+
+from core.helper.notification_dispatcher import NotificationDispatcher
+from core.helper.telegram_bot import TelegramBot
+
+
+class StubBotApi:
+    """
+    Local stand-in for the Bot API. Records every request as events ("start:<text>", "end:<text>"),
+    answers with the queued `failures` for a text first (status, body), and sleeps `delays[text]`.
+    """
+
+    def __init__(self):
+        self.events = []
+        self.failures = {}
+        self.delays = {}
+        self.lock = threading.Lock()
+        self.message_id = 0
+
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode()
+                text = parse_qs(body).get("text", [""])[0]
+                status, response = api.handle(text)
+                data = json.dumps(response).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def handle(self, text: str):
+        with self.lock:
+            self.events.append(f"start:{text}")
+            failures = self.failures.get(text)
+            failure = failures.pop(0) if failures else None
+        time.sleep(self.delays.get(text, 0))
+        with self.lock:
+            self.events.append(f"end:{text}")
+            if failure:
+                return failure
+            self.message_id += 1
+            return 200, {"ok": True, "result": {"message_id": self.message_id}}
+
+    def texts(self, kind: str = "start"):
+        with self.lock:
+            return [event.split(":", 1)[1] for event in self.events if event.startswith(f"{kind}:")]
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def api():
+    stub = StubBotApi()
+    yield stub
+    stub.close()
+
+
+@pytest.fixture
+def bot(api):
+    return TelegramBot("TOKEN", "1", ParseMode.HTML, api_base=api.url, base_delay=0.01)
+
+
+def test_retries_rate_limited_and_failed_requests(api, bot):
+    api.failures["hello"] = [
+        (429, {"ok": False, "error_code": 429, "parameters": {"retry_after": 0.05}}),
+        (502, {"ok": False, "error_code": 502}),
+    ]
+    dispatcher = NotificationDispatcher()
+    try:
+        assert dispatcher.call(bot.send_message, "hello", timeout=5) == 1
+    finally:
+        dispatcher.shutdown(close=bot.close, timeout=5)
+
+    assert api.texts() == ["hello", "hello", "hello"]
+    assert dispatcher.stats()["failed"] == 0
+
+
+def test_submit_after_starts_once_previous_is_done(api, bot):
+    api.delays["photo"] = 0.3
+    dispatcher = NotificationDispatcher(max_concurrency=2)
+    try:
+        photo = dispatcher.submit(bot.send_message, "photo")
+        clip = dispatcher.submit_after(photo, bot.send_message, "clip")
+        other = dispatcher.submit(bot.send_message, "other")
+        clip.result(timeout=5)
+        other.result(timeout=5)
+    finally:
+        dispatcher.shutdown(close=bot.close, timeout=5)
+
+    assert api.events.index("start:clip") > api.events.index("end:photo")
+    # The chained job doesn't hold a slot while it waits, so the other one isn't held up
+    assert api.events.index("start:other") < api.events.index("end:photo")
+
+
+def test_single_slot_sends_in_submission_order(api, bot):
+    dispatcher = NotificationDispatcher(max_concurrency=1)
+    texts = [f"message {i}" for i in range(6)]
+    try:
+        futures = [dispatcher.submit(bot.send_message, text) for text in texts]
+        assert [future.result(timeout=5) for future in futures] == [1, 2, 3, 4, 5, 6]
+    finally:
+        dispatcher.shutdown(close=bot.close, timeout=5)
+
+    assert api.texts() == texts
+
+
+def test_shutdown_flushes_pending_jobs_and_closes(api, bot):
+    for i in range(4):
+        api.delays[f"message {i}"] = 0.1
+    dispatcher = NotificationDispatcher(max_concurrency=1)
+    futures = [dispatcher.submit(bot.send_message, f"message {i}") for i in range(4)]
+
+    dispatcher.shutdown(close=bot.close, timeout=10)
+
+    assert all(future.done() for future in futures)
+    assert api.texts("end") == [f"message {i}" for i in range(4)]
+    assert bot.session is None
+    assert dispatcher.stats()["pending"] == 0
+    assert dispatcher.submit(bot.send_message, "too late") is None
@@ -1,8 +1,46 @@
 from abc import ABC, abstractmethod
 import numpy as np
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
+
+from core.helper.detections import Detections
 
 class BaseDetector(ABC):
+    # Intra-op threads for this detector's models when run in parallel mode (None = engine decides);
+    # enforced per model for ONNX Runtime, PyTorch models share one process-wide setting
+    num_threads: Optional[int] = None
+
+    # How AnnotationRenderer draws this detector's results
+    colors: Dict[str, Tuple[int, int, int]] = {}
+    default_color: Tuple[int, int, int] = (0, 255, 0)
+    fill_alpha: float = 0.0  # > 0 fills polygons with this opacity
+    show_label: bool = True
+
     @abstractmethod
-    def detect(self, frame: np.ndarray) -> list:
+    def predict(self, frame: np.ndarray) -> Detections:
+        """Run inference only. Must not modify `frame`, it may be shared with other detectors."""
         pass
+
+    def predict_batch(self, frames: List[np.ndarray]) -> List[Detections]:
+        """Predict on several frames (e.g. one per camera), one result list per frame."""
+        return [self.predict(frame) for frame in frames]
+
+    def visible(self, detections: Detections) -> Detections:
+        """Subset of `detections` that should be drawn."""
+        return detections
+
+    def color_of(self, class_name: str) -> Tuple[int, int, int]:
+        return self.colors.get(class_name, self.default_color)
+
+    def triggers(self, detections: Detections) -> Detections:
+        """Subset of `detections` that should count towards an alert."""
+        return detections
+
+    def models(self) -> list:
+        """
+        The `ObjectDetector`s this detector runs, e.g. for tuning their input size or thread budget.
+        Detectors override this to list their models; the default is none.
+        """
+        return []
+
+    def detect(self, frame: np.ndarray) -> Detections:
+        return self.triggers(self.predict(frame))
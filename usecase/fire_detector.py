@@ -1,63 +1,35 @@
-from typing import List, Dict
+from typing import List, Optional
 
-import cv2
-import cvzone
 import numpy as np
 
+import config
+from core.helper.detections import Detections
 from core.helper.detector import ObjectDetector
-from core.helper.extensions import to_camel_case
 from usecase.base_detector import BaseDetector as Base
 
 
 class FireDetector(Base):
-    def __init__(self, min_conf: float = 0.25, show_label: bool = True):
+    def __init__(self, min_conf: float = 0.25, show_label: bool = True, backend: Optional[str] = None):
         self.detector = ObjectDetector(
-            "model/reliable_model/fire_v6.pt", allowed_classes=[]
+            "model/reliable_model/fire_v6.pt", allowed_classes=[],
+            backend=backend or config.backend_for("fire"),
         )
         self.min_conf = min_conf
         self.show_label = show_label
-        self.color_map = {
+        self.colors = {
             "fire": (0, 0, 255),
             "smoke": (255, 0, 0),
         }
+        self.fill_alpha = 0.4
 
-    def detect(self, frame: np.ndarray) -> List[Dict]:
-        detections = self.detector.detect_plg(frame)
+    def visible(self, detections: Detections) -> Detections:
+        return detections.filter(min_conf=self.min_conf)
 
-        if not detections:
-            return []
+    def models(self) -> List[ObjectDetector]:
+        return [self.detector]
 
-        has_overlay = False
-        overlay = frame.copy()
+    def predict(self, frame: np.ndarray) -> Detections:
+        return self.detector.detect_plg(frame)
 
-        for det in detections:
-            conf = det["confidence"]
-            if conf < self.min_conf:
-                continue
-
-            cls_name = det["class_name"]
-            polygon = np.array([det["polygon"]], dtype=np.int32)
-            color = self.color_map.get(cls_name, (0, 255, 0))  # fallback to green
-
-            # Fill and outline
-            cv2.fillPoly(overlay, polygon, color)
-            cv2.polylines(frame, polygon, isClosed=True, color=color, thickness=1)
-
-            # Optional label
-            if self.show_label:
-                x, y = det["polygon"][0]
-                cvzone.putTextRect(
-                    frame,
-                    to_camel_case(cls_name),
-                    (max(20, x), max(20, y)),
-                    colorR=color,
-                    scale=1,
-                    thickness=1,
-                )
-
-            has_overlay = True
-
-        if has_overlay:
-            cv2.addWeighted(overlay, 0.4, frame, 0.6, 0, frame)
-
-        return detections
+    def predict_batch(self, frames: List[np.ndarray]) -> List[Detections]:
+        return self.detector.detect_plg_batch(frames)
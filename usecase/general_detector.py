@@ -1,23 +1,21 @@
 import numpy as np
-from typing import List, Dict
+from typing import List, Optional
+import config
+from core.helper.detections import Detections
 from core.helper.detector import ObjectDetector
 from usecase.base_detector import BaseDetector as Base
-from core.helper.extensions import to_camel_case
-import cv2
-import cvzone
 
 
 class GeneralDetector(Base):
-    def __init__(self, min_conf: float = 0.25, show_label: bool = True):
+    def __init__(self, min_conf: float = 0.25, show_label: bool = True, backend: Optional[str] = None):
         allowed_classes = []
         self.animal_detector = ObjectDetector(
-            "model/reliable_model/general_v2.pt", allowed_classes=allowed_classes
+            "model/reliable_model/general_v2.pt", allowed_classes=allowed_classes,
+            backend=backend or config.backend_for("general"),
         )
         self.min_conf = min_conf
         self.show_label = show_label
-
-    def detect(self, frame: np.ndarray) -> List[Dict]:
-        color = {
+        self.colors = {
             "bird": (51, 87, 255),  # orange-red
             "cat": (255, 193, 51),  # sky blue-ish
             "chick": (102, 255, 255),  # yellow
@@ -35,21 +33,14 @@ class GeneralDetector(Base):
             "person": (0, 255, 0),  # near white
         }
 
-        detector = self.animal_detector.detect(frame)
-        for det in detector:
-            bbox = det["bbox"]
-            x1, y1, x2, y2 = bbox
-            cls_name = det["class_name"]
-            conf = det["confidence"]
-            if conf >= self.min_conf:
-                cv2.rectangle(frame, (x1, y1), (x2, y2), color[cls_name], 1)
-                if self.show_label:
-                    cvzone.putTextRect(
-                        frame,
-                        to_camel_case(cls_name),
-                        (max(20, x1), max(20, y1)),
-                        colorR=color[cls_name],
-                        scale=1,
-                        thickness=1,
-                    )
-        return detector
+    def visible(self, detections: Detections) -> Detections:
+        return detections.filter(min_conf=self.min_conf)
+
+    def models(self) -> List[ObjectDetector]:
+        return [self.animal_detector]
+
+    def predict(self, frame: np.ndarray) -> Detections:
+        return self.animal_detector.detect(frame)
+
+    def predict_batch(self, frames: List[np.ndarray]) -> List[Detections]:
+        return self.animal_detector.detect_batch(frames)
@@ -0,0 +1,93 @@
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from usecase.base_detector import BaseDetector
+
+
+def _general():
+    from usecase.general_detector import GeneralDetector
+    return GeneralDetector()
+
+
+def _fire():
+    from usecase.fire_detector import FireDetector
+    return FireDetector()
+
+
+def _ppe():
+    from usecase.ppe_detector import PPEDetector
+    return PPEDetector()
+
+
+def _road_damage():
+    from usecase.road_dmg_detector import RoadDmgDetector
+    return RoadDmgDetector()
+
+
+USE_CASES: Dict[str, List[Callable[[], BaseDetector]]] = {
+    "palm_security": [_general, _fire],
+    "ppe": [_ppe],
+    "road_damage": [_road_damage],
+}
+
+# Use cases whose cameras are fixed, so a static picture means nothing new to detect.
+# road_damage footage comes from a moving vehicle and always changes.
+MOTION_GATED = {"palm_security", "ppe"}
+
+
+class DetectorRegistry:
+    """
+    Builds the detectors of a use case on demand, so only the weights that use case needs are loaded.
+    Models themselves are shared through `ModelCache`, so repeated runs reuse already loaded weights.
+    """
+
+    def __init__(
+            self,
+            use_cases: Optional[Dict[str, List[Callable[[], BaseDetector]]]] = None,
+            motion_gated: Optional[Set[str]] = None,
+    ):
+        self.use_cases = dict(use_cases or USE_CASES)
+        self.motion_gated = set(MOTION_GATED if motion_gated is None else motion_gated)
+
+    def names(self) -> List[str]:
+        return list(self.use_cases)
+
+    def register(self, use_case: str, factories: List[Callable[[], BaseDetector]], motion_gated: bool = False):
+        self.use_cases[use_case] = list(factories)
+        if motion_gated:
+            self.motion_gated.add(use_case)
+        else:
+            self.motion_gated.discard(use_case)
+
+    def is_motion_gated(self, use_case: str) -> bool:
+        """Whether inference for this use case may be skipped while the scene is static."""
+        return use_case in self.motion_gated
+
+    def create(self, use_case: str, warm_up: bool = False) -> List[BaseDetector]:
+        factories = self.use_cases.get(use_case)
+        if factories is None:
+            raise ValueError(f"Unknown usecase: {use_case}")
+
+        detectors = [factory() for factory in factories]
+        if warm_up:
+            self.warm_up_detectors(detectors)
+        return detectors
+
+    def warm_up(self, use_case: str, frame_size: Tuple[int, int] = (1280, 720)) -> float:
+        """Load the use case's models and run them once, returns the seconds it took."""
+        start = time.perf_counter()
+        self.warm_up_detectors(self.create(use_case), frame_size)
+        return time.perf_counter() - start
+
+    @staticmethod
+    def warm_up_detectors(detectors: List[BaseDetector], frame_size: Tuple[int, int] = (1280, 720)):
+        # The first call sets up the predictor and allocates buffers; do it before real frames arrive
+        width, height = frame_size
+        blank = np.zeros((height, width, 3), dtype=np.uint8)
+        for detector in detectors:
+            detector.predict(blank)
+
+
+registry = DetectorRegistry()
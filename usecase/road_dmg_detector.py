@@ -1,46 +1,30 @@
 import numpy as np
-from typing import List, Dict
+from typing import List, Optional
+import config
+from core.helper.detections import Detections
 from core.helper.detector import ObjectDetector
 from usecase.base_detector import BaseDetector as Base
-from core.helper.extensions import to_camel_case
-import cv2
-import cvzone
 
 class RoadDmgDetector(Base):
-    def __init__(self, min_conf: float = 0.25, show_label: bool = True):
+    def __init__(self, min_conf: float = 0.25, show_label: bool = True, backend: Optional[str] = None):
         allowed_classes = []  # Or specify class indices you want
         self.detector = ObjectDetector(
-            "model/road_damage_v3.pt", allowed_classes=allowed_classes
+            "model/road_damage_v3.pt", allowed_classes=allowed_classes,
+            backend=backend or config.backend_for("road_damage"),
         )
         self.min_conf = min_conf
         self.show_label = show_label
+        self.default_color = (0, 0, 255)
+        self.fill_alpha = 0.4
 
-    def detect(self, frame: np.ndarray) -> List[Dict]: 
-        color = (0, 0, 255)
-        detections = self.detector.detect_plg(frame)
-        overlay = frame.copy()
+    def visible(self, detections: Detections) -> Detections:
+        return detections.filter(min_conf=self.min_conf)
 
-        for det in detections:
-            polygon = np.array([det["polygon"]], dtype=np.int32)  # ✅ wrap in list + convert to np array
-            cls_name = det["class_name"]
-            conf = det["confidence"]
+    def models(self) -> List[ObjectDetector]:
+        return [self.detector]
 
-            if conf >= self.min_conf:
-                cv2.fillPoly(overlay, polygon, color)
-                cv2.polylines(frame, polygon, isClosed=True, color=color, thickness=1)
+    def predict(self, frame: np.ndarray) -> Detections:
+        return self.detector.detect_plg(frame)
 
-                if self.show_label:
-                    x, y = det["polygon"][0]
-                    cvzone.putTextRect(
-                        frame,
-                        to_camel_case(cls_name),
-                        (max(20, x), max(20, y)),
-                        colorR=color,
-                        scale=1,
-                        thickness=1,
-                    )
-
-        # 🧪 Blend the overlay (with shading) into the frame
-        cv2.addWeighted(overlay, 0.4, frame, 0.6, 0, frame)
-
-        return detections
+    def predict_batch(self, frames: List[np.ndarray]) -> List[Detections]:
+        return self.detector.detect_plg_batch(frames)